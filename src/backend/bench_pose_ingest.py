@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""포즈 프레임 저장 처리량 벤치마크 (변경 전 pose/submit/ vs 현재 pose/submit/ vs pose/submit_batch/)
+
+변경 전 pose/submit/ 은 프레임마다 INSERT 후 피드백을 넣어 UPDATE 하던 처리 (baseline_submit_pose_frame 으로 재현)
+POSE_WRITE_BEHIND 가 켜져 있으면 현재 엔드포인트는 202 를 반환하므로 버퍼를 비운 뒤 행 수를 확인
+
+사용법:
+    python bench_pose_ingest.py [프레임 수] [배치 크기]
+"""
+import os
+import sys
+import time
+import django
+
+# Django 설정
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'testemo.settings')
+django.setup()
+
+from django.contrib.auth.models import User
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from emodia.feedback import DEFAULT_EXERCISE, generate_feedback
+from emodia.models import Sports, WorkoutSession, PoseFrame
+from emodia.pose_buffer import flush_pose_buffer
+from emodia.serializers import PoseFrameSerializer
+from emodia.views import submit_pose_frame, submit_pose_frame_batch
+
+FRAME_COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+BATCH_SIZE = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+
+def make_keypoints(i):
+    """목 왼쪽 스트레칭 중인 가짜 키포인트"""
+    offset = -0.05 - (i % 10) * 0.005
+    return [
+        {'name': 'nose', 'x': 0.5 + offset, 'y': 0.3, 'score': 0.95},
+        {'name': 'left_eye', 'x': 0.47 + offset, 'y': 0.28, 'score': 0.93},
+        {'name': 'right_eye', 'x': 0.53 + offset, 'y': 0.28, 'score': 0.93},
+        {'name': 'left_ear', 'x': 0.44, 'y': 0.31, 'score': 0.9},
+        {'name': 'right_ear', 'x': 0.56, 'y': 0.29, 'score': 0.9},
+        {'name': 'left_shoulder', 'x': 0.38, 'y': 0.52, 'score': 0.92},
+        {'name': 'right_shoulder', 'x': 0.62, 'y': 0.53, 'score': 0.92},
+        {'name': 'left_elbow', 'x': 0.33, 'y': 0.7, 'score': 0.85},
+        {'name': 'right_elbow', 'x': 0.67, 'y': 0.7, 'score': 0.85},
+        {'name': 'left_wrist', 'x': 0.31, 'y': 0.86, 'score': 0.8},
+        {'name': 'right_wrist', 'x': 0.69, 'y': 0.86, 'score': 0.8},
+    ]
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def baseline_submit_pose_frame(request):
+    """변경 전 pose/submit/: 저장(INSERT) 후 피드백을 계산해 다시 저장(UPDATE)"""
+    serializer = PoseFrameSerializer(data=request.data, context={'request': request})
+    serializer.is_valid(raise_exception=True)
+    pose_frame = serializer.save()
+    feedback = generate_feedback(pose_frame.get_keypoints(), request.data.get('exercise_type', DEFAULT_EXERCISE))
+    pose_frame.feedback = feedback
+    pose_frame.save()
+    return Response({'id': pose_frame.id, 'kept': 1, 'feedback': feedback}, status=201)
+
+
+def bench_single(factory, user, session, view):
+    """프레임마다 요청 1개 → (걸린 시간, 저장한 프레임 수)"""
+    kept = 0
+    start = time.perf_counter()
+    for i in range(FRAME_COUNT):
+        request = factory.post('/api/pose/submit/', {
+            'session': session.id,
+            'timestamp': i / 20,
+            'keypoints': make_keypoints(i),
+            'exercise_type': 'neck_left',
+        }, format='json')
+        force_authenticate(request, user=user)
+        response = view(request)
+        # 저장 정책으로 버린 프레임은 200, 쓰기 지연이면 202
+        assert response.status_code in (200, 201, 202), response.data
+        kept += response.data['kept']
+    flush_pose_buffer()
+    return time.perf_counter() - start, kept
+
+
+def bench_batch(factory, user, session):
+    kept = 0
+    start = time.perf_counter()
+    for offset in range(0, FRAME_COUNT, BATCH_SIZE):
+        frames = [
+            {'timestamp': i / 20, 'keypoints': make_keypoints(i)}
+            for i in range(offset, min(offset + BATCH_SIZE, FRAME_COUNT))
+        ]
+        request = factory.post('/api/pose/submit_batch/', {
+            'session': session.id,
+            'exercise_type': 'neck_left',
+            'frames': frames,
+        }, format='json')
+        force_authenticate(request, user=user)
+        response = submit_pose_frame_batch(request)
+        assert response.status_code in (201, 202), response.data
+        kept += response.data['kept']
+    flush_pose_buffer()
+    return time.perf_counter() - start, kept
+
+
+user, _ = User.objects.get_or_create(username='__bench_pose_ingest__')
+sports, _ = Sports.objects.get_or_create(name='__bench__')
+factory = APIRequestFactory()
+
+print(f"=== 포즈 프레임 저장 벤치마크 ({FRAME_COUNT}개 프레임, 배치 {BATCH_SIZE}) ===\n")
+try:
+    results = []
+    for label, bench in (
+        ('변경 전 pose/submit/', lambda session: bench_single(factory, user, session, baseline_submit_pose_frame)),
+        ('pose/submit/', lambda session: bench_single(factory, user, session, submit_pose_frame)),
+        ('pose/submit_batch/', lambda session: bench_batch(factory, user, session)),
+    ):
+        # 엔드포인트마다 새 세션 (세션 상태 / 저장 정책이 서로 영향을 주지 않도록)
+        session = WorkoutSession.objects.create(user=user, sports=sports)
+        elapsed, kept = bench(session)
+        assert PoseFrame.objects.filter(session=session).count() == kept
+        results.append((label, elapsed, kept))
+
+    baseline_rate = FRAME_COUNT / results[0][1]
+    for label, elapsed, kept in results:
+        rate = FRAME_COUNT / elapsed
+        print(f"{label:<20}: {elapsed:.2f}초, {rate:,.0f} frames/sec (저장 {kept}개), 변경 전 대비 {rate / baseline_rate:.1f}x")
+finally:
+    # 벤치마크 데이터 정리 (세션, 프레임은 CASCADE)
+    WorkoutSession.objects.filter(user=user).delete()
+    sports.delete()
+    user.delete()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""키포인트 파서 마이크로벤치마크 (프레임당 CPU 시간: 기존 선형 검색 vs parse_pose 한 번)
+
+사용법:
+    python bench_pose_parser.py [반복 횟수]
+"""
+import math
+import os
+import sys
+import timeit
+import django
+
+# Django 설정
+sys.path.insert(0, os.path.dirname(__file__))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'testemo.settings')
+django.setup()
+
+from emodia.keypoints import KEYPOINT_NAMES, parse_pose
+from emodia.ml_utils import extract_features
+from emodia.feedback import generate_feedback
+
+REPEAT = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+KEYPOINTS = [
+    {'name': name, 'x': 0.3 + i * 0.02, 'y': 0.2 + i * 0.03, 'score': 0.9}
+    for i, name in enumerate(KEYPOINT_NAMES)
+]
+
+
+# ===== 기존 방식 (이름별 선형 검색) 재현 =====
+
+def legacy_get_keypoint(keypoints, name):
+    for kp in keypoints:
+        if kp.get('name') == name:
+            return kp
+    return None
+
+
+def legacy_feedback_lookups(keypoints):
+    """기존 feedback_neck_left 의 키포인트 검색 부분"""
+    nose = next((k for k in keypoints if k['name'] == 'nose'), None)
+    left_ear = next((k for k in keypoints if k['name'] == 'left_ear'), None)
+    right_ear = next((k for k in keypoints if k['name'] == 'right_ear'), None)
+    left_shoulder = next((k for k in keypoints if k['name'] == 'left_shoulder'), None)
+    right_shoulder = next((k for k in keypoints if k['name'] == 'right_shoulder'), None)
+    return nose['x'] - (left_shoulder['x'] + right_shoulder['x']) / 2, left_ear, right_ear
+
+
+def legacy_feature_lookups(keypoints):
+    """extract_features 의 키포인트 검색 부분 (calculate_symmetry 의 4회 포함)"""
+    names = (
+        'nose', 'left_ear', 'right_ear', 'left_shoulder', 'right_shoulder',
+        'left_elbow', 'right_elbow', 'left_wrist', 'right_wrist',
+        'left_shoulder', 'right_shoulder', 'left_elbow', 'right_elbow',
+    )
+    found = [legacy_get_keypoint(keypoints, name) for name in names]
+    scores = [kp['score'] for kp in keypoints if 'score' in kp]
+    return found, sum(scores) / len(scores), math.sqrt(2)
+
+
+def new_lookups(keypoints):
+    """parse_pose 한 번으로 피드백 + 특징 추출에 필요한 값 모두 확보"""
+    pose = parse_pose(keypoints)
+    return pose.x, pose.y, pose.present, pose.score_sum / pose.score_count
+
+
+def per_frame_us(stmt):
+    return min(timeit.repeat(stmt, number=REPEAT, repeat=3)) / REPEAT * 1e6
+
+
+print(f"=== 키포인트 파서 벤치마크 (키포인트 {len(KEYPOINTS)}개, {REPEAT}회 반복) ===\n")
+
+legacy_feedback = per_frame_us(lambda: legacy_feedback_lookups(KEYPOINTS))
+legacy_both = per_frame_us(lambda: (legacy_feedback_lookups(KEYPOINTS), legacy_feature_lookups(KEYPOINTS)))
+parsed = per_frame_us(lambda: new_lookups(KEYPOINTS))
+
+print("키포인트 검색 비용 (프레임당)")
+print(f"  기존 피드백만 (5회 검색)           : {legacy_feedback:6.2f} µs")
+print(f"  기존 피드백 + 특징 추출 (18회 검색) : {legacy_both:6.2f} µs")
+print(f"  parse_pose 1회 (모든 소비자가 공유) : {parsed:6.2f} µs")
+
+
+def new_pipeline():
+    pose = parse_pose(KEYPOINTS)
+    return generate_feedback(pose, 'neck_left'), extract_features(pose)
+
+
+print(f"\n피드백 + 특징 추출 전체 (parse_pose 1회 공유): {per_frame_us(new_pipeline):6.2f} µs/frame")
+print(f"피드백 + 특징 추출 기준 프레임당 절약: {legacy_both - parsed:.2f} µs ({legacy_both / parsed:.1f}x)")
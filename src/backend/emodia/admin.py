@@ -1,9 +1,11 @@
-from django.contrib import admin
+import json
+
+from django.contrib import admin, messages
 from django.utils.html import format_html
 from .models import (
     Sports, EmotionVideo, EmotionRecord,
     WorkoutSession, PoseFrame,
-    ExpertPoseTemplate, FeedbackRating, MLModel
+    ExpertPoseTrack, ExpertPoseTemplate, FeedbackRating, MLModel
 )
 
 
@@ -111,6 +113,12 @@ class PoseFrameAdmin(admin.ModelAdmin):
     list_display = ("id", "session_info", "timestamp_display", "has_feedback", "has_ratings")
     search_fields = ("session__id", "session__user__username")
     list_filter = ("session__sports", "session__start_time")
+    readonly_fields = ("keypoints_display",)
+
+    def keypoints_display(self, obj):
+        # JSON / packed 저장 형식과 관계없이 키포인트 표시
+        return format_html('<pre>{}</pre>', json.dumps(obj.get_keypoints(), ensure_ascii=False, indent=2))
+    keypoints_display.short_description = '키포인트'
 
     def session_info(self, obj):
         return f"Session #{obj.session.id} - {obj.session.user.username}"
@@ -136,6 +144,17 @@ class PoseFrameAdmin(admin.ModelAdmin):
 
 # ========== ML 인프라 Admin ==========
 
+@admin.register(ExpertPoseTrack)
+class ExpertPoseTrackAdmin(admin.ModelAdmin):
+    list_display = ("id", "video", "frame_count", "sample_fps", "template_count", "extracted_at")
+    readonly_fields = ("video", "fingerprint", "sample_fps", "frame_count", "extracted_at")
+    exclude = ("timestamps", "keypoints")
+
+    def template_count(self, obj):
+        return obj.templates.count()
+    template_count.short_description = '후보 템플릿'
+
+
 @admin.register(ExpertPoseTemplate)
 class ExpertPoseTemplateAdmin(admin.ModelAdmin):
     list_display = ("id", "sports", "exercise_phase", "quality_level", "created_by", "is_active", "created_at")
@@ -152,24 +171,36 @@ class ExpertPoseTemplateAdmin(admin.ModelAdmin):
             'description': 'keypoints: 전문가 포즈 좌표 (JSON), features: 자동 계산된 특징 (선택사항)'
         }),
         ('메타데이터', {
-            'fields': ('description', 'created_by', 'created_at')
+            'fields': ('description', 'created_by', 'created_at', 'source_track', 'source_timestamp')
         }),
     )
 
     actions = ['extract_features_action']
 
     def extract_features_action(self, request, queryset):
-        """선택한 템플릿의 특징 자동 추출"""
-        from .ml_utils import extract_features
-
-        count = 0
-        for template in queryset:
-            if template.keypoints:
-                template.features = extract_features(template.keypoints)
-                template.save()
-                count += 1
+        """선택한 템플릿의 특징 자동 추출 (한 번에 계산 후 bulk_update, 좌표 형식이 잘못된 템플릿은 건너뜀)"""
+        from .ml_utils import extract_template_features, FEATURE_SCHEMA_VERSION
+        from .template_index import invalidate_template_index
+
+        templates = [template for template in queryset if template.keypoints]
+        computed = extract_template_features(templates)
+        skipped = [template.id for template in templates if template.id not in computed]
+        templates = [template for template in templates if template.id in computed]
+        for template in templates:
+            template.features = computed[template.id]
+            template.features_version = FEATURE_SCHEMA_VERSION
+        ExpertPoseTemplate.objects.bulk_update(templates, ['features', 'features_version'], batch_size=500)
+        # bulk_update 는 post_save 신호가 없으므로 직접 무효화
+        invalidate_template_index()
+        count = len(templates)
 
         self.message_user(request, f'{count}개 템플릿의 특징을 추출했습니다.')
+        if skipped:
+            self.message_user(
+                request,
+                f'좌표 형식이 잘못된 {len(skipped)}개 템플릿은 건너뛰었습니다 (ID: {", ".join(map(str, skipped))})',
+                level=messages.WARNING,
+            )
 
     extract_features_action.short_description = '선택한 템플릿의 특징 추출'
 
@@ -236,14 +267,9 @@ class MLModelAdmin(admin.ModelAdmin):
             self.message_user(request, '1개의 모델만 선택해주세요.', level='error')
             return
 
+        # 같은 스포츠의 다른 모델 비활성화 + 선택한 모델 활성화 (한 트랜잭션)
         model = queryset.first()
-
-        # 같은 스포츠의 다른 모델 비활성화
-        MLModel.objects.filter(sports=model.sports, is_active=True).update(is_active=False)
-
-        # 선택한 모델 활성화
-        model.is_active = True
-        model.save()
+        model.activate()
 
         self.message_user(request, f'{model}을(를) 활성화했습니다.')
 
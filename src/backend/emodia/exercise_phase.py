@@ -0,0 +1,104 @@
+"""
+운동 단계(phase) 판정 + 반복 횟수 + 유지 시간 (세션별 온라인 상태 기계)
+
+EXERCISE_RULES 의 'progress' (부호 적용 후 값이 클수록 최대 자세) 로 프레임마다
+    start (준비) → middle (진행) → peak (최대 자세, 유지 시간 측정) → end (복귀) → start
+를 판정하고, end → start 로 돌아올 때 반복 1회로 센다.
+- 진행도는 최근 window 프레임의 이동평균 (고정 크기 링 버퍼 + 누적합, 프레임당 O(1))
+- 기준값 근처에서 흔들려도 단계가 오가지 않도록 되돌아가는 쪽은 (peak - rest) * hysteresis 만큼 더 넘어야 전환
+- 'progress' 가 없는 운동(정적 자세)은 피드백 상태가 good 인 동안을 peak 로 보고 유지 시간만 측정
+상태는 세션 요약(session_summary.SessionSummary)에 붙어 있어 DB 를 읽지 않는다.
+프레임은 session_ingest 에서 한 번 만든 Pose 를 그대로 받는다 (키포인트를 다시 파싱하지 않음).
+"""
+
+from collections import deque
+
+
+def is_rep(phase):
+    """phase 결과가 반복 1회 완료(end → start)인지"""
+    return phase['previous'] == 'end' and phase['name'] == 'start'
+
+
+class PhaseTracker:
+    """운동 1개의 단계 상태 (운동이 바뀌면 새로 만듦)"""
+    __slots__ = (
+        'plan', 'values', 'total', 'margin', 'phase', 'reps', 'hold_seconds', 'last_timestamp'
+    )
+
+    def __init__(self, plan, window=5, hysteresis=0.25):
+        self.plan = plan
+        self.values = deque(maxlen=max(1, window))
+        self.total = 0.0  # values 합계
+        progress = plan.progress
+        self.margin = (progress.peak - progress.rest) * hysteresis if progress is not None else 0.0
+        self.phase = 'start'
+        self.reps = 0
+        self.hold_seconds = 0.0  # 현재 peak 유지 시간
+        self.last_timestamp = None
+
+    def _smooth(self, value):
+        values = self.values
+        if len(values) == values.maxlen:
+            self.total -= values[0]
+        values.append(value)
+        self.total += value
+        return self.total / len(values)
+
+    def _next_phase(self, value):
+        """이동평균 진행도 → 다음 단계"""
+        progress = self.plan.progress
+        phase = self.phase
+        if phase == 'start':
+            if value > progress.rest:
+                return 'peak' if value > progress.peak else 'middle'
+        elif phase == 'middle':
+            if value > progress.peak:
+                return 'peak'
+            if value < progress.rest - self.margin:
+                # 최대 자세까지 가지 않고 돌아옴 (반복으로 세지 않음)
+                return 'start'
+        elif phase == 'peak':
+            if value < progress.peak - self.margin:
+                return 'end'
+        elif phase == 'end':
+            if value > progress.peak:
+                return 'peak'
+            if value < progress.rest:
+                return 'start'
+        return phase
+
+    def update(self, pose, status, timestamp, max_gap=1.0):
+        """
+        프레임 1개 반영 → {'name', 'previous', 'reps', 'hold_seconds'}
+        pose: parse_pose 결과 (인식 오류 프레임은 None)
+        previous: 이 프레임에서 단계가 바뀌었으면 직전 단계, 아니면 None
+        필요한 키포인트가 없는 프레임은 단계를 유지
+        """
+        previous = self.phase
+        if self.plan.progress is None:
+            phase = 'peak' if status == 'good' else 'start'
+        else:
+            value = None if pose is None else self.plan.progress.value(pose)
+            phase = previous if value is None else self._next_phase(self._smooth(value))
+
+        if phase == 'peak':
+            if self.phase == 'peak' and self.last_timestamp is not None:
+                elapsed = timestamp - self.last_timestamp
+                if 0 < elapsed <= max_gap:
+                    self.hold_seconds += elapsed
+        else:
+            self.hold_seconds = 0.0
+        self.last_timestamp = timestamp
+
+        changed = phase != self.phase
+        self.phase = phase
+        result = {
+            'name': phase,
+            'previous': previous if changed else None,
+            'reps': self.reps,
+            'hold_seconds': round(self.hold_seconds, 2),
+        }
+        if is_rep(result):
+            self.reps += 1
+            result['reps'] = self.reps
+        return result
@@ -0,0 +1,140 @@
+"""
+전문가 영상(EmotionVideo) → 포즈 궤적(ExpertPoseTrack) + 후보 템플릿(ExpertPoseTemplate)
+
+영상마다
+1. 파일 지문(fingerprint) 계산 - 지난 추출과 같으면 건너뜀 (중단 후 다시 실행해도 이어서 처리)
+2. 영상을 segment_seconds 구간으로 나눠 작업 프로세스 풀에서 동시에 스트림 디코딩 + 샘플 프레임 포즈 추정
+3. 궤적을 float32 배열로 저장하고, 구간별로 고른 프레임을 비활성(is_active=False) 후보 템플릿으로 bulk_create
+   (phase 는 영상 내 위치로 정한 초기값이므로 관리자 검토 후 활성화)
+"""
+
+import hashlib
+import os
+
+import numpy as np
+from django.db import transaction
+
+from .keypoints import array_to_keypoints
+from .ml_utils import extract_features_batch, get_feature_names, FEATURE_SCHEMA_VERSION
+from .models import ExpertPoseTrack, ExpertPoseTemplate
+from .pose_estimation import extract_segment
+
+# 추출 방식이 바뀌면 올려서 기존 궤적을 다시 추출
+TRACK_FORMAT_VERSION = 1
+
+CANDIDATE_CREATED_BY = 'extract_expert_tracks'
+# 영상을 시간순으로 4등분해 앞에서부터 배정
+CANDIDATE_PHASES = ('start', 'middle', 'peak', 'end')
+CANDIDATE_QUALITY = 'good'
+CANDIDATE_MIN_CONFIDENCE = 0.5
+
+
+def video_fingerprint(path, sample_fps, block_size=1 << 20):
+    """파일 크기 + 앞/뒤 block_size 바이트 + 추출 설정의 SHA-1 (전체를 읽지 않음)"""
+    size = os.path.getsize(path)
+    digest = hashlib.sha1(f'{TRACK_FORMAT_VERSION}:{sample_fps}:{size}'.encode())
+    with open(path, 'rb') as f:
+        digest.update(f.read(block_size))
+        if size > block_size:
+            f.seek(max(size - block_size, block_size))
+            digest.update(f.read(block_size))
+    return digest.hexdigest()
+
+
+def video_duration(path):
+    """영상 길이 (초), 알 수 없으면 None"""
+    import cv2
+
+    capture = cv2.VideoCapture(path)
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        frame_count = capture.get(cv2.CAP_PROP_FRAME_COUNT)
+    finally:
+        capture.release()
+    if fps > 0 and frame_count > 0:
+        return frame_count / fps
+    return None
+
+
+def submit_video(executor, path, sample_fps, segment_seconds):
+    """영상을 구간별 작업으로 제출 → future 리스트 (시간 순서)"""
+    duration = video_duration(path)
+    if duration is None:
+        # 길이를 모르면 한 작업 프로세스가 끝까지 처리
+        return [executor.submit(extract_segment, path, 0.0, float('inf'), sample_fps)]
+    starts = np.arange(0.0, duration, segment_seconds)
+    return [
+        executor.submit(extract_segment, path, float(start), float(start + segment_seconds), sample_fps)
+        for start in starts
+    ]
+
+
+def collect_track(futures):
+    """구간 결과 합치기 → (타임스탬프 (N,), 키포인트 (N, K, 3))"""
+    results = [future.result() for future in futures]
+    timestamps = np.concatenate([result[0] for result in results])
+    keypoints = np.concatenate([result[1] for result in results])
+    return timestamps, keypoints
+
+
+def select_candidates(keypoints, per_phase=3, min_confidence=CANDIDATE_MIN_CONFIDENCE):
+    """
+    후보 프레임 선택 → [(phase, 프레임 인덱스), ...]
+    평균 score 가 min_confidence 이상인 프레임을 시간순으로 4등분하고, 구간마다 per_phase 개를 고르게 선택
+    """
+    scores = keypoints[:, :, 2]
+    counts = (~np.isnan(scores)).sum(axis=1)
+    mean_scores = np.nansum(scores, axis=1) / np.maximum(counts, 1)
+    usable = np.flatnonzero((counts > 0) & (mean_scores >= min_confidence))
+
+    candidates = []
+    for phase, part in zip(CANDIDATE_PHASES, np.array_split(usable, len(CANDIDATE_PHASES))):
+        if not len(part):
+            continue
+        picks = np.unique(np.linspace(0, len(part) - 1, min(per_phase, len(part))).round().astype(int))
+        candidates.extend((phase, int(part[i])) for i in picks)
+    return candidates
+
+
+def save_track(video, fingerprint, sample_fps, timestamps, keypoints, per_phase=3):
+    """
+    궤적 저장 + 비활성 후보 템플릿 재생성 (한 트랜잭션)
+    이미 활성화된(검토 완료) 템플릿은 그대로 둠
+    반환값: (ExpertPoseTrack, 생성한 후보 수)
+    """
+    with transaction.atomic():
+        track = ExpertPoseTrack.objects.select_for_update().filter(video=video).first()
+        if track is None:
+            track = ExpertPoseTrack(video=video)
+        track.fingerprint = fingerprint
+        track.sample_fps = sample_fps
+        track.set_arrays(timestamps, keypoints)
+        track.save()
+
+        track.templates.filter(is_active=False, created_by=CANDIDATE_CREATED_BY).delete()
+        if video.sports_id is None:
+            return track, 0
+
+        name = video.original_filename or os.path.basename(video.video.name)
+        candidates = select_candidates(keypoints, per_phase)
+        # 후보 프레임 특징은 배열에서 한 번에 계산
+        feature_names = get_feature_names()
+        features = extract_features_batch(keypoints[[i for _, i in candidates]]).tolist() if candidates else []
+        templates = []
+        for (phase, i), row in zip(candidates, features):
+            frame_keypoints = array_to_keypoints(keypoints[i])
+            templates.append(ExpertPoseTemplate(
+                sports_id=video.sports_id,
+                exercise_phase=phase,
+                quality_level=CANDIDATE_QUALITY,
+                keypoints=frame_keypoints,
+                features=dict(zip(feature_names, row)),
+                features_version=FEATURE_SCHEMA_VERSION,
+                description=f'{name} {float(timestamps[i]):.1f}초 (자동 추출 후보)',
+                created_by=CANDIDATE_CREATED_BY,
+                is_active=False,
+                source_track=track,
+                source_timestamp=float(timestamps[i]),
+            ))
+        ExpertPoseTemplate.objects.bulk_create(templates)
+    return track, len(templates)
@@ -0,0 +1,478 @@
+"""
+운동별 자세 피드백 규칙 엔진
+
+운동마다 선언형 규칙 표(EXERCISE_RULES)를 두고, 앱 로딩 시 한 번 평가 계획(ExercisePlan)으로 컴파일한다.
+- mirror=True 인 운동은 왼쪽 기준으로 작성하면 '<이름>_left', '<이름>_right' 두 개가 만들어진다
+  (left_/right_ 키포인트를 서로 바꾸고, x축 측정값은 부호를 뒤집음)
+- 같은 계획으로 프레임 1개(generate_feedback)와 배열 일괄 평가(feedback_batch.evaluate_batch)를 모두 처리한다
+
+규칙 표 형식:
+    'require': (필수 키포인트, 보이지 않을 때 메시지)  → 없으면 status='warning' 으로 바로 반환
+    'rules': [
+        {
+            'requires': [...],           # (선택) 이 키포인트가 모두 있을 때만 평가
+            'metric': (종류, 키포인트...),  # METRICS 참고
+            'sign': 1 / -1,              # (선택) 비교 전에 곱하는 부호 (왼쪽 기준)
+            'record': 'nose_offset',     # (선택) 부호 적용 전 값을 angles 에 기록
+            'cases': [(연산자 '>' / '<', 기준값, 메시지, 경고 여부), ...],  # 처음 맞는 것 하나만
+            'default': (메시지, 경고 여부),  # (선택) 어떤 case 에도 맞지 않을 때
+        },
+    ]
+    'fallback': (메시지, 경고 여부)  # (선택) 메시지가 하나도 없을 때
+    'progress': {                    # (선택) 동작 진행도 (phase_tracker 의 phase/반복 횟수/유지 시간 판정)
+        'requires': [...], 'metric': (...), 'sign': 1 / -1,
+        'rest': 기준값,   # 이보다 작으면 준비 자세
+        'peak': 기준값,   # 이보다 크면 최대 자세 (유지 시간 측정)
+    }
+메시지의 {side} / {other} / {arm} 은 방향에 맞게 채워진다 (왼쪽 / 오른쪽 / 왼팔).
+"""
+
+from .keypoints import KEYPOINT_INDEX, parse_pose
+
+DEFAULT_EXERCISE = 'neck_left'
+
+# 메시지 코드 → 문구 (코드는 저장/분석에 쓰이므로 순서를 바꾸지 말고 뒤에 추가)
+MESSAGE_TEXTS = (
+    '얼굴과 어깨가 잘 보이지 않습니다',                  # 0
+    '어깨가 잘 보이지 않습니다',                        # 1
+    '⚠️ 어깨를 수평으로 유지하세요',                     # 2
+    '✓ 좋습니다! 목 스트레칭이 잘 되고 있습니다',          # 3
+    '✓ 조금 더 천천히 당겨보세요',                      # 4
+    '→ 머리를 왼쪽으로 더 기울이세요',                   # 5
+    '→ 머리를 오른쪽으로 더 기울이세요',                  # 6
+    '⚠️ 반대 방향입니다. 왼쪽으로 기울이세요',             # 7
+    '⚠️ 반대 방향입니다. 오른쪽으로 기울이세요',            # 8
+    '→ 머리를 왼쪽 어깨 방향으로 천천히 기울이세요',         # 9
+    '→ 머리를 오른쪽 어깨 방향으로 천천히 기울이세요',        # 10
+    '⚠️ 너무 많이 기울였습니다. 천천히 돌아오세요',          # 11
+    '✓ 좋습니다! 어깨 스트레칭이 잘 되고 있습니다',         # 12
+    '→ 왼팔을 오른쪽으로 더 당겨보세요',                  # 13
+    '→ 오른팔을 왼쪽으로 더 당겨보세요',                  # 14
+    '→ 왼팔을 가슴 앞으로 교차시켜주세요',                 # 15
+    '→ 오른팔을 가슴 앞으로 교차시켜주세요',                # 16
+    '상체가 잘 보이지 않습니다',                        # 17
+    '골반이 잘 보이지 않습니다',                        # 18
+    '⚠️ 골반을 수평으로 유지하세요',                     # 19
+    '✓ 좋습니다! 옆구리가 잘 늘어나고 있습니다',           # 20
+    '→ 상체를 왼쪽으로 더 기울이세요',                   # 21
+    '→ 상체를 오른쪽으로 더 기울이세요',                  # 22
+    '→ 팔을 올리고 상체를 왼쪽으로 천천히 기울이세요',        # 23
+    '→ 팔을 올리고 상체를 오른쪽으로 천천히 기울이세요',       # 24
+    '✓ 좋습니다! 골반이 바르게 정렬되어 있습니다',          # 25
+    '⚠️ 상체가 한쪽으로 기울었습니다. 몸통을 곧게 세우세요',   # 26
+    '✓ 좋습니다! 코어를 단단히 유지하세요',               # 27
+)
+MESSAGE_CODES = {text: code for code, text in enumerate(MESSAGE_TEXTS)}
+
+
+# ========== 규칙 표 ==========
+
+SHOULDER_LEVEL = {
+    'metric': ('abs_diff_y', 'left_shoulder', 'right_shoulder'),
+    'cases': [('>', 0.15, '⚠️ 어깨를 수평으로 유지하세요', True)],
+}
+
+EXERCISE_RULES = {
+    # 목 스트레칭: 머리를 한쪽 어깨 방향으로 기울이기
+    'neck': {
+        'mirror': True,
+        'require': (['nose', 'left_shoulder', 'right_shoulder'], '얼굴과 어깨가 잘 보이지 않습니다'),
+        'rules': [
+            SHOULDER_LEVEL,
+            {
+                # 코가 어깨 중심보다 왼쪽(음수)으로 갈수록 큰 값
+                'metric': ('center_offset_x', 'nose', 'left_shoulder', 'right_shoulder'),
+                'sign': -1,
+                'record': 'nose_offset',
+                'cases': [
+                    ('>', 0.09, '✓ 좋습니다! 목 스트레칭이 잘 되고 있습니다', False),
+                    ('>', 0.06, '✓ 조금 더 천천히 당겨보세요', False),
+                    ('>', 0.04, '→ 머리를 {side}으로 더 기울이세요', True),
+                    ('<', -0.04, '⚠️ 반대 방향입니다. {side}으로 기울이세요', True),
+                ],
+                'default': ('→ 머리를 {side} 어깨 방향으로 천천히 기울이세요', True),
+            },
+            {
+                # 과도한 기울기 방지
+                'requires': ['left_ear', 'right_ear'],
+                'metric': ('diff_y', 'left_ear', 'right_ear'),
+                'cases': [('>', 0.25, '⚠️ 너무 많이 기울였습니다. 천천히 돌아오세요', True)],
+            },
+        ],
+        'progress': {
+            'metric': ('center_offset_x', 'nose', 'left_shoulder', 'right_shoulder'),
+            'sign': -1,
+            'rest': 0.04,
+            'peak': 0.09,
+        },
+    },
+    # 어깨 스트레칭: 팔을 가슴 앞으로 교차해 당기기
+    'shoulder': {
+        'mirror': True,
+        'require': (['left_shoulder', 'right_shoulder'], '어깨가 잘 보이지 않습니다'),
+        'rules': [
+            SHOULDER_LEVEL,
+            {
+                # 손목이 반대쪽 어깨 방향으로 이동한 정도
+                'requires': ['left_wrist'],
+                'metric': ('diff_x', 'left_wrist', 'right_shoulder'),
+                'cases': [('>', -0.1, '✓ 좋습니다! 어깨 스트레칭이 잘 되고 있습니다', False)],
+                'default': ('→ {arm}을 {other}으로 더 당겨보세요', True),
+            },
+        ],
+        'fallback': ('→ {arm}을 가슴 앞으로 교차시켜주세요', True),
+        'progress': {
+            'requires': ['left_wrist'],
+            'metric': ('diff_x', 'left_wrist', 'right_shoulder'),
+            'rest': -0.2,
+            'peak': -0.1,
+        },
+    },
+    # 등(옆구리) 스트레칭: 상체를 한쪽으로 기울이기
+    'back': {
+        'mirror': True,
+        'require': (['left_shoulder', 'right_shoulder', 'left_hip', 'right_hip'], '상체가 잘 보이지 않습니다'),
+        'rules': [
+            {
+                'metric': ('abs_diff_y', 'left_hip', 'right_hip'),
+                'cases': [('>', 0.1, '⚠️ 골반을 수평으로 유지하세요', True)],
+            },
+            {
+                # 어깨 중심이 골반 중심보다 왼쪽(음수)으로 갈수록 큰 값
+                'metric': ('center_diff_x', 'left_shoulder', 'right_shoulder', 'left_hip', 'right_hip'),
+                'sign': -1,
+                'cases': [
+                    ('>', 0.12, '✓ 좋습니다! 옆구리가 잘 늘어나고 있습니다', False),
+                    ('>', 0.06, '→ 상체를 {side}으로 더 기울이세요', True),
+                    ('<', -0.06, '⚠️ 반대 방향입니다. {side}으로 기울이세요', True),
+                ],
+                'default': ('→ 팔을 올리고 상체를 {side}으로 천천히 기울이세요', True),
+            },
+        ],
+        'progress': {
+            'metric': ('center_diff_x', 'left_shoulder', 'right_shoulder', 'left_hip', 'right_hip'),
+            'sign': -1,
+            'rest': 0.06,
+            'peak': 0.12,
+        },
+    },
+    # 골반 정렬
+    'pelvis': {
+        'mirror': False,
+        'require': (['left_hip', 'right_hip'], '골반이 잘 보이지 않습니다'),
+        'rules': [
+            {
+                'metric': ('abs_diff_y', 'left_hip', 'right_hip'),
+                'cases': [('>', 0.05, '⚠️ 골반을 수평으로 유지하세요', True)],
+            },
+            {
+                'requires': ['left_shoulder', 'right_shoulder'],
+                **SHOULDER_LEVEL,
+            },
+        ],
+        'fallback': ('✓ 좋습니다! 골반이 바르게 정렬되어 있습니다', False),
+    },
+    # 코어: 몸통을 곧게 유지
+    'core': {
+        'mirror': False,
+        'require': (['left_shoulder', 'right_shoulder', 'left_hip', 'right_hip'], '상체가 잘 보이지 않습니다'),
+        'rules': [
+            {
+                'metric': ('abs_center_diff_x', 'left_shoulder', 'right_shoulder', 'left_hip', 'right_hip'),
+                'cases': [('>', 0.05, '⚠️ 상체가 한쪽으로 기울었습니다. 몸통을 곧게 세우세요', True)],
+            },
+            SHOULDER_LEVEL,
+            {
+                'metric': ('abs_diff_y', 'left_hip', 'right_hip'),
+                'cases': [('>', 0.1, '⚠️ 골반을 수평으로 유지하세요', True)],
+            },
+        ],
+        'fallback': ('✓ 좋습니다! 코어를 단단히 유지하세요', False),
+    },
+}
+
+# EmotionVideo.BODY_PART_CHOICES → 사용할 수 있는 exercise_type
+BODY_PART_EXERCISES = {
+    '목': ['neck_left', 'neck_right'],
+    '어깨': ['shoulder_left', 'shoulder_right'],
+    '목어깨': ['neck_left', 'neck_right', 'shoulder_left', 'shoulder_right'],
+    '등': ['back_left', 'back_right'],
+    '골반': ['pelvis'],
+    '코어': ['core'],
+    '전신': ['core', 'pelvis'],
+}
+
+
+# ========== 측정값 ==========
+# x, y 는 키포인트 인덱스로 접근 가능한 시퀀스 (프레임 1개: 리스트, 일괄 평가: (K, N) 배열)
+# 부호가 x축 방향에 따라 바뀌는 측정값은 좌우 반전 시 부호를 뒤집는다
+
+def _abs_diff_y(a, b):
+    return lambda x, y: abs(y[a] - y[b])
+
+
+def _diff_y(a, b):
+    return lambda x, y: y[a] - y[b]
+
+
+def _diff_x(a, b):
+    return lambda x, y: x[a] - x[b]
+
+
+def _center_offset_x(p, a, b):
+    return lambda x, y: x[p] - (x[a] + x[b]) / 2
+
+
+def _center_diff_x(a, b, c, d):
+    return lambda x, y: (x[a] + x[b]) / 2 - (x[c] + x[d]) / 2
+
+
+def _abs_center_diff_x(a, b, c, d):
+    return lambda x, y: abs((x[a] + x[b]) / 2 - (x[c] + x[d]) / 2)
+
+
+# 종류 → (함수 생성기, 좌우 반전 시 부호 반전 여부)
+METRICS = {
+    'abs_diff_y': (_abs_diff_y, False),
+    'diff_y': (_diff_y, False),
+    'diff_x': (_diff_x, True),
+    'center_offset_x': (_center_offset_x, True),
+    'center_diff_x': (_center_diff_x, True),
+    'abs_center_diff_x': (_abs_center_diff_x, False),
+}
+
+
+# ========== 컴파일 ==========
+
+class ExerciseStep:
+    """규칙 1개의 평가 계획"""
+    __slots__ = ('requires', 'keypoints', 'metric', 'sign', 'record', 'cases', 'default')
+
+    def __init__(self, requires, keypoints, metric, sign, record, cases, default):
+        self.requires = requires    # 키포인트 인덱스 튜플
+        self.keypoints = keypoints  # 측정값에 쓰이는 키포인트 인덱스 튜플
+        self.metric = metric        # (x, y) -> 값
+        self.sign = sign
+        self.record = record
+        self.cases = cases        # ((초과 비교 여부, 기준값, 메시지 코드, 경고 여부), ...)
+        self.default = default    # (메시지 코드, 경고 여부) 또는 None
+
+
+class ExerciseProgress:
+    """동작 진행도 계획 (부호 적용 후 값이 클수록 최대 자세에 가까움)"""
+    __slots__ = ('requires', 'keypoints', 'metric', 'sign', 'rest', 'peak')
+
+    def __init__(self, requires, keypoints, metric, sign, rest, peak):
+        self.requires = requires
+        self.keypoints = keypoints
+        self.metric = metric
+        self.sign = sign
+        self.rest = rest
+        self.peak = peak
+
+    def value(self, pose):
+        """Pose → 진행도 (필요한 키포인트가 없으면 None)"""
+        present = pose.present
+        for i in self.requires:
+            if not present[i]:
+                return None
+        for i in self.keypoints:
+            if not present[i]:
+                return None
+        return self.sign * self.metric(pose.x, pose.y)
+
+
+class ExercisePlan:
+    """운동 1개의 컴파일된 평가 계획"""
+    __slots__ = ('name', 'require', 'require_code', 'steps', 'fallback', 'progress', 'max_messages', 'keypoints')
+
+    def __init__(self, name, require, require_code, steps, fallback, progress=None):
+        self.name = name
+        self.require = require
+        self.require_code = require_code
+        self.steps = steps
+        self.fallback = fallback
+        self.progress = progress
+        self.max_messages = max(1, len(steps))
+        # 이 운동이 참조하는 키포인트 전체 (정렬된 인덱스)
+        used = set(require)
+        for step in steps:
+            used.update(step.requires)
+            used.update(step.keypoints)
+        if progress is not None:
+            used.update(progress.requires)
+            used.update(progress.keypoints)
+        self.keypoints = tuple(sorted(used))
+
+
+_SIDE_WORDS = {
+    'left': {'side': '왼쪽', 'other': '오른쪽', 'arm': '왼팔'},
+    'right': {'side': '오른쪽', 'other': '왼쪽', 'arm': '오른팔'},
+}
+
+
+def _mirror_name(name):
+    if name.startswith('left_'):
+        return 'right_' + name[5:]
+    if name.startswith('right_'):
+        return 'left_' + name[6:]
+    return name
+
+
+def _compile_exercise(name, spec, side=None):
+    mirrored = side == 'right'
+    words = _SIDE_WORDS.get(side, {})
+
+    def index(keypoint):
+        return KEYPOINT_INDEX[_mirror_name(keypoint) if mirrored else keypoint]
+
+    def code(message):
+        text = message.format(**words)
+        if text not in MESSAGE_CODES:
+            raise ValueError(f'{name}: MESSAGE_TEXTS 에 등록되지 않은 메시지입니다: {text}')
+        return MESSAGE_CODES[text]
+
+    def metric(rule):
+        """규칙의 metric/sign → (키포인트 인덱스, 측정 함수, 부호)"""
+        kind, *keypoints = rule['metric']
+        make_metric, flips = METRICS[kind]
+        sign = rule.get('sign', 1)
+        if mirrored and flips:
+            sign = -sign
+        metric_keypoints = tuple(index(k) for k in keypoints)
+        return metric_keypoints, make_metric(*metric_keypoints), sign
+
+    steps = []
+    for rule in spec['rules']:
+        metric_keypoints, measure, sign = metric(rule)
+        steps.append(ExerciseStep(
+            requires=tuple(index(k) for k in rule.get('requires', ())),
+            keypoints=metric_keypoints,
+            metric=measure,
+            sign=sign,
+            record=rule.get('record'),
+            cases=tuple(
+                (op == '>', threshold, code(message), warn)
+                for op, threshold, message, warn in rule['cases']
+            ),
+            default=(code(rule['default'][0]), rule['default'][1]) if 'default' in rule else None,
+        ))
+
+    progress = None
+    if 'progress' in spec:
+        rule = spec['progress']
+        metric_keypoints, measure, sign = metric(rule)
+        progress = ExerciseProgress(
+            requires=tuple(index(k) for k in rule.get('requires', ())),
+            keypoints=metric_keypoints,
+            metric=measure,
+            sign=sign,
+            rest=rule['rest'],
+            peak=rule['peak'],
+        )
+
+    require, require_message = spec['require']
+    fallback = spec.get('fallback')
+    return ExercisePlan(
+        name=name,
+        require=tuple(index(k) for k in require),
+        require_code=code(require_message),
+        steps=tuple(steps),
+        fallback=(code(fallback[0]), fallback[1]) if fallback else None,
+        progress=progress,
+    )
+
+
+def compile_rules(rules):
+    """규칙 표 → {exercise_type: ExercisePlan}"""
+    plans = {}
+    for name, spec in rules.items():
+        if spec.get('mirror'):
+            for side in ('left', 'right'):
+                plans[f'{name}_{side}'] = _compile_exercise(f'{name}_{side}', spec, side)
+        else:
+            plans[name] = _compile_exercise(name, spec)
+    return plans
+
+
+EXERCISE_PLANS = compile_rules(EXERCISE_RULES)
+EXERCISE_TYPES = tuple(EXERCISE_PLANS)
+
+
+# ========== 평가 (프레임 1개) ==========
+
+def evaluate_plan(plan, keypoints):
+    """컴파일된 계획으로 프레임 1개 평가"""
+    feedback = {
+        'status': 'good',
+        'messages': [],
+        'corrections': {},
+        'angles': {},
+        'has_warnings': False
+    }
+    messages = feedback['messages']
+
+    try:
+        pose = parse_pose(keypoints)
+        x, y, present = pose.x, pose.y, pose.present
+
+        for i in plan.require:
+            if not present[i]:
+                feedback['status'] = 'warning'
+                messages.append(MESSAGE_TEXTS[plan.require_code])
+                return feedback
+
+        has_warnings = False
+        for step in plan.steps:
+            if step.requires and not all(present[i] for i in step.requires):
+                continue
+            value = step.metric(x, y)
+            if step.record:
+                feedback['angles'][step.record] = round(value, 3)
+            if step.sign < 0:
+                value = -value
+
+            for greater, threshold, code, warn in step.cases:
+                if (value > threshold) if greater else (value < threshold):
+                    messages.append(MESSAGE_TEXTS[code])
+                    has_warnings = has_warnings or warn
+                    break
+            else:
+                if step.default:
+                    messages.append(MESSAGE_TEXTS[step.default[0]])
+                    has_warnings = has_warnings or step.default[1]
+
+        if plan.fallback and not messages:
+            messages.append(MESSAGE_TEXTS[plan.fallback[0]])
+            has_warnings = has_warnings or plan.fallback[1]
+
+        feedback['has_warnings'] = has_warnings
+        if has_warnings:
+            feedback['status'] = 'warning'
+
+    except Exception as e:
+        feedback['status'] = 'warning'
+        messages.append(f'인식 오류: {str(e)}')
+
+    return feedback
+
+
+def is_supported_exercise(exercise_type):
+    """요청으로 받은 exercise_type 이 지원하는 운동 타입 문자열인지 (리스트/딕셔너리 등은 False)"""
+    return isinstance(exercise_type, str) and exercise_type in EXERCISE_PLANS
+
+
+def get_plan(exercise_type):
+    """exercise_type 에 해당하는 계획 (없으면 ValueError)"""
+    if not is_supported_exercise(exercise_type):
+        raise ValueError(f'지원하지 않는 운동 타입입니다: {exercise_type}')
+    return EXERCISE_PLANS[exercise_type]
+
+
+def generate_feedback(keypoints, exercise_type=DEFAULT_EXERCISE):
+    """
+    운동 타입별 자세 피드백
+    keypoints: 키포인트 딕셔너리 리스트 또는 parse_pose() 로 만든 Pose
+    exercise_type: EXERCISE_TYPES 중 하나 (neck_left, neck_right, shoulder_left, ...)
+    """
+    return evaluate_plan(get_plan(exercise_type), keypoints)
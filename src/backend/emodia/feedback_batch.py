@@ -0,0 +1,122 @@
+"""
+벡터화된 일괄 피드백 엔진
+
+(N, K, 3) 키포인트 배열(KEYPOINT_NAMES 순서, 누락은 NaN)을 받아 프레임별 피드백을 NumPy 마스크로 한 번에 계산한다.
+feedback.EXERCISE_PLANS 의 컴파일된 계획을 그대로 사용하므로 feedback.generate_feedback 과 결과가 정확히 같다.
+
+반환값 (evaluate_batch):
+    status        (N,)    int8   0: good, 1: warning
+    has_warnings  (N,)    bool
+    nose_offset   (N,)    float64 (목 운동만, 계산하지 않은 프레임은 NaN)
+    angles        {이름: (N,) float64}  규칙의 record 값 (계산하지 않은 프레임은 NaN)
+    messages      (N, M)  int16  MESSAGE_TEXTS 의 메시지 코드 (왼쪽 정렬, 빈 칸 -1)
+"""
+
+import numpy as np
+
+from .feedback import DEFAULT_EXERCISE, MESSAGE_TEXTS, get_plan
+
+STATUS_GOOD = 0
+STATUS_WARNING = 1
+STATUS_NAMES = ('good', 'warning')
+
+NO_MESSAGE = -1
+
+
+def _present(x, y, indices):
+    """indices 키포인트가 모두 있는 프레임 마스크 (x, y: (K, N))"""
+    present = np.ones(x.shape[1], dtype=bool)
+    for i in indices:
+        present &= ~(np.isnan(x[i]) | np.isnan(y[i]))
+    return present
+
+
+def _message(mask, code):
+    return np.where(mask, code, NO_MESSAGE).astype(np.int16)
+
+
+def _compact(columns):
+    """메시지 열들을 합치고 빈 칸(-1)을 오른쪽으로 밀어 순서 유지"""
+    messages = np.stack(columns, axis=1)
+    order = np.argsort(messages == NO_MESSAGE, axis=1, kind='stable')
+    return np.take_along_axis(messages, order, axis=1)
+
+
+def _evaluate_plan(plan, arr):
+    # (K, N) 으로 바꿔 x[i] 가 프레임별 열이 되게 함 → 규칙의 측정값 함수를 그대로 사용
+    x = arr[:, :, 0].T
+    y = arr[:, :, 1].T
+    n = arr.shape[0]
+
+    visible = _present(x, y, plan.require)
+    has_warnings = np.zeros(n, dtype=bool)
+    angles = {}
+    columns = [_message(~visible, plan.require_code)]
+
+    for step in plan.steps:
+        active = visible & _present(x, y, step.requires) if step.requires else visible
+        value = step.metric(x, y)
+        if step.record:
+            angles[step.record] = np.where(active, value, np.nan)
+        if step.sign < 0:
+            value = -value
+
+        codes = np.full(n, NO_MESSAGE, dtype=np.int16)
+        pending = active.copy()
+        for greater, threshold, code, warn in step.cases:
+            hit = pending & ((value > threshold) if greater else (value < threshold))
+            codes[hit] = code
+            if warn:
+                has_warnings |= hit
+            pending &= ~hit
+        if step.default:
+            codes[pending] = step.default[0]
+            if step.default[1]:
+                has_warnings |= pending
+        columns.append(codes)
+
+    if plan.fallback:
+        empty = visible & np.all(np.stack(columns[1:]) == NO_MESSAGE, axis=0) if plan.steps else visible
+        columns.append(_message(empty, plan.fallback[0]))
+        if plan.fallback[1]:
+            has_warnings |= empty
+
+    return {
+        'status': np.where(has_warnings | ~visible, STATUS_WARNING, STATUS_GOOD).astype(np.int8),
+        'has_warnings': has_warnings,
+        'nose_offset': angles.get('nose_offset', np.full(n, np.nan)),
+        'angles': angles,
+        'messages': _compact(columns)[:, :plan.max_messages],
+    }
+
+
+def evaluate_batch(arr, exercise_type=DEFAULT_EXERCISE):
+    """(N, K, 3) 키포인트 배열 → 프레임별 피드백 배열 (모듈 docstring 참고)"""
+    arr = np.asarray(arr, dtype=np.float64)
+    if arr.ndim != 3 or arr.shape[2] != 3:
+        raise ValueError('키포인트 배열은 (N, K, 3) 형태여야 합니다')
+    plan = get_plan(exercise_type)  # 지원하지 않는 운동 타입은 generate_feedback 과 같이 ValueError
+    with np.errstate(invalid='ignore'):
+        return _evaluate_plan(plan, arr)
+
+
+def to_feedback(result, i):
+    """evaluate_batch 결과의 i번째 프레임 → generate_feedback 과 같은 형식의 dict"""
+    codes = result['messages'][i]
+    feedback = {
+        'status': STATUS_NAMES[result['status'][i]],
+        'messages': [MESSAGE_TEXTS[code] for code in codes.tolist() if code != NO_MESSAGE],
+        'corrections': {},
+        'angles': {},
+        'has_warnings': bool(result['has_warnings'][i]),
+    }
+    for name, values in result['angles'].items():
+        value = values[i]
+        if value == value:
+            feedback['angles'][name] = round(float(value), 3)
+    return feedback
+
+
+def to_feedback_list(result):
+    """evaluate_batch 결과 전체 → 피드백 dict 리스트"""
+    return [to_feedback(result, i) for i in range(len(result['status']))]
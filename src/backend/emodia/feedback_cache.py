@@ -0,0 +1,140 @@
+"""
+양자화된 포즈 기준 피드백 캐시 (LRU)
+
+피드백은 운동마다 몇 개의 키포인트 좌표에만 의존하고, 스트레칭 자세를 유지하는 동안에는 거의 같은 프레임이 계속 들어온다.
+(exercise_type, 운동에 쓰이는 키포인트 좌표가 속한 grid 칸) 을 키로 피드백을 재사용한다.
+- 적중 여부를 보기 전에 parse_pose 로 검증해 범위를 벗어난 값(score > 1 등)은 generate_feedback 과 같은 인식 오류로 돌려준다
+  (키에 쓰이지 않는 키포인트 값만 잘못된 프레임에도 캐시된 정상 피드백을 돌려주지 않도록), 인식 오류는 캐시하지 않는다
+- 키는 검증된 Pose 에서 만든다. session_ingest 는 이미 만든 Pose 를 넘기므로 적중하면 evaluate_plan 만 생략된다
+- 같은 칸의 프레임은 처음 계산된 피드백을 공유하므로 angles 값은 grid 만큼 차이 날 수 있다
+"""
+
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .feedback import evaluate_plan, get_plan
+from .keypoints import parse_pose
+
+
+class FeedbackCache:
+    """(운동, 양자화 좌표) → 피드백 LRU 캐시"""
+
+    def __init__(self, max_entries=4096, grid=0.005):
+        self.max_entries = max_entries
+        self.grid = grid
+
+        self._entries = OrderedDict()  # 오래 안 쓴 순서
+        self._lock = threading.Lock()
+
+        # 카운터
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bypassed = 0
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            max_entries=getattr(settings, 'POSE_FEEDBACK_CACHE_SIZE', 4096),
+            grid=getattr(settings, 'POSE_FEEDBACK_CACHE_GRID', 0.005),
+        )
+
+    def make_key(self, plan, pose):
+        """Pose → 캐시 키 (운동에 쓰이는 키포인트의 격자 칸 번호, 누락된 키포인트는 None)"""
+        grid = self.grid
+        x = pose.x
+        y = pose.y
+        present = pose.present
+        return (plan.name, *[
+            (x[i] // grid, y[i] // grid) if present[i] else None for i in plan.keypoints
+        ])
+
+    def feedback(self, keypoints, exercise_type, pose=None):
+        """
+        캐시를 거친 generate_feedback (exercise_type 이 없으면 ValueError)
+        pose: 이미 만든 parse_pose 결과가 있으면 다시 파싱하지 않음
+        """
+        plan = get_plan(exercise_type)
+        if pose is None:
+            try:
+                pose = parse_pose(keypoints)
+            except ValueError:
+                # 인식 오류 피드백은 캐시하지 않음 (적중 여부를 보기 전에 검증)
+                with self._lock:
+                    self.bypassed += 1
+                return evaluate_plan(plan, keypoints)
+
+        key = self.make_key(plan, pose)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return _copy(cached)
+            self.misses += 1
+
+        feedback = evaluate_plan(plan, pose)
+        with self._lock:
+            self._entries[key] = _copy(feedback)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return feedback
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'grid': self.grid,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'bypassed': self.bypassed,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def _copy(feedback):
+    """호출자가 수정해도 캐시에 영향이 없도록 리스트/딕셔너리 복사"""
+    return {
+        **feedback,
+        'messages': list(feedback['messages']),
+        'corrections': dict(feedback['corrections']),
+        'angles': dict(feedback['angles']),
+    }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_feedback_cache():
+    """프로세스 전역 FeedbackCache (처음 사용할 때 생성)"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = FeedbackCache.from_settings()
+    return _cache
+
+
+def is_feedback_cache_enabled():
+    return getattr(settings, 'POSE_FEEDBACK_CACHE', False)
+
+
+def cached_feedback(keypoints, exercise_type, pose=None):
+    """
+    POSE_FEEDBACK_CACHE 가 켜져 있으면 캐시 사용, 아니면 generate_feedback 과 같음
+    pose: 이미 만든 parse_pose 결과가 있으면 다시 파싱하지 않음
+    """
+    if is_feedback_cache_enabled():
+        return get_feedback_cache().feedback(keypoints, exercise_type, pose)
+    return evaluate_plan(get_plan(exercise_type), keypoints if pose is None else pose)
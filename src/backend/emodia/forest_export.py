@@ -0,0 +1,224 @@
+"""
+RandomForest → 평탄화한 NumPy 노드 배열 + 배열 기반 평가기
+
+sklearn 의 predict / predict_proba 는 샘플 1개만 예측해도 호출마다 입력 검증, 트리별 작업 분배 등
+고정 비용이 커서 실시간(프레임 1개) 분류에 맞지 않는다. 학습이 끝난 숲을 한 번 배열로 펼쳐 두고
+평가한다.
+- 노드 배열: feature, threshold, children (왼쪽/오른쪽), 잎 노드의 클래스 비율, 트리별 루트 인덱스
+- 모든 샘플 x 모든 트리의 현재 노드를 배열 하나로 두고 트리 깊이만큼 한 단계씩 내려감
+  (단계마다 작은 배열 연산 몇 번 - 샘플 1개면 numpy 호출 수가 트리 수와 무관)
+- 잎 노드는 자기 자신을 자식으로 가리켜 깊이가 다른 트리도 같은 횟수만큼 반복하면 됨
+- sklearn 과 같은 순서로 계산해 결과가 정확히 같음
+  (입력은 float32 로 변환 후 X <= threshold 비교, 트리 확률을 트리 순서대로 더한 뒤 트리 수로 나눔)
+  비교는 threshold 이하인 가장 큰 float32 값과 float32 끼리 (float64 비교와 결과가 같음)
+  NaN 은 노드별 missing_go_to_left 방향으로 (NaN 이 있는 입력만 연산 추가)
+- MLModel 모델 파일 옆에 같은 이름의 .forest.npz 로 저장
+"""
+
+import os
+
+import numpy as np
+
+FOREST_SUFFIX = '.forest.npz'
+
+
+def forest_path(model_path):
+    """모델 파일 경로 → 평탄화 배열 파일 경로 (같은 디렉터리, 확장자만 다름)"""
+    return os.path.splitext(model_path)[0] + FOREST_SUFFIX
+
+
+class FlatForest:
+    """배열 기반 RandomForestClassifier 평가기"""
+    __slots__ = (
+        'feature', 'threshold', 'children', 'missing_left', 'value', 'roots', 'classes', 'depth', 'n_features',
+        '_feature2', '_threshold2', '_missing2', '_next2', '_start2'
+    )
+    ARRAYS = (
+        'feature', 'threshold', 'children', 'missing_left', 'value', 'roots', 'classes', 'depth', 'n_features'
+    )
+
+    def __init__(self, feature, threshold, children, missing_left, value, roots, classes, depth, n_features):
+        self.feature = feature        # (노드 수,) int32 - 잎 노드는 0
+        self.threshold = threshold    # (노드 수,) float64 - 잎 노드는 inf
+        self.children = children      # (2, 노드 수) int32 - [왼쪽(<=), 오른쪽(>)], 잎 노드는 자기 자신
+        self.missing_left = missing_left  # (노드 수,) bool - NaN 을 왼쪽으로 보낼지
+        self.value = value            # (노드 수, 클래스 수) float64 - 정규화한 클래스 비율
+        self.roots = roots            # (트리 수,) int32
+        self.classes = classes        # (클래스 수,)
+        self.depth = int(depth)       # 가장 깊은 트리의 깊이
+        self.n_features = int(n_features)
+
+        # 평가용 배열: 상태 s = 2 * 노드 인덱스, 다음 상태 = _next2[s + (x[feature] <= threshold)]
+        # (잎 노드는 비교 결과와 관계없이 자기 자신)
+        self._feature2 = np.repeat(feature.astype(np.intp), 2)
+        threshold32 = threshold.astype(np.float32)
+        rounded_up = threshold32.astype(np.float64) > threshold
+        threshold32[rounded_up] = np.nextafter(threshold32[rounded_up], np.float32(-np.inf))
+        self._threshold2 = np.repeat(threshold32, 2)
+        self._missing2 = np.repeat(missing_left.astype(bool), 2)
+        self._next2 = 2 * np.stack([children[1], children[0]], axis=1).reshape(-1).astype(np.intp)
+        self._start2 = 2 * roots.astype(np.intp)
+
+    @classmethod
+    def from_estimator(cls, estimator):
+        """학습된 RandomForestClassifier (단일 출력) → FlatForest"""
+        import sklearn
+
+        # sklearn 1.4 부터 tree_.value 가 클래스 비율 (이전 버전은 가중 개수를 predict_proba 에서 정규화)
+        normalize = tuple(int(part) for part in sklearn.__version__.split('.')[:2]) < (1, 4)
+        features = []
+        thresholds = []
+        children = []
+        missing_left = []
+        values = []
+        roots = []
+        offset = 0
+        for tree in estimator.estimators_:
+            nodes = tree.tree_
+            count = nodes.node_count
+            leaf = nodes.children_left == -1
+            index = np.arange(count)
+
+            features.append(np.where(leaf, 0, nodes.feature))
+            thresholds.append(np.where(leaf, np.inf, nodes.threshold))
+            children.append(np.stack([
+                np.where(leaf, index, nodes.children_left),
+                np.where(leaf, index, nodes.children_right),
+            ]) + offset)
+            # sklearn 1.3 부터 NaN 방향을 노드별로 저장 (이전 버전은 X <= threshold 가 거짓이므로 오른쪽)
+            missing_left.append(
+                np.asarray(nodes.missing_go_to_left, dtype=bool) if hasattr(nodes, 'missing_go_to_left')
+                else np.zeros(count, dtype=bool)
+            )
+            value = nodes.value[:, 0, :estimator.n_classes_].astype(np.float64)
+            if normalize:
+                # 이전 버전 DecisionTreeClassifier.predict_proba 와 같은 정규화
+                normalizer = value.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                value = value / normalizer
+            values.append(value)
+            roots.append(offset)
+            offset += count
+
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            children=np.concatenate(children, axis=1).astype(np.int32),
+            missing_left=np.concatenate(missing_left),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int32),
+            classes=np.asarray(estimator.classes_),
+            depth=max(tree.tree_.max_depth for tree in estimator.estimators_),
+            n_features=estimator.n_features_in_,
+        )
+
+    def leaves(self, X):
+        """(샘플 수, 특징 수) → 샘플별 트리별 잎 노드 인덱스 (샘플 수, 트리 수)"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        if X.shape[1] != self.n_features:
+            raise ValueError(f'특징 수가 맞지 않습니다: {X.shape[1]} (모델: {self.n_features})')
+
+        values = np.ascontiguousarray(X).reshape(-1)
+        feature2, threshold2, next2 = self._feature2, self._threshold2, self._next2
+        if np.isnan(values).any():
+            return self._leaves_missing(X, values)
+        if len(X) == 1:
+            states = self._start2
+            for _ in range(self.depth):
+                states = next2.take(states + (values.take(feature2.take(states)) <= threshold2.take(states)))
+            return (states >> 1)[np.newaxis, :]
+
+        # 샘플별 특징 시작 위치를 더해 평탄화한 X 에서 바로 읽음
+        offsets = (np.arange(len(X)) * self.n_features)[:, np.newaxis]
+        states = np.broadcast_to(self._start2, (len(X), len(self._start2)))
+        for _ in range(self.depth):
+            states = next2.take(states + (values.take(feature2.take(states) + offsets) <= threshold2.take(states)))
+        return states >> 1
+
+    def _leaves_missing(self, X, values):
+        """NaN 이 있는 입력: 비교 결과에 NaN 방향을 합쳐서 내려감"""
+        offsets = (np.arange(len(X)) * self.n_features)[:, np.newaxis]
+        states = np.broadcast_to(self._start2, (len(X), len(self._start2)))
+        for _ in range(self.depth):
+            current = values.take(self._feature2.take(states) + offsets)
+            go_left = (current <= self._threshold2.take(states)) | (
+                np.isnan(current) & self._missing2.take(states)
+            )
+            states = self._next2.take(states + go_left)
+        return states >> 1
+
+    def predict_proba(self, X):
+        """RandomForestClassifier.predict_proba 와 같은 결과 (샘플 수, 클래스 수)"""
+        probabilities = self.value[self.leaves(X)]  # (샘플 수, 트리 수, 클래스 수)
+        # 트리 순서대로 누적 (sklearn 의 all_proba += proba 와 같은 덧셈 순서)
+        total = np.cumsum(probabilities, axis=1)[:, -1]
+        total /= len(self.roots)
+        return total
+
+    def predict(self, X):
+        return self.classes.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def matches(self, estimator, samples=1000, rng=None):
+        """
+        무작위 샘플에서 estimator.predict_proba 와 결과가 정확히 같은지
+        학습 데이터 범위를 모르므로 분기 기준값 크기에 맞춘 정규분포 샘플 + 기준값과 같은 샘플로 비교
+        """
+        rng = np.random.default_rng(0) if rng is None else rng
+        X = rng.normal(size=(samples, self.n_features))
+        X *= np.abs(self.threshold[np.isfinite(self.threshold)]).max(initial=1.0)
+        splits = self.threshold < np.inf
+        if splits.any():
+            # 샘플마다 임의의 분기 하나를 골라 그 특징 값을 기준값과 정확히 같게 (<= 경계 확인)
+            nodes = rng.choice(np.flatnonzero(splits), size=samples)
+            X[np.arange(samples), self.feature[nodes]] = self.threshold[nodes]
+        return np.array_equal(self.predict_proba(X), estimator.predict_proba(X))
+
+    def save(self, path):
+        np.savez(
+            path,
+            feature=self.feature,
+            threshold=self.threshold,
+            children=self.children,
+            missing_left=self.missing_left,
+            value=self.value,
+            roots=self.roots,
+            classes=self.classes,
+            depth=np.int32(self.depth),
+            n_features=np.int32(self.n_features),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls(**{name: arrays[name] for name in cls.ARRAYS})
+
+
+def export_forest(estimator, model_path, check_samples=0, rng=None):
+    """
+    학습된 숲을 모델 파일 옆에 저장 → 저장한 경로 (RandomForest 가 아니면 None)
+    check_samples 개 샘플로 sklearn 과 비교해 다르면 ValueError (기존 파일도 지워서 예측은 sklearn 으로)
+    임시 파일에 쓴 뒤 이름을 바꿔 load_forest 가 쓰다 만 파일을 읽지 않게 함
+    """
+    if not hasattr(estimator, 'estimators_') or not hasattr(estimator, 'classes_'):
+        return None
+    path = forest_path(model_path)
+    forest = FlatForest.from_estimator(estimator)
+    if check_samples and not forest.matches(estimator, check_samples, rng):
+        if os.path.exists(path):
+            os.remove(path)
+        raise ValueError('sklearn 결과와 다름')
+
+    temp_path = os.path.splitext(path)[0] + '.tmp.npz'
+    forest.save(temp_path)
+    os.replace(temp_path, path)
+    return path
+
+
+def load_forest(model_path):
+    """모델 파일 옆의 평탄화 배열 → FlatForest (없으면 None)"""
+    path = forest_path(model_path)
+    if not os.path.exists(path):
+        return None
+    return FlatForest.load(path)
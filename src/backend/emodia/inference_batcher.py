@@ -0,0 +1,275 @@
+"""
+ML 자세 분류 마이크로 배치 스케줄러
+
+RandomForest 의 predict_proba 는 호출마다 고정 비용이 샘플 1개 계산보다 훨씬 크므로,
+여러 세션이 동시에 보낸 특징 벡터를 짧은 시간(POSE_INFERENCE_MAX_WAIT) 또는
+최대 개수(POSE_INFERENCE_MAX_BATCH)만큼 모아 스포츠별로 한 번에 예측하고 결과를 나눠준다.
+- 요청은 Future 로 받아 동기 코드는 predict()로 기다리고, 비동기 코드는 asyncio.wrap_future 로 기다림
+- 첫 요청이 들어온 시각부터 max_wait 가 지나면 모인 만큼 바로 실행 (요청이 하나뿐이면 지연은 최대 max_wait)
+- stats() 로 배치 크기 분포(스포츠별 predict_proba 호출 단위)와 대기 지연(큐에 들어간 뒤 예측 시작까지)을 확인
+- 결과는 timeout(10 * max_wait + predict_timeout) 안에 기다리고, 스케줄러가 멈췄으면 InferenceUnavailable
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections
+
+from .ml_utils import extract_features, normalize_features
+from .model_registry import get_model_registry
+
+logger = logging.getLogger(__name__)
+
+# 배치 크기 분포 구간 (2의 거듭제곱 단위)
+BATCH_SIZE_BUCKETS = ('1', '2-3', '4-7', '8-15', '16-31', '32-63', '64-127', '128+')
+
+
+def _bucket(size):
+    return BATCH_SIZE_BUCKETS[min(size.bit_length() - 1, len(BATCH_SIZE_BUCKETS) - 1)]
+
+
+class InferenceUnavailable(Exception):
+    """스케줄러가 멈췄거나 제한 시간 안에 예측하지 못함"""
+
+
+def _percentile(values, q):
+    return round(float(np.percentile(values, q)) * 1000, 3) if values else None
+
+
+class _Request:
+    __slots__ = ('sports_id', 'vector', 'future', 'enqueued')
+
+    def __init__(self, sports_id, vector):
+        self.sports_id = sports_id
+        self.vector = vector
+        self.future = Future()
+        self.enqueued = time.monotonic()
+
+
+class InferenceScheduler:
+    """프로세스 내 예측 요청 대기열 + 백그라운드 배치 실행 스레드"""
+
+    def __init__(self, max_batch=64, max_wait=0.005, predict_timeout=1.0, registry=None):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.registry = registry
+        # 결과를 기다리는 최대 시간 (모으는 시간 여유 + 모델 로드/예측 시간)
+        self.timeout = 10 * max_wait + predict_timeout
+
+        self._queue = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        # 카운터
+        self.requests = 0
+        self.samples = 0  # 예측을 시작한 요청 수
+        self.batches = 0  # 대기열에서 꺼낸 묶음 수
+        self.predict_calls = 0  # 스포츠별 predict_proba 호출 수
+        self.failed = 0
+        self.batch_sizes = dict.fromkeys(BATCH_SIZE_BUCKETS, 0)
+        self.queue_delay_total = 0.0
+        self.queue_delay_max = 0.0
+        self.recent_delays = deque(maxlen=1000)  # 최근 요청의 대기 지연 (백분위 계산용)
+        self.predict_seconds = 0.0
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            max_batch=getattr(settings, 'POSE_INFERENCE_MAX_BATCH', 64),
+            max_wait=getattr(settings, 'POSE_INFERENCE_MAX_WAIT', 0.005),
+            predict_timeout=getattr(settings, 'POSE_INFERENCE_PREDICT_TIMEOUT', 1.0),
+        )
+
+    def submit(self, sports_id, vector):
+        """
+        normalize_features 벡터 1개 예측 요청 → Future
+        결과: {'quality', 'confidence', 'probabilities', 'model_version'} (활성 모델이 없으면 None)
+        """
+        request = _Request(sports_id, vector)
+        if not self._ensure_started():
+            request.future.set_exception(InferenceUnavailable('자세 분류 스케줄러가 종료되었습니다'))
+            return request.future
+        self._queue.put(request)
+        with self._stats_lock:
+            self.requests += 1
+        return request.future
+
+    def predict(self, sports_id, vector, timeout=None):
+        """submit 후 결과를 기다림 (동기 코드용, timeout 이 None 이면 self.timeout)"""
+        return wait_result(self.submit(sports_id, vector), self.timeout if timeout is None else timeout)
+
+    def stop(self):
+        """실행 스레드 종료 (남은 요청은 처리 후 종료)"""
+        self._stopped.set()
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def stats(self):
+        with self._stats_lock:
+            samples = self.samples
+            delays = list(self.recent_delays)
+            return {
+                'queue_depth': self._queue.qsize(),
+                'max_batch': self.max_batch,
+                'max_wait_ms': self.max_wait * 1000,
+                'requests': self.requests,
+                'batches': self.batches,
+                'predict_calls': self.predict_calls,
+                'failed': self.failed,
+                'mean_batch_size': round(samples / self.predict_calls, 2) if self.predict_calls else None,
+                'batch_sizes': dict(self.batch_sizes),
+                'queue_delay_ms': {
+                    'mean': round(self.queue_delay_total / samples * 1000, 3) if samples else None,
+                    'p50': _percentile(delays, 50),
+                    'p95': _percentile(delays, 95),
+                    'max': round(self.queue_delay_max * 1000, 3),
+                },
+                'predict_ms_total': round(self.predict_seconds * 1000, 1),
+            }
+
+    def _ensure_started(self):
+        """실행 스레드가 없거나 죽었으면 시작 → 요청을 받을 수 있으면 True (stop() 이후에는 False)"""
+        if self._thread is not None and self._thread.is_alive():
+            return True
+        with self._start_lock:
+            if self._stopped.is_set():
+                return False
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='pose-inference', daemon=True)
+                self._thread.start()
+            return True
+
+    def _collect(self, first):
+        """첫 요청 이후 max_wait 동안 (최대 max_batch 개까지) 모음 → (배치, 종료 여부)"""
+        batch = [first]
+        deadline = first.enqueued + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stop = self._collect(first)
+            try:
+                self._run_batch(batch)
+                close_old_connections()
+            except Exception as e:
+                # 스레드가 죽으면 이후 요청이 모두 기다리게 되므로 이 묶음만 실패 처리하고 계속
+                logger.exception('자세 분류 묶음 처리 실패 (%d개)', len(batch))
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+            if stop:
+                break
+
+    def _run_batch(self, batch):
+        started = time.monotonic()
+        # 기다리다 시간 초과로 취소된 요청은 제외 (남은 요청은 RUNNING 이 되어 더 이상 취소되지 않음)
+        batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        groups = {}
+        for request in batch:
+            groups.setdefault(request.sports_id, []).append(request)
+
+        registry = self.registry or get_model_registry()
+        for sports_id, requests in groups.items():
+            with self._stats_lock:
+                self.predict_calls += 1
+                self.batch_sizes[_bucket(len(requests))] += 1
+            try:
+                loaded, labels, probabilities = registry.predict(
+                    sports_id, np.asarray([request.vector for request in requests], dtype=np.float64)
+                )
+            except Exception as e:
+                logger.exception('자세 분류 실패 (sports=%s, %d개)', sports_id, len(requests))
+                with self._stats_lock:
+                    self.failed += len(requests)
+                for request in requests:
+                    request.future.set_exception(e)
+                continue
+            if loaded is None:
+                for request in requests:
+                    request.future.set_result(None)
+                continue
+            for request, label, probability in zip(requests, labels, probabilities):
+                request.future.set_result({
+                    'quality': str(label),
+                    'confidence': probability[str(label)],
+                    'probabilities': probability,
+                    'model_version': loaded.version,
+                })
+
+        finished = time.monotonic()
+        with self._stats_lock:
+            self.batches += 1
+            self.samples += len(batch)
+            self.predict_seconds += finished - started
+            for request in batch:
+                delay = started - request.enqueued
+                self.queue_delay_total += delay
+                self.recent_delays.append(delay)
+                if delay > self.queue_delay_max:
+                    self.queue_delay_max = delay
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_inference_scheduler():
+    """프로세스 전역 InferenceScheduler (처음 사용할 때 생성)"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = InferenceScheduler.from_settings()
+                atexit.register(_scheduler.stop)
+    return _scheduler
+
+
+def posture_vector(keypoints):
+    """키포인트 리스트 → 모델 입력 벡터 (좌표 형식 오류는 ValueError)"""
+    return normalize_features(extract_features(keypoints))
+
+
+def submit_classification(sports_id, keypoints):
+    """키포인트 → 자세 분류 Future (비동기 코드는 asyncio.wrap_future 로 기다림)"""
+    return get_inference_scheduler().submit(sports_id, posture_vector(keypoints))
+
+
+def wait_result(future, timeout):
+    """Future 결과 (시간 초과는 InferenceUnavailable, 예측 중 오류는 그대로)"""
+    try:
+        return future.result(timeout)
+    except FutureTimeoutError:
+        future.cancel()
+        raise InferenceUnavailable(f'자세 분류 시간 초과 ({timeout:.2f}초)')
+
+
+def classify_posture(sports_id, keypoints, timeout=None):
+    """
+    키포인트 → {'quality', 'confidence', 'probabilities', 'model_version'} (활성 모델이 없으면 None)
+    timeout 이 None 이면 스케줄러의 timeout 까지 기다림
+    """
+    scheduler = get_inference_scheduler()
+    future = scheduler.submit(sports_id, posture_vector(keypoints))
+    return wait_result(future, scheduler.timeout if timeout is None else timeout)
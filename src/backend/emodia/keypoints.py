@@ -0,0 +1,231 @@
+"""
+포즈 키포인트 표현 변환
+
+클라이언트는 키포인트를 [{name, x, y, score}, ...] 딕셔너리 리스트로 보낸다.
+저장/분석용으로는 KEYPOINT_NAMES 순서로 고정된 (K, 3) float 배열 (x, y, score)을 사용한다.
+누락된 키포인트는 NaN.
+"""
+
+import math
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+# MoveNet / COCO 17 키포인트 순서 (순서를 바꾸면 기존 packed 데이터를 읽을 수 없음)
+KEYPOINT_NAMES = (
+    'nose',
+    'left_eye',
+    'right_eye',
+    'left_ear',
+    'right_ear',
+    'left_shoulder',
+    'right_shoulder',
+    'left_elbow',
+    'right_elbow',
+    'left_wrist',
+    'right_wrist',
+    'left_hip',
+    'right_hip',
+    'left_knee',
+    'right_knee',
+    'left_ankle',
+    'right_ankle',
+)
+KEYPOINT_INDEX = {name: i for i, name in enumerate(KEYPOINT_NAMES)}
+NUM_KEYPOINTS = len(KEYPOINT_NAMES)
+
+# 바이너리 저장 형식: float32 리틀엔디언 (x, y, score) × NUM_KEYPOINTS
+PACKED_DTYPE = np.dtype('<f4')
+PACKED_FRAME_SIZE = NUM_KEYPOINTS * 3 * PACKED_DTYPE.itemsize
+
+
+def keypoints_to_array(keypoints: List[Dict], dtype=np.float64) -> np.ndarray:
+    """
+    키포인트 딕셔너리 리스트 → (K, 3) 배열
+    KEYPOINT_NAMES에 없는 이름은 무시, 같은 이름이 여러 번 나오면 첫 번째 사용
+    형식이 잘못된 입력 (리스트가 아님, 딕셔너리가 아닌 항목, 숫자가 아닌 좌표)은 ValueError
+    """
+    arr = np.full((NUM_KEYPOINTS, 3), np.nan, dtype=dtype)
+    seen = set()
+    try:
+        for kp in keypoints:
+            idx = KEYPOINT_INDEX.get(kp.get('name'))
+            if idx is None or idx in seen:
+                continue
+            seen.add(idx)
+            arr[idx, 0] = kp['x']
+            arr[idx, 1] = kp['y']
+            arr[idx, 2] = kp.get('score', np.nan)
+    except (AttributeError, KeyError, TypeError) as e:
+        raise ValueError(f'키포인트 형식이 올바르지 않습니다 ({e})')
+    return arr
+
+
+def array_to_keypoints(arr: np.ndarray, decimals: int = 6) -> List[Dict]:
+    """(K, 3) 배열 → 키포인트 딕셔너리 리스트 (NaN 좌표는 생략)"""
+    values = np.asarray(arr, dtype=np.float64).round(decimals).tolist()
+    keypoints = []
+    for name, (x, y, score) in zip(KEYPOINT_NAMES, values):
+        if x != x or y != y:  # NaN
+            continue
+        kp = {'name': name, 'x': x, 'y': y}
+        if score == score:
+            kp['score'] = score
+        keypoints.append(kp)
+    return keypoints
+
+
+def pack_keypoints(keypoints: List[Dict]) -> bytes:
+    """키포인트 딕셔너리 리스트 → float32 바이너리"""
+    return keypoints_to_array(keypoints, dtype=PACKED_DTYPE).tobytes()
+
+
+def unpack_keypoints(data) -> np.ndarray:
+    """float32 바이너리 → (K, 3) 배열 (복사 없이 읽기 전용 뷰)"""
+    return np.frombuffer(data, dtype=PACKED_DTYPE).reshape(NUM_KEYPOINTS, 3)
+
+
+def unpack_keypoints_many(blobs: Iterable) -> np.ndarray:
+    """여러 프레임의 바이너리 → (N, K, 3) 배열 (분석/학습용 일괄 디코딩)"""
+    data = b''.join(bytes(blob) for blob in blobs)
+    return np.frombuffer(data, dtype=PACKED_DTYPE).reshape(-1, NUM_KEYPOINTS, 3)
+
+
+# 자주 쓰는 키포인트 인덱스
+NOSE = KEYPOINT_INDEX['nose']
+LEFT_EAR = KEYPOINT_INDEX['left_ear']
+RIGHT_EAR = KEYPOINT_INDEX['right_ear']
+LEFT_SHOULDER = KEYPOINT_INDEX['left_shoulder']
+RIGHT_SHOULDER = KEYPOINT_INDEX['right_shoulder']
+LEFT_ELBOW = KEYPOINT_INDEX['left_elbow']
+RIGHT_ELBOW = KEYPOINT_INDEX['right_elbow']
+LEFT_WRIST = KEYPOINT_INDEX['left_wrist']
+RIGHT_WRIST = KEYPOINT_INDEX['right_wrist']
+LEFT_HIP = KEYPOINT_INDEX['left_hip']
+RIGHT_HIP = KEYPOINT_INDEX['right_hip']
+
+class Pose:
+    """
+    KEYPOINT_NAMES 순서로 고정된 포즈 (parse_pose 로 생성)
+    x, y: 길이 K 리스트 (누락된 키포인트는 present[i] == False, 좌표 0.0)
+    score_sum, score_count, score_min: 사용한 키포인트(KEYPOINT_NAMES, 첫 번째 이름)의 score 통계
+    """
+    __slots__ = ('x', 'y', 'present', 'score_sum', 'score_count', 'score_min')
+
+    def __init__(self, x, y, present, score_sum=0.0, score_count=0, score_min=None):
+        self.x = x
+        self.y = y
+        self.present = present
+        self.score_sum = score_sum
+        self.score_count = score_count
+        self.score_min = score_min
+
+    def has(self, *indices):
+        present = self.present
+        return all(present[i] for i in indices)
+
+    @classmethod
+    def from_array(cls, arr):
+        """(K, 3) 배열 → Pose (x 또는 y 가 NaN 이면 누락)"""
+        arr = np.asarray(arr, dtype=np.float64)
+        present_mask = ~np.isnan(arr[:, :2]).any(axis=1)
+        xy = np.where(present_mask[:, None], arr[:, :2], 0.0)
+        scores = arr[present_mask, 2]
+        scores = scores[~np.isnan(scores)].tolist()
+        return cls(
+            xy[:, 0].tolist(), xy[:, 1].tolist(), present_mask.tolist(),
+            score_sum=sum(scores),
+            score_count=len(scores),
+            score_min=min(scores) if scores else None,
+        )
+
+
+def parse_pose(keypoints) -> Pose:
+    """
+    키포인트 딕셔너리 리스트를 한 번만 순회해 Pose 생성
+    - 같은 이름이 여러 번 나오면 첫 번째 사용 (기존 next(...) 검색과 동일)
+    - KEYPOINT_NAMES 에 없는 이름은 버림 (score 도 검증만 하고 신뢰도 통계에는 넣지 않음)
+    - 좌표는 유한한 숫자, score 는 0~1 범위여야 함 (아니면 ValueError)
+    keypoints_to_array_many 와 같은 규칙 (학습/서빙 특징이 같도록)
+    """
+    if isinstance(keypoints, Pose):
+        return keypoints
+
+    x = [0.0] * NUM_KEYPOINTS
+    y = [0.0] * NUM_KEYPOINTS
+    present = [False] * NUM_KEYPOINTS
+    used_scores = []
+    get_index = KEYPOINT_INDEX.get
+
+    try:
+        for kp in keypoints:
+            i = get_index(kp['name'])
+            if i is not None and not present[i]:
+                present[i] = True
+                x[i] = kp['x']
+                y[i] = kp['y']
+                if 'score' in kp:
+                    used_scores.append(kp['score'])
+        scores = [kp['score'] for kp in keypoints if 'score' in kp]
+        _validate(x, y, scores)
+    except (KeyError, TypeError) as e:
+        raise ValueError(f'키포인트 형식이 올바르지 않습니다 ({e})')
+
+    return Pose(
+        x, y, present,
+        score_sum=sum(used_scores),
+        score_count=len(used_scores),
+        score_min=min(used_scores) if used_scores else None,
+    )
+
+
+def _validate(x, y, scores):
+    """
+    좌표는 유한한 숫자, score 는 0~1 범위인지 검사 (아니면 ValueError)
+    C 수준 sum/min/max 로 한 번에 (문자열 등은 TypeError, NaN/inf 는 합이 유한하지 않음)
+    """
+    if not math.isfinite(sum(x) + sum(y)):
+        raise ValueError('키포인트 좌표 값이 올바르지 않습니다')
+    if scores and not (math.isfinite(sum(scores)) and 0.0 <= min(scores) and max(scores) <= 1.0):
+        raise ValueError('키포인트 score 값이 0~1 범위를 벗어났습니다')
+
+
+def keypoints_to_array_many(frames_keypoints, dtype=np.float64) -> np.ndarray:
+    """
+    여러 프레임의 키포인트 딕셔너리 리스트 → (N, K, 3) 배열
+    parse_pose 와 같은 규칙과 검증 (첫 번째 이름 우선, 모르는 이름 무시, 잘못된 값은 ValueError)
+    """
+    frames_keypoints = list(frames_keypoints)
+    arr = np.full((len(frames_keypoints), NUM_KEYPOINTS, 3), np.nan, dtype=dtype)
+    frame_idx = []
+    kp_idx = []
+    xs = []
+    ys = []
+    used_scores = []
+    scores = []
+    get_index = KEYPOINT_INDEX.get
+    nan = float('nan')
+
+    try:
+        for n, keypoints in enumerate(frames_keypoints):
+            present = [False] * NUM_KEYPOINTS
+            for kp in keypoints:
+                i = get_index(kp['name'])
+                if i is not None and not present[i]:
+                    present[i] = True
+                    frame_idx.append(n)
+                    kp_idx.append(i)
+                    xs.append(kp['x'])
+                    ys.append(kp['y'])
+                    used_scores.append(kp.get('score', nan))
+            scores.extend(kp['score'] for kp in keypoints if 'score' in kp)
+        # 배치 전체를 한 번에 검사 (프레임 하나라도 잘못되면 ValueError)
+        _validate(xs, ys, scores)
+    except (KeyError, TypeError) as e:
+        raise ValueError(f'키포인트 형식이 올바르지 않습니다 ({e})')
+
+    if xs:
+        arr[frame_idx, kp_idx, 0] = xs
+        arr[frame_idx, kp_idx, 1] = ys
+        arr[frame_idx, kp_idx, 2] = used_scores
+    return arr
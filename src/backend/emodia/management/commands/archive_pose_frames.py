@@ -0,0 +1,68 @@
+"""
+보관 기간이 지난 운동 세션의 프레임 기록을 월별 보관 파일(POSE_ARCHIVE_DIR/YYYY-MM.zip)로 옮기는 관리 명령어
+(세션별 압축본과 PoseFrame 행은 묶음 단위로 삭제, 조회는 iter_session_frames 로 그대로 가능)
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from emodia.models import WorkoutSession
+from emodia.session_frames import archive_month, archive_sessions
+
+
+class Command(BaseCommand):
+    help = '오래된 운동 세션의 포즈 프레임을 월별 보관 파일로 옮기기'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int,
+                            default=getattr(settings, 'POSE_ARCHIVE_AFTER_DAYS', 180),
+                            help='종료 후 이 기간(일)이 지난 세션만 처리')
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='보관 파일을 한 번 열어 추가할 세션 수')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='한 번에 읽고 삭제할 프레임 행 수')
+        parser.add_argument('--dry-run', action='store_true', help='대상 세션 수만 출력')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        sessions = WorkoutSession.objects.filter(
+            end_time__isnull=False,
+            end_time__lte=cutoff,
+            frames_archived_at__isnull=True,
+        ).order_by('start_time', 'id')
+
+        if options['dry_run']:
+            self.stdout.write(f'보관 대상 세션 {sessions.count()}개')
+            return
+
+        session_count = 0
+        frame_count = 0
+        month = None
+        batch = []
+        # 시작 시각 순으로 읽으며 같은 달끼리 batch_size 개씩 처리 (한 달 전체를 메모리에 올리지 않음)
+        for session in sessions.iterator(chunk_size=options['batch_size']):
+            session_month = archive_month(session)
+            if batch and (session_month != month or len(batch) >= options['batch_size']):
+                archived = self._archive(month, batch, options['chunk_size'])
+                session_count += len(archived)
+                frame_count += sum(count for _, count in archived)
+                batch = []
+            month = session_month
+            batch.append(session)
+        if batch:
+            archived = self._archive(month, batch, options['chunk_size'])
+            session_count += len(archived)
+            frame_count += sum(count for _, count in archived)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n총 {session_count}개 세션, {frame_count}개 프레임을 보관 파일로 옮겼습니다.'
+        ))
+
+    def _archive(self, month, sessions, chunk_size):
+        try:
+            archived = archive_sessions(month, sessions, chunk_size=chunk_size)
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'{month} 보관 중 오류: {str(e)}'))
+            return []
+        self.stdout.write(f'{month}: {len(archived)}개 세션, {sum(count for _, count in archived)}개 프레임')
+        return archived
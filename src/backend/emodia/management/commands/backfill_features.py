@@ -0,0 +1,97 @@
+"""
+특징 정의(FEATURE_SCHEMA_VERSION)가 바뀐 뒤 저장된 특징을 다시 계산하는 관리 명령어
+
+features_version 이 현재 버전과 다른 행만 id 순서로 나눠 계산하므로 중간에 멈춰도 다시 실행하면 이어서 처리된다.
+(새로 저장되는 템플릿/프레임은 save, from_keypoints 에서 바로 계산)
+프레임 특징은 POSE_FRAME_FEATURES 가 켜진 경우에만 저장하므로 --model all 에서는 꺼져 있으면 건너뛴다.
+"""
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from emodia.models import ExpertPoseTemplate, PoseFrame
+from emodia.ml_utils import (
+    extract_features, extract_features_batch, extract_features_many, pack_features, FEATURE_SCHEMA_VERSION
+)
+from emodia.template_index import invalidate_template_index
+
+
+class Command(BaseCommand):
+    help = '특징 정의가 바뀐 템플릿/포즈 프레임의 특징 다시 계산'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=['templates', 'frames', 'all'], default='all', help='다시 계산할 대상')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='한 번에 계산할 행 수')
+        parser.add_argument('--sleep', type=float, default=0.0, help='청크 사이 대기 시간 (초, DB 부하 조절용)')
+
+    def handle(self, *args, **options):
+        self.chunk_size = options['chunk_size']
+        self.sleep = options['sleep']
+        self.stdout.write(f'특징 버전: {FEATURE_SCHEMA_VERSION}')
+
+        templates = frames = 0
+        if options['model'] in ('templates', 'all'):
+            templates = self.backfill(
+                ExpertPoseTemplate.objects.only('id', 'keypoints', 'features', 'features_version'),
+                self.compute_templates, ['features', 'features_version'], '템플릿',
+            )
+            if templates:
+                # bulk_update 는 post_save 신호가 없으므로 직접 무효화
+                invalidate_template_index()
+        if options['model'] == 'frames' or (
+                options['model'] == 'all' and getattr(settings, 'POSE_FRAME_FEATURES', False)):
+            frames = self.backfill(
+                PoseFrame.objects.only('id', 'keypoints', 'keypoints_packed', 'features_version'),
+                self.compute_frames, ['features_packed', 'features_version'], '프레임',
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'총 템플릿 {templates}개, 프레임 {frames}개의 특징을 다시 계산했습니다.'))
+
+    def backfill(self, queryset, compute, fields, label):
+        """버전이 다른 행만 id 순서로 청크 단위 계산 + bulk_update → 처리한 행 수"""
+        queryset = queryset.exclude(features_version=FEATURE_SCHEMA_VERSION).order_by('id')
+        total = queryset.count()
+        self.stdout.write(f'{label} 대상: {total}개')
+
+        done = 0
+        last_id = 0
+        while True:
+            rows = list(queryset.filter(id__gt=last_id)[:self.chunk_size])
+            if not rows:
+                break
+            try:
+                compute(rows)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'  {label} {rows[0].id}~{rows[-1].id} 처리 중 오류: {str(e)}'))
+            else:
+                queryset.model.objects.bulk_update(rows, fields)
+                done += len(rows)
+                self.stdout.write(f'  {done}/{total} 계산 완료')
+            last_id = rows[-1].id
+            if self.sleep:
+                time.sleep(self.sleep)
+        return done
+
+    @staticmethod
+    def compute_templates(templates):
+        try:
+            computed = extract_features_many(template.keypoints or [] for template in templates)
+        except (KeyError, TypeError, ValueError):
+            # 형식이 잘못된 템플릿이 섞여 있으면 하나씩 계산 (오류는 특징 없음으로 기록)
+            computed = []
+            for template in templates:
+                try:
+                    computed.append(extract_features(template.keypoints))
+                except ValueError:
+                    computed.append(None)
+        for template, features in zip(templates, computed):
+            template.features = features if template.keypoints else None
+            template.features_version = FEATURE_SCHEMA_VERSION
+
+    @staticmethod
+    def compute_frames(frames):
+        matrix = extract_features_batch(np.stack([frame.keypoint_array() for frame in frames]))
+        for frame, row in zip(frames, matrix):
+            frame.features_packed = pack_features(row)
+            frame.features_version = FEATURE_SCHEMA_VERSION
@@ -0,0 +1,39 @@
+"""
+종료된 운동 세션의 PoseFrame 행을 세션별 .npz 압축본으로 합치는 관리 명령어
+(POSE_COMPACT_ON_END 를 켜기 전의 세션이나 압축에 실패한 세션 처리용)
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from emodia.models import WorkoutSession
+from emodia.session_frames import compact_session
+
+
+class Command(BaseCommand):
+    help = '종료된 운동 세션의 포즈 프레임을 압축본으로 합치기'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ended-before-minutes', type=int, default=10,
+                            help='종료 후 이 시간(분)이 지난 세션만 처리')
+        parser.add_argument('--keep-rows', action='store_true', help='압축 후 PoseFrame 행 유지')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(minutes=options['ended_before_minutes'])
+        sessions = WorkoutSession.objects.filter(
+            end_time__isnull=False,
+            end_time__lte=cutoff,
+            frames_compacted_at__isnull=True,
+        ).order_by('id')
+
+        compacted_count = 0
+        for session in sessions.iterator():
+            try:
+                frame_count = compact_session(session, delete_rows=not options['keep_rows'])
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'세션 {session.id} 처리 중 오류: {str(e)}'))
+                continue
+            compacted_count += 1
+            self.stdout.write(f'세션 {session.id}: {frame_count}개 프레임 압축')
+
+        self.stdout.write(self.style.SUCCESS(f'\n총 {compacted_count}개 세션을 압축했습니다.'))
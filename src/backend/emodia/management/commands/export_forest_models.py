@@ -0,0 +1,44 @@
+"""
+저장된 RandomForest 모델을 평탄화 배열(.forest.npz)로 내보내는 관리 명령어
+(평탄화 배열 도입 전에 학습한 모델 처리용, 새로 학습한 모델은 save_model 에서 함께 저장)
+"""
+import joblib
+import numpy as np
+from django.core.management.base import BaseCommand
+from emodia.forest_export import export_forest
+from emodia.models import MLModel
+
+
+class Command(BaseCommand):
+    help = '저장된 RandomForest 모델을 실시간 예측용 평탄화 배열로 내보내기'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='활성 모델이 아닌 모델도 내보내기')
+        parser.add_argument('--check-samples', type=int, default=1000,
+                            help='sklearn 결과와 비교할 무작위 샘플 수 (0 이면 비교하지 않음)')
+
+    def handle(self, *args, **options):
+        ml_models = MLModel.objects.filter(model_type='random_forest').order_by('id')
+        if not options['all']:
+            ml_models = ml_models.filter(is_active=True)
+
+        exported_count = 0
+        rng = np.random.default_rng(0)
+        for ml_model in ml_models:
+            try:
+                model_path = ml_model.model_file.path
+                estimator = joblib.load(model_path)
+                # 비교가 통과한 경우에만 파일을 씀 (다르면 기존 파일도 지움)
+                path = export_forest(estimator, model_path, check_samples=options['check_samples'], rng=rng)
+                if path is None:
+                    self.stdout.write(self.style.WARNING(f'모델 {ml_model.id}: RandomForest 가 아님'))
+                    continue
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'모델 {ml_model.id} 처리 중 오류: {str(e)}'))
+                continue
+            exported_count += 1
+            self.stdout.write(f'모델 {ml_model.id} ({ml_model.version}): {path}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n총 {exported_count}개 모델을 내보냈습니다. (실행 중인 서버는 재시작 후 반영)'
+        ))
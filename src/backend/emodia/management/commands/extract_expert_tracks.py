@@ -0,0 +1,86 @@
+"""
+EmotionVideo 영상에서 전문가 포즈 궤적을 추출하고 후보 ExpertPoseTemplate 을 만드는 관리 명령어
+(영상 파일이 바뀌지 않았으면 건너뛰므로 중단 후 다시 실행하면 남은 영상부터 이어서 처리)
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from emodia.expert_tracks import video_fingerprint, submit_video, collect_track, save_track
+from emodia.models import EmotionVideo, ExpertPoseTrack
+from emodia.pose_estimation import PoseEstimatorPool, create_worker_pool
+
+
+class Command(BaseCommand):
+    help = '전문가 영상에서 포즈 궤적 추출 + 후보 템플릿 생성'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fps', type=float, default=2.0, help='초당 추출할 프레임 수')
+        parser.add_argument('--segment-seconds', type=float, default=60.0,
+                            help='작업 프로세스 하나가 맡는 영상 구간 길이 (초)')
+        parser.add_argument('--workers', type=int,
+                            default=getattr(settings, 'POSE_ESTIMATION_WORKERS', 2), help='작업 프로세스 수')
+        parser.add_argument('--per-phase', type=int, default=3, help='phase 별 후보 템플릿 수')
+        parser.add_argument('--video', type=int, action='append', dest='video_ids', help='처리할 영상 ID (여러 번 지정 가능)')
+        parser.add_argument('--force', action='store_true', help='바뀌지 않은 영상도 다시 추출')
+
+    def handle(self, *args, **options):
+        if not PoseEstimatorPool.is_available():
+            self.stdout.write(self.style.ERROR('opencv-python, mediapipe 가 설치되어 있지 않습니다.'))
+            return
+
+        videos = EmotionVideo.objects.order_by('id')
+        if options['video_ids']:
+            videos = videos.filter(id__in=options['video_ids'])
+        fingerprints = dict(ExpertPoseTrack.objects.values_list('video_id', 'fingerprint'))
+
+        # 1. 바뀐 영상만 골라 지문 계산
+        pending = []
+        skipped_count = 0
+        for video in videos:
+            try:
+                path = video.video.path
+                fingerprint = video_fingerprint(path, options['fps'])
+            except (OSError, ValueError) as e:
+                self.stdout.write(self.style.WARNING(f'영상 {video.id} 파일을 읽을 수 없습니다: {str(e)}'))
+                continue
+            if not options['force'] and fingerprints.get(video.id) == fingerprint:
+                skipped_count += 1
+                continue
+            pending.append((video, path, fingerprint))
+
+        self.stdout.write(f'추출 대상 {len(pending)}개, 변경 없음 {skipped_count}개')
+        if not pending:
+            return
+
+        # 2. 모든 영상의 구간 작업을 먼저 제출해 작업 프로세스를 계속 바쁘게 유지
+        executor = create_worker_pool(
+            options['workers'],
+            getattr(settings, 'POSE_ESTIMATION_MODEL_COMPLEXITY', 1),
+            getattr(settings, 'POSE_ESTIMATION_MIN_CONFIDENCE', 0.5),
+        )
+        extracted_count = 0
+        template_count = 0
+        try:
+            jobs = [
+                (video, fingerprint, submit_video(executor, path, options['fps'], options['segment_seconds']))
+                for video, path, fingerprint in pending
+            ]
+
+            # 3. 영상 순서대로 결과를 모아 영상마다 바로 저장 (중단되어도 저장된 영상은 다음 실행에서 건너뜀)
+            for video, fingerprint, futures in jobs:
+                try:
+                    timestamps, keypoints = collect_track(futures)
+                    track, created = save_track(
+                        video, fingerprint, options['fps'], timestamps, keypoints, options['per_phase']
+                    )
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'영상 {video.id} 처리 중 오류: {str(e)}'))
+                    continue
+                extracted_count += 1
+                template_count += created
+                self.stdout.write(f'영상 {video.id}: {track.frame_count}개 프레임, 후보 템플릿 {created}개')
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n총 {extracted_count}개 영상을 추출하고 후보 템플릿 {template_count}개를 만들었습니다.'
+        ))
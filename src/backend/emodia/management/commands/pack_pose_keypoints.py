@@ -0,0 +1,47 @@
+"""
+JSON으로 저장된 PoseFrame.keypoints 를 float32 바이너리(keypoints_packed)로 변환하는 관리 명령어
+
+KEYPOINT_NAMES 에 없는 키포인트 이름은 변환 시 버려진다.
+"""
+from django.core.management.base import BaseCommand
+from emodia.models import PoseFrame
+from emodia.keypoints import pack_keypoints
+
+
+class Command(BaseCommand):
+    help = 'PoseFrame 키포인트를 JSON에서 바이너리 형식으로 변환'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='한 번에 변환할 프레임 수')
+        parser.add_argument('--keep-json', action='store_true', help='변환 후에도 JSON 키포인트 유지')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        keep_json = options['keep_json']
+
+        queryset = PoseFrame.objects.filter(
+            keypoints_packed__isnull=True,
+            keypoints__isnull=False,
+        ).order_by('id').only('id', 'keypoints')
+
+        total = queryset.count()
+        self.stdout.write(f'변환 대상: {total}개 프레임')
+
+        converted = 0
+        last_id = 0
+        while True:
+            frames = list(queryset.filter(id__gt=last_id)[:chunk_size])
+            if not frames:
+                break
+
+            for frame in frames:
+                frame.keypoints_packed = pack_keypoints(frame.keypoints)
+                if not keep_json:
+                    frame.keypoints = None
+
+            PoseFrame.objects.bulk_update(frames, ['keypoints_packed', 'keypoints'])
+            converted += len(frames)
+            last_id = frames[-1].id
+            self.stdout.write(f'  {converted}/{total} 변환 완료')
+
+        self.stdout.write(self.style.SUCCESS(f'총 {converted}개 프레임을 변환했습니다.'))
@@ -0,0 +1,38 @@
+"""
+저장된 프레임 기록으로 WorkoutSession.summary 를 다시 계산하는 관리 명령어
+(요약 기능 도입 전에 종료된 세션 처리용, 저장 정책으로 버린 프레임은 포함되지 않음)
+"""
+from django.core.management.base import BaseCommand
+from emodia.models import WorkoutSession
+from emodia.session_frames import iter_session_frames
+from emodia.session_summary import SessionSummary
+
+
+class Command(BaseCommand):
+    help = '종료된 운동 세션의 요약을 프레임 기록으로 다시 계산'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='요약이 이미 있는 세션도 다시 계산')
+        parser.add_argument('--max-gap', type=float, default=1.0,
+                            help='바른 자세 유지 시간에 포함할 최대 프레임 간격 (초)')
+
+    def handle(self, *args, **options):
+        sessions = WorkoutSession.objects.filter(end_time__isnull=False).order_by('id')
+        if not options['all']:
+            sessions = sessions.filter(summary={})
+
+        rebuilt_count = 0
+        for session in sessions.iterator():
+            summary = SessionSummary()
+            try:
+                for frame in iter_session_frames(session):
+                    if frame['feedback']:
+                        summary.record(frame['feedback'], frame['timestamp'], options['max_gap'])
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'세션 {session.id} 처리 중 오류: {str(e)}'))
+                continue
+            WorkoutSession.objects.filter(id=session.id).update(summary=summary.to_dict())
+            rebuilt_count += 1
+            self.stdout.write(f'세션 {session.id}: {summary.frames}개 프레임')
+
+        self.stdout.write(self.style.SUCCESS(f'\n총 {rebuilt_count}개 세션의 요약을 다시 계산했습니다.'))
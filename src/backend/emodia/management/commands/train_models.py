@@ -0,0 +1,126 @@
+"""
+전문가 템플릿이 충분한 모든 스포츠의 자세 분류 모델을 학습하는 관리 명령어
+
+스포츠마다 작업 프로세스 하나에서 train_and_save_model 을 실행하고 (spawn, 스포츠끼리 병렬),
+각 프로세스 안에서는 --n-jobs 로 숲 학습과 교차 검증 fold 를 병렬로 돌린다.
+학습한 모델은 비활성 상태로 저장 (--activate 를 주면 바로 활성화).
+"""
+import contextlib
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Count, Q
+from emodia.models import Sports
+from emodia.train_model import train_and_save_model
+
+# load_training_data 의 최소 템플릿 수
+MIN_TEMPLATES = 10
+
+
+def _train_sports(sports_id, trained_by, n_jobs, cv, activate):
+    """작업 프로세스: 스포츠 하나 학습 → 결과 딕셔너리 (출력은 모아서 반환)"""
+    output = io.StringIO()
+    timings = {}
+    result = {'sports_id': sports_id, 'timings': timings}
+    started = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output):
+            ml_model = train_and_save_model(sports_id, trained_by=trained_by, n_jobs=n_jobs, cv=cv, timings=timings)
+            if activate:
+                ml_model.activate()
+        result.update(
+            model_id=ml_model.id, version=ml_model.version, accuracy=ml_model.accuracy,
+            precision=ml_model.precision, recall=ml_model.recall, f1_score=ml_model.f1_score,
+        )
+    except Exception as e:
+        result['error'] = str(e)
+    result['total'] = time.perf_counter() - started
+    result['log'] = output.getvalue()
+    return result
+
+
+class Command(BaseCommand):
+    help = '템플릿이 충분한 모든 스포츠의 자세 분류 모델을 병렬로 학습'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sports', type=int, action='append', dest='sports_ids',
+                            help='학습할 스포츠 ID (여러 번 지정 가능, 없으면 전체)')
+        parser.add_argument('--workers', type=int, default=0,
+                            help='동시에 학습할 스포츠 수 (0 이면 CPU 수와 스포츠 수 중 작은 값)')
+        parser.add_argument('--n-jobs', type=int, default=1,
+                            help='스포츠마다 숲 학습 / 교차 검증에 쓸 병렬 작업 수 (-1 이면 CPU 수만큼)')
+        parser.add_argument('--cv', type=int, default=5, help='교차 검증 fold 수')
+        parser.add_argument('--trained-by', default='System', help='학습 담당자')
+        parser.add_argument('--activate', action='store_true', help='학습한 모델을 바로 활성화')
+        parser.add_argument('--verbose-log', action='store_true', help='스포츠별 학습 로그 전체 출력')
+
+    def handle(self, *args, **options):
+        sports = Sports.objects.annotate(
+            template_count=Count('expert_templates', filter=Q(expert_templates__is_active=True))
+        ).order_by('id')
+        if options['sports_ids']:
+            sports = sports.filter(id__in=options['sports_ids'])
+
+        targets = []
+        for item in sports:
+            if item.template_count < MIN_TEMPLATES:
+                self.stdout.write(self.style.WARNING(
+                    f'{item.name} (ID={item.id}): 템플릿 {item.template_count}개 - 최소 {MIN_TEMPLATES}개 필요, 건너뜀'
+                ))
+                continue
+            targets.append(item)
+
+        self.stdout.write(f'학습 대상 {len(targets)}개 스포츠')
+        if not targets:
+            return
+
+        workers = options['workers'] or min(os.cpu_count() or 1, len(targets))
+        names = {item.id: item.name for item in targets}
+
+        # 작업 프로세스에 DB 연결을 넘기지 않도록 닫고, 웹 서버 등의 상태를 복제하지 않도록 spawn 사용
+        connections.close_all()
+        started = time.perf_counter()
+        trained_count = 0
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=django.setup,
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _train_sports, item.id, options['trained_by'], options['n_jobs'], options['cv'], options['activate']
+                )
+                for item in targets
+            ]
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'작업 프로세스 오류: {str(e)}'))
+                    continue
+                name = names[result['sports_id']]
+                if options['verbose_log'] or 'error' in result:
+                    self.stdout.write(result['log'])
+                if 'error' in result:
+                    self.stdout.write(self.style.ERROR(f'{name} (ID={result["sports_id"]}) 학습 중 오류: {result["error"]}'))
+                    continue
+
+                trained_count += 1
+                stages = ', '.join(f'{stage} {seconds:.2f}초' for stage, seconds in result['timings'].items())
+                self.stdout.write(
+                    f'{name} (ID={result["sports_id"]}): 모델 {result["model_id"]} ({result["version"]}) '
+                    f'정확도 {result["accuracy"]:.2%}, 정밀도 {result["precision"]:.2%}, '
+                    f'재현율 {result["recall"]:.2%}, F1 {result["f1_score"]:.2%}'
+                )
+                self.stdout.write(f'  소요 시간: {stages} (전체 {result["total"]:.2f}초)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n총 {trained_count}개 스포츠 모델을 학습했습니다. '
+            f'({workers}개 프로세스, 전체 {time.perf_counter() - started:.2f}초)'
+        ))
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emodia', '0004_alter_emotionvideo_options_emotionvideo_body_part_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='poseframe',
+            name='keypoints',
+            field=models.JSONField(blank=True, help_text='Pose keypoints coordinate data', null=True),
+        ),
+        migrations.AddField(
+            model_name='poseframe',
+            name='keypoints_packed',
+            field=models.BinaryField(blank=True, help_text='Packed float32 (x, y, score) keypoints in KEYPOINT_NAMES order', null=True),
+        ),
+    ]
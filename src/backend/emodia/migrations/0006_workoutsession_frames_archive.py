@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emodia', '0005_poseframe_keypoints_packed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workoutsession',
+            name='frames_archive',
+            field=models.FileField(blank=True, help_text='Compacted frame history (.npz)', null=True, upload_to='session_frames/'),
+        ),
+        migrations.AddField(
+            model_name='workoutsession',
+            name='frames_compacted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
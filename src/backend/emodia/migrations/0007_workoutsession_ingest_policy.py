@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emodia', '0006_workoutsession_frames_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workoutsession',
+            name='ingest_policy',
+            field=models.JSONField(blank=True, default=dict, help_text='Frame persistence policy (min_delta, min_confidence)'),
+        ),
+    ]
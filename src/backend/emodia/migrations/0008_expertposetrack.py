@@ -0,0 +1,39 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emodia', '0007_workoutsession_ingest_policy'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpertPoseTrack',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(help_text='Source file fingerprint (skip unchanged videos)', max_length=64)),
+                ('sample_fps', models.FloatField(help_text='Sampling rate used for extraction (frames per second)')),
+                ('frame_count', models.IntegerField(default=0, help_text='Number of sampled frames')),
+                ('timestamps', models.BinaryField(help_text='Packed float32 sample times (seconds)')),
+                ('keypoints', models.BinaryField(help_text='Packed float32 (N, K, 3) keypoints in KEYPOINT_NAMES order')),
+                ('extracted_at', models.DateTimeField(auto_now=True)),
+                ('video', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='pose_track', to='emodia.emotionvideo')),
+            ],
+            options={
+                'verbose_name': 'Expert Pose Track',
+                'verbose_name_plural': 'Expert Pose Tracks',
+            },
+        ),
+        migrations.AddField(
+            model_name='expertposetemplate',
+            name='source_timestamp',
+            field=models.FloatField(blank=True, help_text='Time in the source video (seconds)', null=True),
+        ),
+        migrations.AddField(
+            model_name='expertposetemplate',
+            name='source_track',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='templates', to='emodia.expertposetrack'),
+        ),
+    ]
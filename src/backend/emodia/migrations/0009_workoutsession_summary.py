@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emodia', '0008_expertposetrack'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workoutsession',
+            name='summary',
+            field=models.JSONField(blank=True, default=dict, help_text='Incremental quality summary (frame counts, nose_offset, correct posture time, corrections)'),
+        ),
+    ]
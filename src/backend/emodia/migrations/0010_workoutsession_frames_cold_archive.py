@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emodia', '0009_workoutsession_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workoutsession',
+            name='frames_cold_archive',
+            field=models.CharField(blank=True, default='', help_text="Monthly archive file name (YYYY-MM.zip) holding this session's frames", max_length=32),
+        ),
+        migrations.AddField(
+            model_name='workoutsession',
+            name='frames_archived_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
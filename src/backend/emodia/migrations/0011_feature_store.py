@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('emodia', '0010_workoutsession_frames_cold_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expertposetemplate',
+            name='features_version',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='Feature schema version of features (stale rows are recomputed by backfill_features)', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='poseframe',
+            name='features_packed',
+            field=models.BinaryField(blank=True, help_text='Packed float32 feature vector in get_feature_names() order', null=True),
+        ),
+        migrations.AddField(
+            model_name='poseframe',
+            name='features_version',
+            field=models.CharField(blank=True, db_index=True, default='', help_text='Feature schema version of features_packed (stale rows are recomputed by backfill_features)', max_length=16),
+        ),
+    ]
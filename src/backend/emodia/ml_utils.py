@@ -3,9 +3,17 @@ ML 학습을 위한 유틸리티 함수들
 향후 ML 도입 시 사용할 특징 추출 및 데이터 처리 함수
 """
 
+import hashlib
 import math
 from typing import Dict, List, Optional
 
+import numpy as np
+
+from .keypoints import (
+    parse_pose, keypoints_to_array_many, NOSE, LEFT_EAR, RIGHT_EAR, LEFT_SHOULDER, RIGHT_SHOULDER,
+    LEFT_ELBOW, RIGHT_ELBOW
+)
+
 
 def get_keypoint(keypoints: List[Dict], name: str) -> Optional[Dict]:
     """키포인트 리스트에서 특정 이름의 키포인트 추출"""
@@ -27,11 +35,16 @@ def calculate_angle(p1: Dict, p2: Dict, p3: Dict) -> float:
     세 점으로 이루는 각도 계산 (p2가 꼭짓점)
     반환값: 0~180도
     """
+    return _angle(p1['x'], p1['y'], p2['x'], p2['y'], p3['x'], p3['y'])
+
+
+def _angle(x1: float, y1: float, x2: float, y2: float, x3: float, y3: float) -> float:
+    """calculate_angle 의 좌표 버전 (꼭짓점: x2, y2)"""
     # 벡터 계산
-    v1_x = p1['x'] - p2['x']
-    v1_y = p1['y'] - p2['y']
-    v2_x = p3['x'] - p2['x']
-    v2_y = p3['y'] - p2['y']
+    v1_x = x1 - x2
+    v1_y = y1 - y2
+    v2_x = x3 - x2
+    v2_y = y3 - y2
 
     # 내적과 외적
     dot = v1_x * v2_x + v1_y * v2_y
@@ -44,25 +57,23 @@ def calculate_angle(p1: Dict, p2: Dict, p3: Dict) -> float:
     return abs(angle_deg)
 
 
-def calculate_symmetry(keypoints: List[Dict]) -> float:
+def calculate_symmetry(keypoints) -> float:
     """
     좌우 대칭성 계산
     반환값: 0~1 (1이 완벽한 대칭)
     """
-    left_shoulder = get_keypoint(keypoints, 'left_shoulder')
-    right_shoulder = get_keypoint(keypoints, 'right_shoulder')
-    left_elbow = get_keypoint(keypoints, 'left_elbow')
-    right_elbow = get_keypoint(keypoints, 'right_elbow')
+    pose = parse_pose(keypoints)
+    x = pose.x
 
-    if not all([left_shoulder, right_shoulder, left_elbow, right_elbow]):
+    if not pose.has(LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_ELBOW, RIGHT_ELBOW):
         return 0.0
 
     # 어깨 중심선
-    center_x = (left_shoulder['x'] + right_shoulder['x']) / 2
+    center_x = (x[LEFT_SHOULDER] + x[RIGHT_SHOULDER]) / 2
 
     # 좌우 거리 차이
-    left_dist = abs(left_elbow['x'] - center_x)
-    right_dist = abs(right_elbow['x'] - center_x)
+    left_dist = abs(x[LEFT_ELBOW] - center_x)
+    right_dist = abs(x[RIGHT_ELBOW] - center_x)
 
     # 대칭성 점수
     if left_dist + right_dist == 0:
@@ -72,67 +83,62 @@ def calculate_symmetry(keypoints: List[Dict]) -> float:
     return max(0.0, min(1.0, symmetry))
 
 
-def extract_features(keypoints: List[Dict]) -> Dict[str, float]:
+def extract_features(keypoints) -> Dict[str, float]:
     """
     키포인트에서 ML 학습용 특징 추출
 
     Args:
-        keypoints: 포즈 키포인트 리스트 [{name, x, y, score}, ...]
+        keypoints: 포즈 키포인트 리스트 [{name, x, y, score}, ...] 또는 Pose
 
     Returns:
         특징 딕셔너리
     """
     features = {}
 
-    # 키포인트 추출
-    nose = get_keypoint(keypoints, 'nose')
-    left_ear = get_keypoint(keypoints, 'left_ear')
-    right_ear = get_keypoint(keypoints, 'right_ear')
-    left_shoulder = get_keypoint(keypoints, 'left_shoulder')
-    right_shoulder = get_keypoint(keypoints, 'right_shoulder')
-    left_elbow = get_keypoint(keypoints, 'left_elbow')
-    right_elbow = get_keypoint(keypoints, 'right_elbow')
-    left_wrist = get_keypoint(keypoints, 'left_wrist')
-    right_wrist = get_keypoint(keypoints, 'right_wrist')
+    # 키포인트 리스트는 한 번만 순회
+    pose = parse_pose(keypoints)
+    x, y, present = pose.x, pose.y, pose.present
+    has_nose = present[NOSE]
+    has_shoulders = present[LEFT_SHOULDER] and present[RIGHT_SHOULDER]
 
     # === 기본 측정값 ===
 
     # 1. 머리 기울기 (코의 어깨 중심선 대비 오프셋)
-    if nose and left_shoulder and right_shoulder:
-        shoulder_center_x = (left_shoulder['x'] + right_shoulder['x']) / 2
-        features['nose_offset'] = nose['x'] - shoulder_center_x
+    if has_nose and has_shoulders:
+        shoulder_center_x = (x[LEFT_SHOULDER] + x[RIGHT_SHOULDER]) / 2
+        features['nose_offset'] = x[NOSE] - shoulder_center_x
     else:
         features['nose_offset'] = 0.0
 
     # 2. 어깨 Y축 차이 (수평 체크)
-    if left_shoulder and right_shoulder:
-        features['shoulder_y_diff'] = abs(left_shoulder['y'] - right_shoulder['y'])
+    if has_shoulders:
+        features['shoulder_y_diff'] = abs(y[LEFT_SHOULDER] - y[RIGHT_SHOULDER])
     else:
         features['shoulder_y_diff'] = 0.0
 
     # 3. 귀 Y축 차이 (머리 기울기)
-    if left_ear and right_ear:
-        features['ear_y_diff'] = left_ear['y'] - right_ear['y']
+    if present[LEFT_EAR] and present[RIGHT_EAR]:
+        features['ear_y_diff'] = y[LEFT_EAR] - y[RIGHT_EAR]
     else:
         features['ear_y_diff'] = 0.0
 
     # === 각도 측정 ===
 
     # 4. 목 기울기 각도
-    if nose and left_shoulder and right_shoulder:
-        features['neck_tilt_angle'] = calculate_angle(
-            left_shoulder,
-            {'x': shoulder_center_x, 'y': (left_shoulder['y'] + right_shoulder['y']) / 2},
-            nose
+    if has_nose and has_shoulders:
+        features['neck_tilt_angle'] = _angle(
+            x[LEFT_SHOULDER], y[LEFT_SHOULDER],
+            shoulder_center_x, (y[LEFT_SHOULDER] + y[RIGHT_SHOULDER]) / 2,
+            x[NOSE], y[NOSE]
         )
     else:
         features['neck_tilt_angle'] = 0.0
 
     # 5. 어깨 기울기 각도
-    if left_shoulder and right_shoulder:
+    if has_shoulders:
         # 수평선과의 각도
-        dx = right_shoulder['x'] - left_shoulder['x']
-        dy = right_shoulder['y'] - left_shoulder['y']
+        dx = x[RIGHT_SHOULDER] - x[LEFT_SHOULDER]
+        dy = y[RIGHT_SHOULDER] - y[LEFT_SHOULDER]
         features['shoulder_tilt_angle'] = abs(math.degrees(math.atan2(dy, dx)))
     else:
         features['shoulder_tilt_angle'] = 0.0
@@ -140,34 +146,148 @@ def extract_features(keypoints: List[Dict]) -> Dict[str, float]:
     # === 거리 측정 ===
 
     # 6. 코-어깨 거리
-    if nose and left_shoulder:
-        features['nose_to_left_shoulder_dist'] = euclidean_distance(nose, left_shoulder)
+    if has_nose and present[LEFT_SHOULDER]:
+        dx = x[NOSE] - x[LEFT_SHOULDER]
+        dy = y[NOSE] - y[LEFT_SHOULDER]
+        features['nose_to_left_shoulder_dist'] = math.sqrt(dx * dx + dy * dy)
     else:
         features['nose_to_left_shoulder_dist'] = 0.0
 
     # 7. 어깨 너비
-    if left_shoulder and right_shoulder:
-        features['shoulder_width'] = euclidean_distance(left_shoulder, right_shoulder)
+    if has_shoulders:
+        dx = x[LEFT_SHOULDER] - x[RIGHT_SHOULDER]
+        dy = y[LEFT_SHOULDER] - y[RIGHT_SHOULDER]
+        features['shoulder_width'] = math.sqrt(dx * dx + dy * dy)
     else:
         features['shoulder_width'] = 0.0
 
     # === 대칭성 ===
 
     # 8. 좌우 대칭성
-    features['symmetry'] = calculate_symmetry(keypoints)
+    features['symmetry'] = calculate_symmetry(pose)
 
     # === 신뢰도 ===
 
     # 9. 평균 키포인트 신뢰도
-    scores = [kp['score'] for kp in keypoints if 'score' in kp]
-    features['avg_confidence'] = sum(scores) / len(scores) if scores else 0.0
+    features['avg_confidence'] = pose.score_sum / pose.score_count if pose.score_count else 0.0
 
     # 10. 최소 키포인트 신뢰도
-    features['min_confidence'] = min(scores) if scores else 0.0
+    features['min_confidence'] = pose.score_min if pose.score_count else 0.0
 
     return features
 
 
+def extract_features_batch(keypoints: np.ndarray) -> np.ndarray:
+    """
+    (N, K, 3) 키포인트 배열 → (N, F) 특징 행렬 (열 순서는 get_feature_names())
+    extract_features 와 같은 계산을 NumPy 로 한 번에 (키포인트가 없으면 같은 기본값 0.0)
+    - 값은 extract_features 와 부동소수점 반올림 차이(np.arctan2, 합산 순서)까지만 다름
+    - x 또는 y 가 NaN 인 키포인트는 누락으로 처리 (Pose.from_array 와 같은 규칙)
+    - 신뢰도는 누락되지 않은 키포인트의 score 로 계산 (parse_pose 와 같이 KEYPOINT_NAMES 에 없는 이름은 제외)
+
+    Args:
+        keypoints: keypoints_to_array_many 결과 또는 ExpertPoseTrack.keypoints 배열
+
+    Returns:
+        특징 행렬 (float64)
+    """
+    arr = np.asarray(keypoints, dtype=np.float64)
+    if arr.ndim != 3 or arr.shape[2] != 3:
+        raise ValueError(f'키포인트 배열은 (N, K, 3) 이어야 합니다: {arr.shape}')
+    n = len(arr)
+    present = ~np.isnan(arr[:, :, :2]).any(axis=2)
+    x = arr[:, :, 0]
+    y = arr[:, :, 1]
+    features = np.zeros((n, len(get_feature_names())), dtype=np.float64)
+
+    has_nose = present[:, NOSE]
+    has_left = present[:, LEFT_SHOULDER]
+    has_shoulders = has_left & present[:, RIGHT_SHOULDER]
+    has_head = has_nose & has_shoulders
+    has_ears = present[:, LEFT_EAR] & present[:, RIGHT_EAR]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ls_x, ls_y = x[:, LEFT_SHOULDER], y[:, LEFT_SHOULDER]
+        rs_x, rs_y = x[:, RIGHT_SHOULDER], y[:, RIGHT_SHOULDER]
+        nose_x, nose_y = x[:, NOSE], y[:, NOSE]
+        shoulder_center_x = (ls_x + rs_x) / 2
+        shoulder_center_y = (ls_y + rs_y) / 2
+
+        # 1~3. 기본 측정값
+        features[:, 0] = np.where(has_head, nose_x - shoulder_center_x, 0.0)
+        features[:, 1] = np.where(has_shoulders, np.abs(ls_y - rs_y), 0.0)
+        features[:, 2] = np.where(has_ears, y[:, LEFT_EAR] - y[:, RIGHT_EAR], 0.0)
+
+        # 4. 목 기울기 각도 (꼭짓점: 어깨 중심, _angle 과 같은 계산)
+        v1_x = ls_x - shoulder_center_x
+        v1_y = ls_y - shoulder_center_y
+        v2_x = nose_x - shoulder_center_x
+        v2_y = nose_y - shoulder_center_y
+        dot = v1_x * v2_x + v1_y * v2_y
+        det = v1_x * v2_y - v1_y * v2_x
+        features[:, 3] = np.where(has_head, np.abs(np.degrees(np.arctan2(det, dot))), 0.0)
+
+        # 5. 어깨 기울기 각도 (수평선과의 각도)
+        features[:, 4] = np.where(has_shoulders, np.abs(np.degrees(np.arctan2(rs_y - ls_y, rs_x - ls_x))), 0.0)
+
+        # 6~7. 거리
+        dx = nose_x - ls_x
+        dy = nose_y - ls_y
+        features[:, 5] = np.where(has_nose & has_left, np.sqrt(dx * dx + dy * dy), 0.0)
+        dx = ls_x - rs_x
+        dy = ls_y - rs_y
+        features[:, 6] = np.where(has_shoulders, np.sqrt(dx * dx + dy * dy), 0.0)
+
+        # 8. 좌우 대칭성 (calculate_symmetry 와 같은 계산)
+        left_dist = np.abs(x[:, LEFT_ELBOW] - shoulder_center_x)
+        right_dist = np.abs(x[:, RIGHT_ELBOW] - shoulder_center_x)
+        total = left_dist + right_dist
+        symmetry = np.clip(1 - np.abs(left_dist - right_dist) / total, 0.0, 1.0)
+        symmetry = np.where(total == 0, 1.0, symmetry)
+        has_arms = has_shoulders & present[:, LEFT_ELBOW] & present[:, RIGHT_ELBOW]
+        features[:, 7] = np.where(has_arms, symmetry, 0.0)
+
+        # 9~10. 신뢰도
+        scores = arr[:, :, 2]
+        valid = present & ~np.isnan(scores)
+        count = valid.sum(axis=1)
+        score_sum = np.where(valid, scores, 0.0).sum(axis=1)
+        score_min = np.where(valid, scores, np.inf).min(axis=1, initial=np.inf)
+        features[:, 8] = np.where(count > 0, score_sum / np.maximum(count, 1), 0.0)
+        features[:, 9] = np.where(count > 0, score_min, 0.0)
+
+    return features
+
+
+def extract_features_many(frames_keypoints) -> List[Dict[str, float]]:
+    """여러 프레임의 키포인트 딕셔너리 리스트 → 특징 딕셔너리 리스트 (extract_features_batch 사용)"""
+    names = get_feature_names()
+    matrix = extract_features_batch(keypoints_to_array_many(frames_keypoints))
+    return [dict(zip(names, row)) for row in matrix.tolist()]
+
+
+def extract_template_features(templates) -> Dict[int, Dict[str, float]]:
+    """
+    템플릿 리스트 → {id: 특징} (한 번에 계산, 형식 오류가 있으면 하나씩 계산해 잘못된 템플릿은 제외)
+    extract_features_many 는 한 프레임만 잘못돼도 전체가 ValueError 이므로 학습/관리 작업에서 사용
+    """
+    templates = list(templates)
+    try:
+        return dict(zip(
+            (template.id for template in templates),
+            extract_features_many(template.keypoints for template in templates),
+        ))
+    except (KeyError, TypeError, ValueError):
+        pass
+    computed = {}
+    for template in templates:
+        try:
+            computed[template.id] = extract_features(template.keypoints)
+        except ValueError:
+            continue
+    return computed
+
+
 def calculate_similarity(keypoints1: List[Dict], keypoints2: List[Dict]) -> float:
     """
     두 포즈 간 유사도 계산
@@ -243,3 +363,27 @@ def get_feature_names() -> List[str]:
         'avg_confidence',
         'min_confidence',
     ]
+
+
+# ========== 특징 저장소 ==========
+
+# 특징 계산 방식(이름은 그대로인데 공식이 바뀐 경우)을 바꾸면 올려서 저장된 특징을 다시 계산
+FEATURE_DEFINITION_VERSION = 2
+
+
+def feature_schema_version() -> str:
+    """특징 정의 버전 해시 (get_feature_names() 순서 + FEATURE_DEFINITION_VERSION)"""
+    definition = f'{FEATURE_DEFINITION_VERSION}:' + ','.join(get_feature_names())
+    return hashlib.sha1(definition.encode()).hexdigest()[:12]
+
+
+# ExpertPoseTemplate.features_version / PoseFrame.features_version 와 다르면 다시 계산할 대상
+FEATURE_SCHEMA_VERSION = feature_schema_version()
+
+# PoseFrame.features_packed 형식 (get_feature_names() 순서 float32)
+PACKED_FEATURE_DTYPE = np.dtype('<f4')
+
+
+def pack_features(vector) -> bytes:
+    """특징 벡터 → float32 바이트"""
+    return np.asarray(vector, dtype=PACKED_FEATURE_DTYPE).tobytes()
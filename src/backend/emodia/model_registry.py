@@ -0,0 +1,183 @@
+"""
+활성 ML 모델 레지스트리 (프로세스 내 캐시)
+
+예측할 때마다 MLModel.objects.get(is_active=True) + joblib.load 를 하지 않고,
+스포츠별 활성 모델을 작업 프로세스마다 한 번만 불러 메모리에 둔다.
+- 활성 모델의 (id, model_file) 를 버전 토큰으로 보관하고, check_interval 초마다 토큰만 조회해
+  다른 프로세스에서 활성화한 모델로 교체 (재시작 불필요)
+- 같은 프로세스에서 저장/삭제되면 signals.py 에서 바로 무효화 (다음 조회 때 토큰 확인)
+- 모델 파일 옆에 평탄화 배열(forest_export)이 있으면 예측은 sklearn 대신 배열 평가기로 (결과 동일)
+"""
+
+import threading
+import time
+
+from django.conf import settings
+
+from .forest_export import load_forest
+from .models import MLModel, Sports
+
+
+class LoadedModel:
+    """메모리에 올린 활성 모델"""
+    __slots__ = ('id', 'version', 'model_type', 'token', 'estimator', 'forest')
+
+    def __init__(self, id, version, model_type, token, estimator, forest=None):
+        self.id = id
+        self.version = version
+        self.model_type = model_type
+        self.token = token
+        self.estimator = estimator
+        self.forest = forest  # FlatForest (평탄화 배열이 없으면 None)
+
+    def predict_proba(self, vectors):
+        """(라벨 배열, 확률 배열) - 평탄화 배열이 있으면 그쪽으로 계산"""
+        if self.forest is not None:
+            return self.forest.classes, self.forest.predict_proba(vectors)
+        return self.estimator.classes_, self.estimator.predict_proba(vectors)
+
+
+def active_model_token(sports_id):
+    """스포츠의 활성 모델 버전 토큰 (id, model_file), 활성 모델이 없으면 None"""
+    return (
+        MLModel.objects
+        .filter(sports_id=sports_id, is_active=True)
+        .values_list('id', 'model_file')
+        .first()
+    )
+
+
+def load_model(model_id):
+    """MLModel.id → LoadedModel (모델 파일 unpickle)"""
+    import joblib
+
+    ml_model = MLModel.objects.get(id=model_id)
+    return LoadedModel(
+        id=ml_model.id,
+        version=ml_model.version,
+        model_type=ml_model.model_type,
+        token=(ml_model.id, ml_model.model_file.name),
+        estimator=joblib.load(ml_model.model_file.path),
+        forest=load_forest(ml_model.model_file.path),
+    )
+
+
+class ModelRegistry:
+    """Sports.id → LoadedModel (처음 조회할 때 불러오고, 버전 토큰이 바뀌면 교체)"""
+
+    def __init__(self, check_interval=5.0):
+        self.check_interval = check_interval
+        self._models = {}   # sports_id → LoadedModel 또는 None (활성 모델 없음)
+        self._checked = {}  # sports_id → 마지막 토큰 확인 시각
+        self._load_locks = {}  # sports_id → 모델 파일을 불러오는 동안 잡는 잠금 (활성 모델이 있는 스포츠만)
+        self._lock = threading.Lock()
+
+        # 카운터
+        self.loads = 0
+        self.checks = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_settings(cls):
+        return cls(check_interval=getattr(settings, 'POSE_MODEL_CHECK_INTERVAL', 5.0))
+
+    def is_fresh(self, sports_id):
+        """DB 조회 없이 바로 쓸 수 있으면 True (비동기 코드에서 get 전에 확인)"""
+        checked = self._checked.get(sports_id)
+        return checked is not None and time.monotonic() - checked < self.check_interval
+
+    def get(self, sports_id):
+        """스포츠의 활성 모델 (없으면 None)"""
+        if self.is_fresh(sports_id):
+            return self._models.get(sports_id)
+
+        token = active_model_token(sports_id)
+        if token is None:
+            # 요청으로 들어온 없는 스포츠 ID 까지 보관하면 캐시가 끝없이 커지므로 있는 스포츠만 보관
+            known = Sports.objects.filter(id=sports_id).exists()
+            with self._lock:
+                self.checks += 1
+                if known:
+                    self._models[sports_id] = None
+                    self._checked[sports_id] = time.monotonic()
+                else:
+                    self._models.pop(sports_id, None)
+                    self._checked.pop(sports_id, None)
+            return None
+
+        with self._lock:
+            self.checks += 1
+            load_lock = self._load_locks.setdefault(sports_id, threading.Lock())
+        # 모델 파일은 전역 잠금 밖에서 불러와 다른 스포츠 조회를 막지 않음 (같은 스포츠는 한 번만 불러옴)
+        with load_lock:
+            current = self._models.get(sports_id)
+            if current is None or current.token != token:
+                current = load_model(token[0])
+                with self._lock:
+                    self.loads += 1
+            with self._lock:
+                self._models[sports_id] = current
+                self._checked[sports_id] = time.monotonic()
+        return current
+
+    def invalidate(self, sports_id=None):
+        """다음 조회 때 토큰을 다시 확인 (sports_id 가 None 이면 전체)"""
+        with self._lock:
+            if sports_id is None:
+                self._checked.clear()
+            else:
+                self._checked.pop(sports_id, None)
+            self.invalidations += 1
+
+    def predict(self, sports_id, vectors):
+        """
+        normalize_features 벡터 리스트 → (LoadedModel, 예측 라벨 리스트, 라벨별 확률 리스트)
+        활성 모델이 없으면 (None, [], [])
+        """
+        loaded = self.get(sports_id)
+        if loaded is None or not len(vectors):
+            return loaded, [], []
+        classes, probabilities = loaded.predict_proba(vectors)
+        labels = [classes[i] for i in probabilities.argmax(axis=1)]
+        return loaded, labels, [
+            {str(label): round(float(p), 4) for label, p in zip(classes, row)}
+            for row in probabilities
+        ]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sports': len(self._models),
+                'models': {
+                    sports_id: loaded.version
+                    for sports_id, loaded in self._models.items() if loaded is not None
+                },
+                'check_interval': self.check_interval,
+                'loads': self.loads,
+                'checks': self.checks,
+                'invalidations': self.invalidations,
+            }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry():
+    """프로세스 전역 ModelRegistry (처음 사용할 때 생성)"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry.from_settings()
+    return _registry
+
+
+def invalidate_model_registry(sports_id=None):
+    if _registry is not None:
+        _registry.invalidate(sports_id)
+
+
+def get_active_model(sports_id):
+    """스포츠의 활성 모델 (LoadedModel, 없으면 None)"""
+    return get_model_registry().get(sports_id)
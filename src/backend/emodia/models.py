@@ -1,6 +1,16 @@
-from django.db import models
+import numpy as np
+from django.db import models, transaction
+from django.conf import settings
 from django.contrib.auth.models import User
 
+from .keypoints import (
+    keypoints_to_array, array_to_keypoints, pack_keypoints, unpack_keypoints,
+    NUM_KEYPOINTS, PACKED_DTYPE
+)
+from .ml_utils import (
+    extract_features, normalize_features, pack_features, FEATURE_SCHEMA_VERSION
+)
+
 
 class Sports(models.Model):
     """스포츠 종류"""
@@ -175,6 +185,32 @@ class WorkoutSession(models.Model):
     end_time = models.DateTimeField(null=True, blank=True)
     duration = models.IntegerField(default=0, help_text="Workout duration (seconds)")
 
+    # 세션 종료 후 PoseFrame 행을 합친 압축본 (.npz)
+    frames_archive = models.FileField(
+        upload_to='session_frames/', null=True, blank=True,
+        help_text="Compacted frame history (.npz)"
+    )
+    frames_compacted_at = models.DateTimeField(null=True, blank=True)
+
+    # 보관 기간이 지나 월별 보관 파일(POSE_ARCHIVE_DIR/YYYY-MM.zip)로 옮긴 세션
+    frames_cold_archive = models.CharField(
+        max_length=32, blank=True, default='',
+        help_text="Monthly archive file name (YYYY-MM.zip) holding this session's frames"
+    )
+    frames_archived_at = models.DateTimeField(null=True, blank=True)
+
+    # 프레임 저장 정책 (비어 있으면 settings 기본값): {"min_delta": 0.01, "min_confidence": 0.3}
+    ingest_policy = models.JSONField(
+        default=dict, blank=True,
+        help_text="Frame persistence policy (min_delta, min_confidence)"
+    )
+
+    # 프레임마다 증분 갱신되는 품질 누적값 (session_summary.summary_report 로 응답 형식 계산)
+    summary = models.JSONField(
+        default=dict, blank=True,
+        help_text="Incremental quality summary (frame counts, nose_offset, correct posture time, corrections)"
+    )
+
     class Meta:
         ordering = ['-start_time']
 
@@ -186,18 +222,114 @@ class PoseFrame(models.Model):
     """실시간 포즈 좌표 기록"""
     session = models.ForeignKey(WorkoutSession, on_delete=models.CASCADE, related_name='pose_frames')
     timestamp = models.FloatField(help_text="Elapsed time since session start (seconds)")
-    keypoints = models.JSONField(help_text="Pose keypoints coordinate data")
+    keypoints = models.JSONField(null=True, blank=True, help_text="Pose keypoints coordinate data")
+    keypoints_packed = models.BinaryField(
+        null=True, blank=True,
+        help_text="Packed float32 (x, y, score) keypoints in KEYPOINT_NAMES order"
+    )
     feedback = models.JSONField(null=True, blank=True, help_text="Correction feedback data")
 
+    # ML 특징 (POSE_FRAME_FEATURES 가 켜진 경우에만 저장 시 계산, get_feature_names() 순서 float32)
+    # 세션 압축/월별 보관(session_frames)에는 들어가지 않음
+    features_packed = models.BinaryField(
+        null=True, blank=True, help_text="Packed float32 feature vector in get_feature_names() order"
+    )
+    features_version = models.CharField(
+        max_length=16, blank=True, default='', db_index=True,
+        help_text="Feature schema version of features_packed (stale rows are recomputed by backfill_features)"
+    )
+
     class Meta:
         ordering = ['session', 'timestamp']
 
     def __str__(self):
         return f"Frame at {self.timestamp}s"
 
+    @classmethod
+    def from_keypoints(cls, keypoints, **fields):
+        """POSE_KEYPOINT_STORAGE 설정에 맞는 형식으로 키포인트를 담은 (저장 전) 프레임 생성"""
+        pose_frame = cls(**fields)
+        pose_frame.set_keypoints(keypoints)
+        return pose_frame
+
+    def set_keypoints(self, keypoints):
+        self.keypoints = keypoints
+        self.keypoints_packed = None
+        if getattr(settings, 'POSE_KEYPOINT_STORAGE', 'json') == 'packed':
+            try:
+                self.keypoints_packed = pack_keypoints(keypoints)
+                self.keypoints = None
+            except ValueError:
+                # 형식이 잘못된 프레임은 JSON 형식과 같이 원본 그대로 저장 (피드백은 '인식 오류')
+                pass
+        if getattr(settings, 'POSE_FRAME_FEATURES', False):
+            self.set_features(keypoints)
+
+    def set_features(self, keypoints):
+        """특징 계산 후 저장 (좌표 형식 오류는 특징 없음으로 기록해 backfill 대상에서 제외)"""
+        try:
+            self.features_packed = pack_features(normalize_features(extract_features(keypoints)))
+        except ValueError:
+            self.features_packed = None
+        self.features_version = FEATURE_SCHEMA_VERSION
+
+    def save(self, *args, **kwargs):
+        # from_keypoints 를 거치지 않고 만든 프레임도 저장 시 특징 계산 (bulk_create 는 from_keypoints 에서 계산)
+        if (self.features_version != FEATURE_SCHEMA_VERSION and getattr(settings, 'POSE_FRAME_FEATURES', False)
+                and kwargs.get('update_fields') is None):
+            self.set_features(self.get_keypoints())
+        super().save(*args, **kwargs)
+
+    def get_keypoints(self):
+        """저장 형식과 관계없이 [{name, x, y, score}, ...] 반환 (호환용)"""
+        if self.keypoints is not None:
+            return self.keypoints
+        if self.keypoints_packed is not None:
+            return array_to_keypoints(self.keypoint_array())
+        return []
+
+    def keypoint_array(self):
+        """(K, 3) float 배열 반환 (packed 형식이면 복사 없이 디코딩, 형식이 잘못된 키포인트는 모두 NaN)"""
+        if self.keypoints_packed is not None:
+            return unpack_keypoints(self.keypoints_packed)
+        try:
+            return keypoints_to_array(self.keypoints or [])
+        except ValueError:
+            return np.full((NUM_KEYPOINTS, 3), np.nan)
+
 
 # ========== ML 인프라 모델 (향후 사용) ==========
 
+class ExpertPoseTrack(models.Model):
+    """전문가 영상(EmotionVideo)에서 추출한 포즈 궤적 (extract_expert_tracks 명령어)"""
+    video = models.OneToOneField(EmotionVideo, on_delete=models.CASCADE, related_name='pose_track')
+    fingerprint = models.CharField(max_length=64, help_text="Source file fingerprint (skip unchanged videos)")
+    sample_fps = models.FloatField(help_text="Sampling rate used for extraction (frames per second)")
+    frame_count = models.IntegerField(default=0, help_text="Number of sampled frames")
+    timestamps = models.BinaryField(help_text="Packed float32 sample times (seconds)")
+    keypoints = models.BinaryField(help_text="Packed float32 (N, K, 3) keypoints in KEYPOINT_NAMES order")
+    extracted_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Expert Pose Track'
+        verbose_name_plural = 'Expert Pose Tracks'
+
+    def __str__(self):
+        return f"{self.video} ({self.frame_count} frames)"
+
+    def set_arrays(self, timestamps, keypoints):
+        keypoints = np.asarray(keypoints, dtype=PACKED_DTYPE).reshape(-1, NUM_KEYPOINTS, 3)
+        self.timestamps = np.asarray(timestamps, dtype=PACKED_DTYPE).tobytes()
+        self.keypoints = keypoints.tobytes()
+        self.frame_count = len(keypoints)
+
+    def get_arrays(self):
+        """(타임스탬프 (N,), 키포인트 (N, K, 3)) float32 배열 (누락은 NaN)"""
+        timestamps = np.frombuffer(self.timestamps, dtype=PACKED_DTYPE)
+        keypoints = np.frombuffer(self.keypoints, dtype=PACKED_DTYPE).reshape(-1, NUM_KEYPOINTS, 3)
+        return timestamps, keypoints
+
+
 class ExpertPoseTemplate(models.Model):
     """전문가가 제공한 표준 자세 템플릿"""
     QUALITY_CHOICES = [
@@ -225,8 +357,18 @@ class ExpertPoseTemplate(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True, help_text="Whether to use for ML training")
 
-    # ML 특징 (자동 계산, 캐싱용)
+    # ML 특징 (저장 시 자동 계산, 캐싱용)
     features = models.JSONField(null=True, blank=True, help_text="Extracted feature vector")
+    features_version = models.CharField(
+        max_length=16, blank=True, default='', db_index=True,
+        help_text="Feature schema version of features (stale rows are recomputed by backfill_features)"
+    )
+
+    # 영상에서 자동 추출한 후보인 경우 원본 궤적과 시점
+    source_track = models.ForeignKey(
+        ExpertPoseTrack, on_delete=models.SET_NULL, null=True, blank=True, related_name='templates'
+    )
+    source_timestamp = models.FloatField(null=True, blank=True, help_text="Time in the source video (seconds)")
 
     class Meta:
         ordering = ['sports', 'exercise_phase', 'quality_level']
@@ -236,6 +378,23 @@ class ExpertPoseTemplate(models.Model):
     def __str__(self):
         return f"{self.sports.name} - {self.get_exercise_phase_display()} ({self.get_quality_level_display()})"
 
+    def set_features(self):
+        """keypoints 로 특징 다시 계산 (좌표 형식 오류는 특징 없음으로 기록)"""
+        try:
+            self.features = extract_features(self.keypoints) if self.keypoints else None
+        except ValueError:
+            self.features = None
+        self.features_version = FEATURE_SCHEMA_VERSION
+
+    def save(self, *args, **kwargs):
+        # keypoints 가 바뀌었을 수 있으므로 저장할 때마다 다시 계산 (update_fields 에 keypoints 가 없으면 생략)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'keypoints' in update_fields:
+            self.set_features()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'features', 'features_version'}
+        super().save(*args, **kwargs)
+
 
 class FeedbackRating(models.Model):
     """사용자 피드백 평가 (ML 학습용)"""
@@ -302,3 +461,20 @@ class MLModel(models.Model):
 
     def __str__(self):
         return f"{self.sports.name} - {self.model_type} {self.version}"
+
+    def save(self, *args, **kwargs):
+        """활성 모델로 저장하면 같은 스포츠의 다른 활성 모델은 같은 트랜잭션에서 비활성화"""
+        if not self.is_active:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            # 스포츠 행을 잠가 같은 스포츠의 활성화를 순서대로 처리 (두 모델이 동시에 활성화되지 않도록)
+            Sports.objects.select_for_update().filter(id=self.sports_id).first()
+            MLModel.objects.filter(sports_id=self.sports_id, is_active=True).exclude(id=self.id).update(
+                is_active=False
+            )
+            super().save(*args, **kwargs)
+
+    def activate(self):
+        """이 모델을 스포츠의 유일한 활성 모델로 전환"""
+        self.is_active = True
+        self.save(update_fields=['is_active'] if self.pk else None)
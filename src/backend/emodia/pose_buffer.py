@@ -0,0 +1,174 @@
+"""
+PoseFrame 쓰기 지연(write-behind) 버퍼
+
+POSE_WRITE_BEHIND = True 이면 피드백은 바로 응답하고, 프레임은 프로세스별 큐에 넣어
+백그라운드 스레드가 크기(POSE_BUFFER_BATCH_SIZE) 또는 시간(POSE_BUFFER_FLUSH_INTERVAL)
+조건으로 bulk_create 한다.
+
+- 큐가 가득 차면 POSE_BUFFER_PUT_TIMEOUT 초 동안 대기(backpressure) 후 버림(dropped)
+- 워커 종료(atexit), 세션 종료(end_workout_session) 시 flush
+"""
+
+import atexit
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+
+from .models import PoseFrame
+
+logger = logging.getLogger(__name__)
+
+
+class PoseFrameBuffer:
+    """프로세스 내 PoseFrame 저장 대기열 + 백그라운드 flusher"""
+
+    def __init__(self, max_size=10000, batch_size=500, flush_interval=1.0, put_timeout=0.05):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+
+        self._queue = queue.Queue(maxsize=max_size)
+        self._stats_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        # 카운터
+        self.enqueued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flush_count = 0
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            max_size=getattr(settings, 'POSE_BUFFER_MAX_SIZE', 10000),
+            batch_size=getattr(settings, 'POSE_BUFFER_BATCH_SIZE', 500),
+            flush_interval=getattr(settings, 'POSE_BUFFER_FLUSH_INTERVAL', 1.0),
+            put_timeout=getattr(settings, 'POSE_BUFFER_PUT_TIMEOUT', 0.05),
+        )
+
+    def put(self, pose_frame, timeout=None):
+        """
+        저장할 프레임 추가
+        큐가 가득 차면 timeout 동안 대기, 그래도 자리가 없으면 버리고 False 반환
+        (timeout=0 은 대기하지 않음 - 이벤트 루프 안에서 사용)
+        """
+        self._ensure_started()
+        timeout = self.put_timeout if timeout is None else timeout
+        try:
+            if timeout > 0:
+                self._queue.put(pose_frame, timeout=timeout)
+            else:
+                self._queue.put_nowait(pose_frame)
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+            return False
+
+        with self._stats_lock:
+            self.enqueued += 1
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def put_many(self, pose_frames, timeout=None):
+        """여러 프레임 추가, 큐에 들어간 개수 반환"""
+        return sum(1 for pose_frame in pose_frames if self.put(pose_frame, timeout))
+
+    def flush(self):
+        """큐에 쌓인 프레임을 batch_size 단위 bulk_create 로 모두 저장"""
+        with self._flush_lock:
+            while True:
+                batch = self._drain()
+                if not batch:
+                    break
+                try:
+                    PoseFrame.objects.bulk_create(batch)
+                except DatabaseError:
+                    logger.exception('PoseFrame 일괄 저장 실패 (%d개)', len(batch))
+                    with self._stats_lock:
+                        self.failed += len(batch)
+                else:
+                    with self._stats_lock:
+                        self.flushed += len(batch)
+                        self.flush_count += 1
+
+    def stop(self):
+        """flusher 종료 후 남은 프레임 저장 (워커 종료 시)"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'queue_depth': self._queue.qsize(),
+                'max_size': self.max_size,
+                'enqueued': self.enqueued,
+                'flushed': self.flushed,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'flush_count': self.flush_count,
+            }
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None and not self._stopped.is_set():
+                self._thread = threading.Thread(target=self._run, name='pose-frame-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            # 크기 조건(put에서 wakeup) 또는 시간 조건(flush_interval)
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            self.flush()
+            close_old_connections()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_pose_buffer():
+    """프로세스 전역 PoseFrameBuffer (처음 사용할 때 생성)"""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = PoseFrameBuffer.from_settings()
+                atexit.register(_buffer.stop)
+    return _buffer
+
+
+def is_write_behind():
+    return getattr(settings, 'POSE_WRITE_BEHIND', False)
+
+
+def flush_pose_buffer():
+    """버퍼가 만들어져 있으면 즉시 flush"""
+    if _buffer is not None:
+        _buffer.flush()
@@ -0,0 +1,391 @@
+"""
+서버 측 포즈 추정 (MediaPipe Pose + 프로세스 풀)
+
+저사양 클라이언트는 브라우저에서 포즈 추정을 충분한 프레임 속도로 돌릴 수 없으므로,
+JPEG 프레임(또는 짧은 영상)을 받아 서버에서 키포인트를 추출한다.
+- 작업 프로세스마다 MediaPipe 모델을 한 번만 로드 (initializer)
+- 요청의 프레임을 batch_size 개씩 묶어(micro-batching) 작업 프로세스에 나눠 보냄
+  (묶음은 한 요청 안에서만 만든다. 요청마다 프레임이 여러 장이고 작업 프로세스 하나가 묶음 하나를 처리하므로,
+  여러 요청을 기다렸다 합치면 지연만 늘어남. 동시 요청은 작업 프로세스 수만큼 병렬로 처리된다)
+- 결과는 KEYPOINT_NAMES 순서의 (N, K, 3) 배열 (score = MediaPipe visibility, 인식 실패 프레임은 NaN)
+- 처리 중인 묶음 수가 max_queue 를 넘으면 EstimatorBusy (뷰에서 503)
+
+cv2 / mediapipe 는 작업 프로세스 안에서만 import 한다 (웹 프로세스에는 필요 없음).
+"""
+
+import importlib.util
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from django.conf import settings
+
+from .keypoints import KEYPOINT_INDEX, NUM_KEYPOINTS
+
+# MediaPipe Pose 랜드마크 번호 → KEYPOINT_NAMES
+MEDIAPIPE_LANDMARKS = {
+    'nose': 0,
+    'left_eye': 2,
+    'right_eye': 5,
+    'left_ear': 7,
+    'right_ear': 8,
+    'left_shoulder': 11,
+    'right_shoulder': 12,
+    'left_elbow': 13,
+    'right_elbow': 14,
+    'left_wrist': 15,
+    'right_wrist': 16,
+    'left_hip': 23,
+    'right_hip': 24,
+    'left_knee': 25,
+    'right_knee': 26,
+    'left_ankle': 27,
+    'right_ankle': 28,
+}
+# 배열 변환용 (KEYPOINT_NAMES 순서 인덱스, MediaPipe 인덱스)
+_TARGET_INDEX = np.array([KEYPOINT_INDEX[name] for name in MEDIAPIPE_LANDMARKS])
+_SOURCE_INDEX = np.array(list(MEDIAPIPE_LANDMARKS.values()))
+
+
+class EstimatorBusy(Exception):
+    """대기열이 가득 차 요청을 받을 수 없음"""
+
+
+class EstimatorUnavailable(Exception):
+    """cv2 / mediapipe 가 설치되지 않았거나 작업 프로세스 오류"""
+
+
+# ========== 작업 프로세스 ==========
+
+_worker_pose = None
+
+
+def _init_worker(model_complexity, min_detection_confidence):
+    """작업 프로세스 시작 시 모델을 한 번 로드"""
+    global _worker_pose
+    import mediapipe as mp
+
+    _worker_pose = mp.solutions.pose.Pose(
+        static_image_mode=True,
+        model_complexity=model_complexity,
+        min_detection_confidence=min_detection_confidence,
+    )
+
+
+def _warm_up():
+    time.sleep(0.1)
+
+
+def _landmarks_to_array(landmarks):
+    """MediaPipe 랜드마크 33개 → (K, 3) float32 (x, y, visibility)"""
+    arr = np.full((NUM_KEYPOINTS, 3), np.nan, dtype=np.float32)
+    if landmarks is None:
+        return arr
+    values = np.array([(lm.x, lm.y, lm.visibility) for lm in landmarks.landmark], dtype=np.float32)
+    arr[_TARGET_INDEX] = values[_SOURCE_INDEX]
+    np.clip(arr[:, 2], 0.0, 1.0, out=arr[:, 2])
+    return arr
+
+
+def _infer(image_bgr):
+    import cv2
+
+    rgb = cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB)
+    return _landmarks_to_array(_worker_pose.process(rgb).pose_landmarks)
+
+
+def _estimate_images(images, submitted_at):
+    """
+    작업 프로세스: JPEG 바이트 묶음 → (n, K, 3) 배열 + 단계별 시간(ms)
+    디코딩에 실패한 프레임은 NaN
+    """
+    import cv2
+
+    started_at = time.time()
+    arr = np.full((len(images), NUM_KEYPOINTS, 3), np.nan, dtype=np.float32)
+    decode = infer = 0.0
+    for i, data in enumerate(images):
+        t0 = time.perf_counter()
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        t1 = time.perf_counter()
+        decode += t1 - t0
+        if image is None:
+            continue
+        arr[i] = _infer(image)
+        infer += time.perf_counter() - t1
+    return arr, {
+        'queue_wait': (started_at - submitted_at) * 1000,
+        'decode': decode * 1000,
+        'inference': infer * 1000,
+    }
+
+
+def _estimate_clip(path, max_frames, submitted_at):
+    """
+    작업 프로세스: 영상 파일 → (n, K, 3) 배열, 타임스탬프(초), 단계별 시간(ms)
+    영상은 순서대로 디코딩해야 하므로 한 작업 프로세스가 통째로 처리
+    """
+    import cv2
+
+    started_at = time.time()
+    capture = cv2.VideoCapture(path)
+    frames = []
+    timestamps = []
+    decode = infer = 0.0
+    try:
+        while len(frames) < max_frames:
+            t0 = time.perf_counter()
+            ok, image = capture.read()
+            t1 = time.perf_counter()
+            if not ok:
+                break
+            decode += t1 - t0
+            timestamps.append(capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0)
+            frames.append(_infer(image))
+            infer += time.perf_counter() - t1
+    finally:
+        capture.release()
+
+    arr = np.stack(frames) if frames else np.empty((0, NUM_KEYPOINTS, 3), dtype=np.float32)
+    return arr, timestamps, {
+        'queue_wait': (started_at - submitted_at) * 1000,
+        'decode': decode * 1000,
+        'inference': infer * 1000,
+    }
+
+
+def extract_segment(path, start, end, sample_fps):
+    """
+    작업 프로세스: 영상의 [start, end) 구간을 스트림으로 디코딩하면서 sample_fps 간격 프레임만 추정
+    (grab 으로 건너뛰고 샘플 프레임만 retrieve) → (타임스탬프 (n,), (n, K, 3)) float32
+    """
+    import cv2
+
+    capture = cv2.VideoCapture(path)
+    interval = 1.0 / sample_fps
+    next_time = start
+    timestamps = []
+    frames = []
+    try:
+        if start > 0:
+            capture.set(cv2.CAP_PROP_POS_MSEC, start * 1000)
+        while capture.grab():
+            t = capture.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            if t >= end:
+                break
+            if t < next_time:
+                continue
+            ok, image = capture.retrieve()
+            if not ok:
+                continue
+            timestamps.append(t)
+            frames.append(_infer(image))
+            next_time += interval
+            if next_time <= t:
+                next_time = t + interval
+    finally:
+        capture.release()
+
+    arr = np.stack(frames) if frames else np.empty((0, NUM_KEYPOINTS, 3), dtype=np.float32)
+    return np.array(timestamps, dtype=np.float32), arr
+
+
+def create_worker_pool(workers, model_complexity=1, min_detection_confidence=0.5):
+    """모델을 미리 로드하는 작업 프로세스 풀 (웹 서버 스레드 상태를 복제하지 않도록 spawn 사용)"""
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(model_complexity, min_detection_confidence),
+    )
+    # 작업 프로세스는 필요할 때 하나씩 생기므로, 동시에 작업을 넣어 모두 미리 띄우고 모델을 로드
+    for _ in range(workers):
+        executor.submit(_warm_up)
+    return executor
+
+
+# ========== 웹 프로세스 ==========
+
+class PoseEstimatorPool:
+    """MediaPipe 작업 프로세스 풀 + 처리 중인 묶음 수 제한"""
+
+    def __init__(self, workers=2, batch_size=8, max_queue=32, timeout=30.0,
+                 model_complexity=1, min_detection_confidence=0.5):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.model_complexity = model_complexity
+        self.min_detection_confidence = min_detection_confidence
+
+        self._executor = None
+        self._lock = threading.Lock()
+        self.in_flight = 0  # 제출했지만 끝나지 않은 묶음 수
+
+        # 카운터
+        self.requests = 0
+        self.rejected = 0
+        self.frames = 0
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            workers=getattr(settings, 'POSE_ESTIMATION_WORKERS', 2),
+            batch_size=getattr(settings, 'POSE_ESTIMATION_BATCH_SIZE', 8),
+            max_queue=getattr(settings, 'POSE_ESTIMATION_MAX_QUEUE', 32),
+            timeout=getattr(settings, 'POSE_ESTIMATION_TIMEOUT', 30.0),
+            model_complexity=getattr(settings, 'POSE_ESTIMATION_MODEL_COMPLEXITY', 1),
+            min_detection_confidence=getattr(settings, 'POSE_ESTIMATION_MIN_CONFIDENCE', 0.5),
+        )
+
+    @staticmethod
+    def is_available():
+        return all(importlib.util.find_spec(name) is not None for name in ('cv2', 'mediapipe'))
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                if not self.is_available():
+                    raise EstimatorUnavailable('opencv-python, mediapipe 가 설치되어 있지 않습니다')
+                self._executor = create_worker_pool(
+                    self.workers, self.model_complexity, self.min_detection_confidence
+                )
+            return self._executor
+
+    def _reserve(self, count):
+        with self._lock:
+            if self.in_flight + count > self.max_queue:
+                self.rejected += 1
+                raise EstimatorBusy(f'포즈 추정 대기열이 가득 찼습니다 ({self.in_flight}/{self.max_queue})')
+            self.in_flight += count
+            self.requests += 1
+
+    def _release(self, count, frames):
+        with self._lock:
+            self.in_flight -= count
+            self.frames += frames
+
+    def _job_done(self, future):
+        """묶음이 실제로 끝났을 때(완료, 실패, 취소) 자리 반환 - 시간 초과로 응답한 뒤에도 실행 중이면 계속 차지"""
+        frames = 0
+        if not future.cancelled() and future.exception() is None:
+            frames = len(future.result()[0])
+        self._release(1, frames)
+
+    def _run(self, jobs, on_done=None):
+        """
+        (함수, 인자) 목록 제출 → 결과 리스트 (입력 순서)
+        on_done(future): 묶음마다 한 번, 작업이 실제로 끝났을 때 호출 (시간 초과로 먼저 응답해도 작업이 끝날 때까지 기다림)
+        제출하지 못한 묶음은 future 없이(None) 바로 호출 - 작업이 읽는 임시 파일 정리용
+        """
+        try:
+            executor = self._get_executor()
+            self._reserve(len(jobs))
+        except Exception:
+            if on_done is not None:
+                for _ in jobs:
+                    on_done(None)
+            raise
+        futures = []
+        try:
+            submitted_at = time.time()
+            for fn, *args in jobs:
+                future = executor.submit(fn, *args, submitted_at)
+                future.add_done_callback(self._job_done)
+                if on_done is not None:
+                    future.add_done_callback(on_done)
+                futures.append(future)
+            return [future.result(timeout=self.timeout) for future in futures]
+        except BrokenProcessPool as e:
+            # 작업 프로세스가 죽으면 (모델 로드 실패 등) 다음 요청에서 풀을 새로 만듦
+            self.shutdown()
+            raise EstimatorUnavailable(f'포즈 추정 작업 프로세스 오류: {e}')
+        except Exception as e:
+            # 아직 시작하지 않은 묶음만 취소됨 (실행 중인 묶음은 끝날 때까지 자리 유지)
+            for future in futures:
+                future.cancel()
+            if isinstance(e, FutureTimeoutError):
+                raise EstimatorUnavailable(f'포즈 추정 시간 초과 ({self.timeout}초)')
+            raise EstimatorUnavailable(f'포즈 추정 실패: {e}')
+        finally:
+            # 제출하지 못한 묶음의 자리는 바로 반환
+            if len(futures) < len(jobs):
+                self._release(len(jobs) - len(futures), 0)
+                if on_done is not None:
+                    for _ in range(len(jobs) - len(futures)):
+                        on_done(None)
+
+    @staticmethod
+    def _merge_timings(timings):
+        """묶음별 시간 합치기 (대기 시간은 최댓값, 나머지는 합)"""
+        merged = {'queue_wait': 0.0, 'decode': 0.0, 'inference': 0.0}
+        for timing in timings:
+            merged['queue_wait'] = max(merged['queue_wait'], timing['queue_wait'])
+            merged['decode'] += timing['decode']
+            merged['inference'] += timing['inference']
+        return merged
+
+    def estimate_images(self, images):
+        """JPEG 바이트 리스트 → ((N, K, 3) float32 배열, 단계별 시간 ms)"""
+        chunks = [images[i:i + self.batch_size] for i in range(0, len(images), self.batch_size)]
+        results = self._run([(_estimate_images, chunk) for chunk in chunks])
+        arr = np.concatenate([result[0] for result in results])
+        return arr, self._merge_timings(result[1] for result in results)
+
+    def estimate_clip(self, fileobj, max_frames):
+        """영상 파일 객체 → ((N, K, 3) float32 배열, 타임스탬프 리스트, 단계별 시간 ms)"""
+        suffix = os.path.splitext(getattr(fileobj, 'name', '') or '')[1] or '.mp4'
+        # cv2.VideoCapture 는 파일 경로가 필요하므로 임시 파일로 저장
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+            for chunk in fileobj.chunks() if hasattr(fileobj, 'chunks') else [fileobj.read()]:
+                tmp.write(chunk)
+        # 시간 초과로 먼저 응답해도 작업 프로세스는 파일을 계속 읽으므로, 작업이 실제로 끝났을 때 삭제
+        (arr, timestamps, timing), = self._run(
+            [(_estimate_clip, tmp.name, max_frames)], on_done=lambda future: _remove_file(tmp.name)
+        )
+        return arr, timestamps, self._merge_timings([timing])
+
+    def stats(self):
+        with self._lock:
+            return {
+                'available': self.is_available(),
+                'workers': self.workers,
+                'batch_size': self.batch_size,
+                'in_flight': self.in_flight,
+                'max_queue': self.max_queue,
+                'requests': self.requests,
+                'rejected': self.rejected,
+                'frames': self.frames,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+def _remove_file(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_estimator_pool():
+    """프로세스 전역 PoseEstimatorPool (처음 사용할 때 생성, 작업 프로세스는 첫 요청 때 시작)"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoseEstimatorPool.from_settings()
+    return _pool
@@ -0,0 +1,236 @@
+"""
+실시간 포즈 피드백 스트리밍 (Socket.IO)
+
+HTTP로 프레임마다 pose/submit/ 을 호출하면 매번 JWT 인증, 미들웨어, 요청 생성 비용이 든다.
+이 채널은 연결 시 한 번만 인증하고, 같은 연결로 키포인트 프레임을 계속 받아 피드백을 돌려준다.
+
+실행:
+    uvicorn testemo.asgi:application
+
+클라이언트 (socket.io-client):
+    const socket = io('http://127.0.0.1:8000/pose', {
+        auth: {token: '<access token>', session_id: 1, exercise_type: 'neck_left'},
+    });
+    socket.emit('frame', {timestamp: 0.05, keypoints: [...]});
+    socket.on('feedback', ({timestamp, feedback}) => { ... });
+
+feedback.phase 에는 운동 단계 ({name, previous, reps, hold_seconds}) 가 들어 있다 (previous: 이 프레임에서 바뀐 경우 직전 단계).
+
+auth 에 video_id 를 주면 그 영상의 전문가 포즈 궤적과 증분 DTW 로 비교해
+POSE_ALIGNMENT_EMIT_FRAMES 프레임마다 'alignment' 이벤트 ({track, frames, expert_timestamp, score}) 를 보낸다.
+auth 에 nearest: k 를 주면 'feedback' 이벤트에 가장 가까운 전문가 템플릿 k 개 (nearest) 를 함께 보낸다.
+auth 에 classify: true 를 주면 'feedback' 이벤트에 활성 ML 모델의 자세 분류 (classification) 를 함께 보낸다
+(여러 연결의 프레임을 inference_batcher 가 모아 한 번에 예측).
+"""
+
+import asyncio
+import logging
+
+import socketio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .models import WorkoutSession, PoseFrame, ExpertPoseTrack
+from .pose_buffer import get_pose_buffer, is_write_behind
+from .session_state import session_ingest, get_ingest_policy
+from .session_summary import is_summary_due, has_evicted_summaries, flush_session_summary, flush_summary_if_due
+from .feedback import DEFAULT_EXERCISE, is_supported_exercise
+from .sequence_alignment import IncrementalAlignment
+from .template_index import get_template_indexes, nearest_templates
+from .inference_batcher import get_inference_scheduler, submit_classification
+from .model_registry import get_model_registry
+
+logger = logging.getLogger(__name__)
+_jwt_auth = JWTAuthentication()
+
+
+class PoseStream:
+    """연결 1개(= 운동 세션 1개)의 스트리밍 상태"""
+    __slots__ = (
+        'session_id', 'sports_id', 'exercise_type', 'policy', 'pending', 'alignment', 'nearest', 'classify'
+    )
+
+    def __init__(self, session_id, sports_id, exercise_type, policy, alignment=None, nearest=0, classify=False):
+        self.session_id = session_id
+        self.sports_id = sports_id
+        self.exercise_type = exercise_type
+        self.policy = policy  # 프레임 저장 정책 (연결 시 한 번 조회)
+        self.pending = []  # 아직 저장하지 않은 PoseFrame
+        self.alignment = alignment  # 전문가 궤적 증분 DTW (video_id 를 준 경우)
+        self.nearest = nearest  # 함께 보낼 최근접 템플릿 수 (0 이면 보내지 않음)
+        self.classify = classify  # ML 자세 분류를 함께 보낼지
+
+
+@sync_to_async
+def _authenticate(raw_token, session_id):
+    """JWT 검증 후 본인의 진행 중인 세션 반환"""
+    validated_token = _jwt_auth.get_validated_token(raw_token)
+    user = _jwt_auth.get_user(validated_token)
+    return WorkoutSession.objects.get(id=session_id, user=user, end_time__isnull=True)
+
+
+@sync_to_async
+def _load_alignment(video_id):
+    track = ExpertPoseTrack.objects.get(video_id=video_id)
+    return IncrementalAlignment(track, getattr(settings, 'POSE_ALIGNMENT_WINDOW_SECONDS', 5.0))
+
+
+def _get_raw_token(environ, auth):
+    """auth 페이로드의 token 또는 Authorization 헤더에서 토큰 추출"""
+    if auth and auth.get('token'):
+        return auth['token']
+    header = environ.get('HTTP_AUTHORIZATION', '')
+    parts = header.split()
+    if len(parts) == 2 and parts[0] == 'Bearer':
+        return parts[1]
+    return None
+
+
+class PoseStreamNamespace(socketio.AsyncNamespace):
+    """/pose 네임스페이스: 세션 단위 포즈 스트리밍"""
+
+    def __init__(self, namespace='/pose'):
+        super().__init__(namespace)
+        self.streams = {}  # sid -> PoseStream
+
+    async def on_connect(self, sid, environ, auth=None):
+        auth = auth or {}
+        raw_token = _get_raw_token(environ, auth)
+        if not raw_token or not auth.get('session_id'):
+            raise socketio.exceptions.ConnectionRefusedError('토큰과 session_id가 필요합니다.')
+
+        try:
+            session = await _authenticate(raw_token, auth['session_id'])
+        except AuthenticationFailed:
+            raise socketio.exceptions.ConnectionRefusedError('인증에 실패했습니다.')
+        except (WorkoutSession.DoesNotExist, ValueError):
+            raise socketio.exceptions.ConnectionRefusedError('진행 중인 세션을 찾을 수 없습니다.')
+
+        exercise_type = auth.get('exercise_type', DEFAULT_EXERCISE)
+        if not is_supported_exercise(exercise_type):
+            raise socketio.exceptions.ConnectionRefusedError(f'지원하지 않는 운동 타입입니다: {exercise_type}')
+
+        alignment = None
+        if auth.get('video_id'):
+            try:
+                alignment = await _load_alignment(auth['video_id'])
+            except (ExpertPoseTrack.DoesNotExist, ValueError):
+                raise socketio.exceptions.ConnectionRefusedError('전문가 포즈 궤적이 없는 영상입니다.')
+
+        try:
+            nearest = int(auth.get('nearest', 0))
+        except (TypeError, ValueError):
+            nearest = -1
+        if not 0 <= nearest <= getattr(settings, 'POSE_TEMPLATE_NEAREST_MAX', 20):
+            raise socketio.exceptions.ConnectionRefusedError('nearest가 허용 범위를 벗어났습니다.')
+        if nearest:
+            # 인덱스를 미리 만들어 프레임 처리 중 DB 조회가 없도록 함
+            await sync_to_async(get_template_indexes().get)(session.sports_id)
+
+        classify = bool(auth.get('classify'))
+        if classify and await sync_to_async(get_model_registry().get)(session.sports_id) is None:
+            raise socketio.exceptions.ConnectionRefusedError('활성화된 ML 모델이 없습니다.')
+
+        self.streams[sid] = PoseStream(
+            session.id, session.sports_id, exercise_type, get_ingest_policy(session), alignment, nearest, classify
+        )
+
+    async def on_exercise(self, sid, data):
+        """스트리밍 도중 운동 타입 변경: {exercise_type: 'neck_right'}"""
+        stream = self.streams.get(sid)
+        if stream is None or not isinstance(data, dict):
+            return
+        exercise_type = data.get('exercise_type')
+        if not is_supported_exercise(exercise_type):
+            await self.emit('error', {'error': f'지원하지 않는 운동 타입입니다: {exercise_type}'}, to=sid)
+            return
+        stream.exercise_type = exercise_type
+
+    async def on_frame(self, sid, data):
+        """프레임 1개 수신: {timestamp, keypoints} → 'feedback' 이벤트로 응답"""
+        stream = self.streams.get(sid)
+        if stream is None:
+            return
+
+        try:
+            timestamp = float(data['timestamp'])
+            keypoints = data['keypoints']
+            if not isinstance(keypoints, list):
+                raise TypeError('keypoints')
+        except (KeyError, TypeError, ValueError):
+            await self.emit('error', {'error': 'timestamp, keypoints 형식이 올바르지 않습니다.'}, to=sid)
+            return
+
+        feedback, keep = session_ingest(
+            stream.session_id, stream.policy, keypoints, stream.exercise_type, timestamp
+        )
+        message = {'timestamp': timestamp, 'feedback': feedback}
+        if stream.nearest:
+            message['nearest'] = await self.find_nearest(stream, keypoints)
+        if stream.classify:
+            message['classification'] = await self.classify(stream, keypoints)
+        await self.emit('feedback', message, to=sid)
+        if stream.alignment is not None:
+            state = stream.alignment.push(timestamp, keypoints)
+            if state['frames'] % getattr(settings, 'POSE_ALIGNMENT_EMIT_FRAMES', 10) == 0:
+                await self.emit('alignment', state, to=sid)
+        if is_summary_due(stream.session_id) or has_evicted_summaries():
+            await sync_to_async(flush_summary_if_due)(stream.session_id)
+        if not keep:
+            return
+
+        stream.pending.append(PoseFrame.from_keypoints(
+            keypoints,
+            session_id=stream.session_id,
+            timestamp=timestamp,
+            feedback=feedback,
+        ))
+        if len(stream.pending) >= getattr(settings, 'POSE_STREAM_FLUSH_FRAMES', 60):
+            await self.flush(stream)
+
+    async def find_nearest(self, stream, keypoints):
+        """최근접 템플릿 (인덱스가 만료된 경우에만 스레드에서 다시 생성)"""
+        try:
+            if get_template_indexes().is_fresh(stream.sports_id):
+                return nearest_templates(stream.sports_id, keypoints, k=stream.nearest)
+            return await sync_to_async(nearest_templates)(stream.sports_id, keypoints, k=stream.nearest)
+        except ValueError:
+            return []
+
+    async def classify(self, stream, keypoints):
+        """ML 자세 분류 (배치 스케줄러 결과를 이벤트 루프를 막지 않고 기다림)"""
+        try:
+            future = submit_classification(stream.sports_id, keypoints)
+            return await asyncio.wait_for(asyncio.wrap_future(future), get_inference_scheduler().timeout)
+        except ValueError:
+            return None
+        except Exception as e:
+            # 시간 초과나 예측 실패로 프레임 저장까지 건너뛰지 않도록 분류 결과만 None
+            logger.warning('자세 분류 실패 (session=%s): %s', stream.session_id, e)
+            return None
+
+    async def on_disconnect(self, sid, *args):
+        stream = self.streams.pop(sid, None)
+        if stream is not None:
+            await self.flush(stream)
+            await sync_to_async(flush_session_summary)(stream.session_id)
+
+    async def flush(self, stream):
+        """모아둔 프레임을 bulk_create 한 번으로 저장"""
+        if not stream.pending:
+            return
+        pending, stream.pending = stream.pending, []
+        if is_write_behind():
+            # 이벤트 루프를 막지 않도록 대기 없이 넣기
+            get_pose_buffer().put_many(pending, timeout=0)
+        else:
+            await sync_to_async(PoseFrame.objects.bulk_create)(pending)
+
+
+sio = socketio.AsyncServer(
+    async_mode='asgi',
+    cors_allowed_origins=getattr(settings, 'CORS_ALLOWED_ORIGINS', []),
+)
+sio.register_namespace(PoseStreamNamespace('/pose'))
@@ -0,0 +1,309 @@
+"""
+세션 포즈 시계열 ↔ 전문가 궤적(ExpertPoseTrack) 비교 (DTW)
+
+calculate_similarity 는 자세 1개끼리만 비교한다. 여기서는 프레임별 자세 특징을 시계열로 보고
+동적 시간 워핑(DTW)으로 정렬해 전체 정렬 점수와 가장 어긋난 구간을 구한다.
+- 특징: 어깨 중심 기준 좌표를 어깨 너비로 나눈 값 (위치/크기 무관, 누락 키포인트는 NaN)
+- 프레임 간 거리: 양쪽 모두 있는 좌표의 RMS 차이 (겹치는 좌표가 없으면 MISSING_COST)
+- Sakoe-Chiba 밴드: 세션 프레임마다 전문가 궤적의 2 * radius + 1 개 프레임만 계산 → O(N * 밴드 폭)
+- 한 행의 누적 비용은 최소값 누적(np.minimum.accumulate)으로 한 번에 계산 (열 방향 파이썬 반복 없음)
+
+일괄: compare_session(session, track) - 저장된 세션 전체 (점수 + 어긋난 구간)
+증분: IncrementalAlignment - 프레임이 들어올 때마다 한 행씩 갱신 (마지막 행만 보관, 현재 전문가 진행 위치 + 근사 점수)
+"""
+
+import numpy as np
+
+from .keypoints import LEFT_SHOULDER, NUM_KEYPOINTS, RIGHT_SHOULDER, keypoints_to_array
+
+# 겹치는 좌표가 없는 프레임 쌍의 거리 (어깨 너비 단위)
+MISSING_COST = 1.0
+DEFAULT_WINDOW_SECONDS = 5.0
+DEFAULT_SEGMENT_SECONDS = 3.0
+DEFAULT_TOP_SEGMENTS = 3
+# 밴드 계산 시 한 번에 처리하는 세션 프레임 수 (메모리: block * 밴드 폭 * 특징 수)
+BLOCK_ROWS = 1024
+# 블록 하나의 최대 원소 수 (float64 약 16MB), 밴드가 넓으면 블록 행 수를 줄임
+BLOCK_ELEMENTS = 2 * 1024 * 1024
+
+
+def _block_rows(width, n_features):
+    return max(1, min(BLOCK_ROWS, BLOCK_ELEMENTS // max(width * n_features, 1)))
+
+
+def pose_descriptors(keypoints):
+    """(N, K, 3) 키포인트 배열 → (N, 2K) 특징 (어깨 중심 기준, 어깨 너비로 나눈 x/y, 어깨가 없으면 전부 NaN)"""
+    xy = np.asarray(keypoints, dtype=np.float64)[..., :2]
+    left = xy[:, LEFT_SHOULDER]
+    right = xy[:, RIGHT_SHOULDER]
+    center = (left + right) / 2
+    width = np.hypot(*(left - right).T)
+    width = np.where(width > 1e-6, width, np.nan)
+    return ((xy - center[:, None, :]) / width[:, None, None]).reshape(len(xy), -1)
+
+
+def band_costs(features, reference, lo, width):
+    """
+    features (n, F) 의 행 i 와 reference[lo[i]: lo[i] + width] 사이 거리 → (n, width)
+    reference 범위를 넘는 칸은 inf
+    """
+    idx = lo[:, None] + np.arange(width)
+    in_range = idx < len(reference)
+    diff = reference[np.minimum(idx, len(reference) - 1)] - features[:, None, :]
+    diff *= diff
+    valid = ~np.isnan(diff)
+    count = valid.sum(axis=2)
+    total = np.where(valid, diff, 0.0).sum(axis=2)
+    costs = np.where(count > 0, np.sqrt(total / np.maximum(count, 1)), MISSING_COST)
+    costs[~in_range] = np.inf
+    return costs
+
+
+class BandDTW:
+    """
+    행(세션 프레임) 단위로 누적 비용을 갱신하는 밴드 DTW
+    행 i 는 전문가 프레임 [lo_i, lo_i + width) 만 계산하며 lo 는 감소하지 않아야 한다
+    keep_history=True 면 모든 행을 보관해 경로 역추적(path)이 가능
+    """
+
+    def __init__(self, reference_length, width, keep_history=True):
+        self.reference_length = reference_length
+        self.width = min(width, reference_length)
+        self.keep_history = keep_history
+
+        self.rows = 0
+        self.lo = None    # 마지막 행의 시작 열
+        self.last = None  # 마지막 행의 누적 비용 (width,)
+        self._lo_history = []
+        self._cost_history = []
+        self._total_history = []
+
+    def clamp_lo(self, lo):
+        """경로가 끊기지 않도록 시작 열 보정 (감소 금지, 이전 행과 한 칸 이상 겹침)"""
+        lo = min(max(int(lo), 0), self.reference_length - self.width)
+        if self.lo is not None:
+            lo = min(max(lo, self.lo), self.lo + self.width - 1)
+        return lo
+
+    def push(self, costs, lo):
+        """한 행 추가: costs (width,) = 전문가 프레임 [lo, lo + width) 와의 거리"""
+        width = self.width
+        if self.last is None:
+            # 시작 칸 (0, 0) 만 앞 행이 있는 것으로 취급
+            before = np.full(width, np.inf)
+            if lo == 0:
+                before[0] = 0.0
+        else:
+            # before[k] = min(D[i-1, j-1], D[i-1, j]),  j = lo + k
+            shift = lo - self.lo
+            prev = np.full(width + 1, np.inf)  # 열 lo-1 .. lo+width-1
+            src_start = max(shift - 1, 0)
+            dst_start = max(1 - shift, 0)
+            n = max(min(width - src_start, width + 1 - dst_start), 0)
+            prev[dst_start:dst_start + n] = self.last[src_start:src_start + n]
+            before = np.minimum(prev[:-1], prev[1:])
+
+        # D[j] = c[j] + min(before[j], D[j-1])  →  S[j] + min_{k<=j}(before[k] - S[k-1])  (S: c 의 누적합)
+        total = np.full(width, np.inf)
+        valid = np.isfinite(costs)
+        n_valid = int(valid.sum())
+        if n_valid:
+            c = costs[:n_valid]
+            cumulative = np.cumsum(c)
+            total[:n_valid] = cumulative + np.minimum.accumulate(before[:n_valid] - (cumulative - c))
+
+        self.lo = lo
+        self.last = total
+        self.rows += 1
+        if self.keep_history:
+            self._lo_history.append(lo)
+            self._cost_history.append(costs)
+            self._total_history.append(total)
+        return total
+
+    def path(self, end=None):
+        """(0, 0) 부터 (마지막 행, end) 까지의 최적 경로 [(i, j), ...] (keep_history 필요)"""
+        lo = self._lo_history
+        totals = self._total_history
+        width = self.width
+
+        def value(i, j):
+            k = j - lo[i]
+            return totals[i][k] if i >= 0 and 0 <= k < width else np.inf
+
+        i = self.rows - 1
+        j = self.reference_length - 1 if end is None else end
+        path = [(i, j)]
+        while i > 0 or j > 0:
+            candidates = ((value(i - 1, j - 1), i - 1, j - 1), (value(i - 1, j), i - 1, j), (value(i, j - 1), i, j - 1))
+            _, i, j = min(candidates, key=lambda candidate: candidate[0])
+            path.append((i, j))
+        path.reverse()
+        return path
+
+    def best_end(self):
+        """마지막 행에서 경로 길이로 나눈 누적 비용이 가장 작은 열 (경로 길이는 max(i, j) + 1 로 근사)"""
+        columns = self.lo + np.arange(len(self.last))
+        normalized = self.last / (np.maximum(columns, self.rows - 1) + 1)
+        return int(columns[np.argmin(normalized)])
+
+    def cost_at(self, i, j):
+        return self._cost_history[i][j - self._lo_history[i]]
+
+
+def _diagonal_lo(n, m, radius, width):
+    """세션 길이 n, 전문가 길이 m 의 대각선 중심 밴드 시작 열 (N,)"""
+    centers = np.round(np.arange(n) * ((m - 1) / max(n - 1, 1))).astype(int)
+    return np.clip(centers - radius, 0, m - width)
+
+
+def align_sequences(features, reference, radius):
+    """
+    전체 시계열 DTW (대각선 기준 Sakoe-Chiba 밴드, 세션 끝에 맞는 전문가 위치는 자유롭게)
+    반환값: (평균 경로 비용, 경로 [(세션 i, 전문가 j), ...], 경로 칸별 거리 (len(path),))
+    """
+    n, m = len(features), len(reference)
+    # 세션이 전문가 궤적보다 짧으면 대각선이 한 행에 여러 열을 건너뛰므로 그만큼 밴드를 넓힘
+    slope = (m - 1) / max(n - 1, 1)
+    dtw = BandDTW(m, max(2 * radius + 1, int(np.ceil(slope)) + 2))
+    lo = _diagonal_lo(n, m, radius, dtw.width)
+    block_rows = _block_rows(dtw.width, features.shape[1])
+    for start in range(0, n, block_rows):
+        block_lo = lo[start:start + block_rows]
+        costs = band_costs(features[start:start + block_rows], reference, block_lo, dtw.width)
+        for row_costs, row_lo in zip(costs, block_lo):
+            dtw.push(row_costs, int(row_lo))
+
+    # 끝은 열어 둠 (open-end): 영상을 끝까지 따라 하지 않은 세션도 한 만큼만 비교
+    end = dtw.best_end()
+    path = dtw.path(end)
+    path_costs = np.array([dtw.cost_at(i, j) for i, j in path])
+    return float(path_costs.mean()), path, path_costs
+
+
+def worst_segments(path, path_costs, timestamps, reference_timestamps,
+                   segment_seconds=DEFAULT_SEGMENT_SECONDS, top=DEFAULT_TOP_SEGMENTS):
+    """세션 프레임별 정렬 비용으로 segment_seconds 길이 구간 중 평균 비용이 큰 순서로 겹치지 않게 top 개"""
+    rows = np.array([i for i, _ in path])
+    cols = np.array([j for _, j in path])
+    n = len(timestamps)
+    frame_cost = np.bincount(rows, weights=path_costs, minlength=n) / np.maximum(np.bincount(rows, minlength=n), 1)
+
+    # 구간 끝 = 시작 시각 + segment_seconds 이내 마지막 프레임
+    ends = np.searchsorted(timestamps, timestamps + segment_seconds, side='right')
+    cumulative = np.concatenate([[0.0], np.cumsum(frame_cost)])
+    means = (cumulative[ends] - cumulative[np.arange(n)]) / (ends - np.arange(n))
+
+    # 세션 끝에 걸려 segment_seconds 보다 짧은 구간은 제외 (세션 전체가 짧으면 첫 구간만)
+    full = np.flatnonzero(timestamps + segment_seconds <= timestamps[-1]) if n else np.array([], dtype=int)
+    candidates = full if len(full) else np.array([0])
+
+    segments = []
+    taken = np.zeros(n, dtype=bool)
+    for start in candidates[np.argsort(-means[candidates], kind='stable')]:
+        end = ends[start]
+        if taken[start:end].any():
+            continue
+        taken[start:end] = True
+        matched = cols[(rows >= start) & (rows < end)]
+        segments.append({
+            'start': round(float(timestamps[start]), 3),
+            'end': round(float(timestamps[end - 1]), 3),
+            'expert_start': round(float(reference_timestamps[matched.min()]), 3),
+            'expert_end': round(float(reference_timestamps[matched.max()]), 3),
+            'cost': round(float(means[start]), 4),
+        })
+        if len(segments) >= top:
+            break
+    return segments
+
+
+def alignment_score(mean_cost):
+    """평균 거리 → 0~1 점수 (calculate_similarity 와 같은 변환)"""
+    return 1 / (1 + mean_cost)
+
+
+def _radius(track, window_seconds):
+    return max(int(round(window_seconds * track.sample_fps)), 1)
+
+
+def compare_arrays(timestamps, keypoints, track, window_seconds=DEFAULT_WINDOW_SECONDS,
+                   segment_seconds=DEFAULT_SEGMENT_SECONDS, top=DEFAULT_TOP_SEGMENTS):
+    """세션 배열 (timestamps (N,), keypoints (N, K, 3)) ↔ ExpertPoseTrack 비교 결과 (프레임이 없으면 None)"""
+    reference_timestamps, reference_keypoints = track.get_arrays()
+    if not len(timestamps) or not len(reference_timestamps):
+        return None
+
+    features = pose_descriptors(keypoints)
+    reference = pose_descriptors(reference_keypoints)
+    mean_cost, path, path_costs = align_sequences(features, reference, _radius(track, window_seconds))
+    return {
+        'track': track.id,
+        'frames': len(timestamps),
+        'expert_frames': len(reference_timestamps),
+        'expert_end': round(float(reference_timestamps[path[-1][1]]), 3),  # 세션 끝과 정렬된 전문가 시각
+        'score': round(alignment_score(mean_cost), 4),
+        'mean_cost': round(mean_cost, 4),
+        'worst_segments': worst_segments(
+            path, path_costs, np.asarray(timestamps, dtype=np.float64), reference_timestamps,
+            segment_seconds=segment_seconds, top=top,
+        ),
+    }
+
+
+def compare_session(session, track, **kwargs):
+    """저장된 세션 전체 ↔ 전문가 궤적 (압축/보관 여부와 관계없음)"""
+    from .session_frames import load_session_arrays
+
+    timestamps, keypoints, _ = load_session_arrays(session)
+    return compare_arrays(timestamps, keypoints, track, **kwargs)
+
+
+class IncrementalAlignment:
+    """
+    실시간 스트림용 증분 DTW
+    밴드 중심은 세션 경과 시간과 같은 시각의 전문가 프레임 (영상을 따라 하는 속도가 같다고 가정, radius 만큼 허용)
+    마지막 행만 보관하므로 메모리는 세션 길이와 무관
+    """
+
+    def __init__(self, track, window_seconds=DEFAULT_WINDOW_SECONDS):
+        self.track_id = track.id
+        self.reference_timestamps, reference_keypoints = track.get_arrays()
+        if not len(self.reference_timestamps):
+            raise ValueError('전문가 포즈 궤적에 프레임이 없습니다')
+        self.reference = pose_descriptors(reference_keypoints)
+        self.radius = _radius(track, window_seconds)
+        self.dtw = BandDTW(len(self.reference), 2 * self.radius + 1, keep_history=False)
+        self.start = None
+
+    def push(self, timestamp, keypoints):
+        """프레임 1개 (키포인트 리스트) 반영 → 현재 상태 dict"""
+        if self.start is None:
+            self.start = timestamp
+        center = int(np.searchsorted(self.reference_timestamps, timestamp - self.start))
+        lo = self.dtw.clamp_lo(0 if self.dtw.rows == 0 else center - self.radius)
+        try:
+            frame = keypoints_to_array(keypoints)
+            if np.isinf(frame[:, :2]).any():
+                raise ValueError('키포인트 좌표 값이 올바르지 않습니다')
+        except ValueError:
+            # 형식이 잘못된 프레임 (keypoints_to_array 가 ValueError 로 바꿈)은 키포인트가 하나도 없는 것으로 처리
+            frame = np.full((NUM_KEYPOINTS, 3), np.nan)
+        features = pose_descriptors(frame[None])
+        costs = band_costs(features, self.reference, np.array([lo]), self.dtw.width)[0]
+        self.dtw.push(costs, lo)
+        return self.state()
+
+    def state(self):
+        """현재까지의 최적 끝 위치(전문가 시각)와 근사 점수 (경로 길이는 max(i, j) + 1 로 근사)"""
+        dtw = self.dtw
+        end = dtw.best_end()
+        total = dtw.last[end - dtw.lo]
+        if not np.isfinite(total):
+            return {'track': self.track_id, 'frames': dtw.rows, 'expert_timestamp': None, 'score': None}
+        return {
+            'track': self.track_id,
+            'frames': dtw.rows,
+            'expert_timestamp': round(float(self.reference_timestamps[end]), 3),
+            'score': round(alignment_score(float(total) / (max(end, dtw.rows - 1) + 1)), 4),
+        }
@@ -1,6 +1,10 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
 from .models import EmotionRecord, EmotionVideo, WorkoutSession, PoseFrame, Sports
+from .feedback import DEFAULT_EXERCISE, EXERCISE_TYPES
+from .session_state import INGEST_POLICY_KEYS
+from .session_summary import summary_report
 
 
 class EmotionVideoSerializer(serializers.ModelSerializer):
@@ -115,12 +119,20 @@ class EmotionRecordListSerializer(serializers.ModelSerializer):
 class WorkoutSessionSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
     sports_name = serializers.CharField(source='sports.name', read_only=True)
+    summary = serializers.SerializerMethodField()
 
     class Meta:
         model = WorkoutSession
-        fields = ['id', 'user', 'username', 'sports', 'sports_name', 'start_time', 'end_time', 'duration']
+        fields = [
+            'id', 'user', 'username', 'sports', 'sports_name', 'start_time', 'end_time', 'duration',
+            'ingest_policy', 'summary'
+        ]
         read_only_fields = ['id', 'user', 'start_time']
 
+    def get_summary(self, obj):
+        """품질 요약 (프레임이 없으면 None)"""
+        return summary_report(obj.summary)
+
     def validate_sports(self, value):
         """sports가 유효한 Sports 객체인지 확인"""
         if not value:
@@ -129,6 +141,17 @@ class WorkoutSessionSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("존재하지 않는 스포츠입니다.")
         return value
 
+    def validate_ingest_policy(self, value):
+        """프레임 저장 정책: min_delta, min_confidence (0 이상의 숫자)"""
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("저장 정책은 객체여야 합니다.")
+        for key, number in value.items():
+            if key not in INGEST_POLICY_KEYS:
+                raise serializers.ValidationError(f"알 수 없는 항목입니다: {key}")
+            if isinstance(number, bool) or not isinstance(number, (int, float)) or number < 0:
+                raise serializers.ValidationError(f"{key}는 0 이상의 숫자여야 합니다.")
+        return value
+
     def create(self, validated_data):
         user = self.context['request'].user
         validated_data['user'] = user
@@ -141,6 +164,56 @@ class PoseFrameSerializer(serializers.ModelSerializer):
         fields = ['id', 'session', 'timestamp', 'keypoints', 'feedback']
         read_only_fields = ['id', 'feedback']
 
+    keypoints = serializers.JSONField()
+
+    def validate_session(self, value):
+        """본인의 진행 중인 세션에만 저장 (종료된 세션은 요약이 확정된 뒤 바뀌지 않도록)"""
+        request = self.context.get('request')
+        if request and value.user_id != request.user.id:
+            raise serializers.ValidationError("본인의 운동 세션이 아닙니다.")
+        if value.end_time is not None:
+            raise serializers.ValidationError("이미 종료된 운동 세션입니다.")
+        return value
+
+    def create(self, validated_data):
+        pose_frame = PoseFrame.from_keypoints(**validated_data)
+        pose_frame.save()
+        return pose_frame
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # 저장 형식(JSON / packed)과 관계없이 키포인트 리스트로 반환
+        data['keypoints'] = instance.get_keypoints()
+        return data
+
+
+class PoseFrameItemSerializer(serializers.Serializer):
+    """배치 전송 시 프레임 1개 (세션은 배치 단위로 지정)"""
+    timestamp = serializers.FloatField()
+    keypoints = serializers.JSONField()
+
+
+class PoseFrameBatchSerializer(serializers.Serializer):
+    """한 세션의 포즈 프레임 여러 개를 한 번에 전송"""
+    session = serializers.PrimaryKeyRelatedField(queryset=WorkoutSession.objects.all())
+    exercise_type = serializers.ChoiceField(choices=EXERCISE_TYPES, required=False, default=DEFAULT_EXERCISE)
+    frames = PoseFrameItemSerializer(many=True, allow_empty=False)
+
+    def validate_session(self, value):
+        """본인 세션에만 프레임을 저장할 수 있음"""
+        request = self.context.get('request')
+        if request and value.user_id != request.user.id:
+            raise serializers.ValidationError("본인의 운동 세션이 아닙니다.")
+        if value.end_time is not None:
+            raise serializers.ValidationError("이미 종료된 운동 세션입니다.")
+        return value
+
+    def validate_frames(self, value):
+        max_frames = getattr(settings, 'POSE_BATCH_MAX_FRAMES', 300)
+        if len(value) > max_frames:
+            raise serializers.ValidationError(f"한 번에 최대 {max_frames}개 프레임까지 전송할 수 있습니다.")
+        return value
+
 
 class SportsSerializer(serializers.ModelSerializer):
     videos = EmotionVideoSerializer(many=True, read_only=True)
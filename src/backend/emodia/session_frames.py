@@ -0,0 +1,675 @@
+"""
+운동 세션 프레임 기록의 압축(compaction)과 조회
+
+세션이 끝나면 PoseFrame 행들을 세션당 하나의 컬럼형 .npz 파일로 합친다.
+    frame_ids   (N,)       int64
+    timestamps  (N,)       float64
+    keypoints   (N, K, 3)  float32 (KEYPOINT_NAMES 순서, 누락은 NaN)
+    status      (N,)       int8  (FEEDBACK_STATUS_CODES, 피드백 없음 -1)
+피드백 (형식 버전 2, version 항목)은 열로 나눠 저장한다.
+    has_warnings   (N,)     bool
+    messages       (N, M)   int16   message_texts 의 메시지 번호 (왼쪽 정렬, 빈 칸 -1)
+    message_texts  (bytes)  uint8   이 파일에 나온 메시지 문장 (JSON 문자열을 줄바꿈으로 연결)
+    angles         (N, A)   float64 angle_names 순서의 angles 값 (없으면 NaN)
+    angle_names    (bytes)  uint8   JSON 리스트
+    phase          (N, 2)   int8    운동 단계 name / previous (PHASE_NAMES 번호, 없으면 -1)
+    phase_reps     (N,)     int32
+    phase_hold     (N,)     float64
+    feedback_raw   (N,)     bool    열로 나타낼 수 없는 피드백 (corrections 가 있는 등) 은 True
+    feedback       (bytes)  uint8   feedback_raw 프레임의 피드백 JSON 만 줄바꿈으로 연결
+형식 버전 1 은 feedback 항목에 모든 프레임의 피드백 JSON 을 줄바꿈으로 연결해 두었고, 읽을 때는 두 형식을 모두 지원한다.
+압축 후 원본 행은 삭제한다 (FeedbackRating 이 달린 프레임은 남겨둠).
+
+보관 기간(POSE_ARCHIVE_AFTER_DAYS)이 지난 세션은 같은 형식의 .npz 를 월별 zip(POSE_ARCHIVE_DIR/YYYY-MM.zip)의
+session_<id>.npz 항목으로 옮기고, 세션별 파일과 남은 행을 지운다 (archive_pose_frames 명령어).
+    PoseFrame 행 → 세션별 .npz (frames_archive) → 월별 zip (frames_cold_archive)
+프레임 기록 조회는 iter_session_frames / load_session_arrays 를 통해 저장 형태와 관계없이 동일하게 한다.
+"""
+
+import contextlib
+import io
+import json
+import logging
+import os
+import threading
+import zipfile
+import zlib
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .feedback_batch import evaluate_batch
+from .keypoints import NUM_KEYPOINTS, PACKED_DTYPE, array_to_keypoints
+from .models import PoseFrame, WorkoutSession
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMAT_VERSION = 2
+FEEDBACK_STATUS_CODES = {'good': 0, 'warning': 1}
+FEEDBACK_STATUS_NAMES = {code: name for name, code in FEEDBACK_STATUS_CODES.items()}
+PHASE_NAMES = ('start', 'middle', 'peak', 'end')
+PHASE_CODES = {name: code for code, name in enumerate(PHASE_NAMES)}
+FEEDBACK_KEYS = frozenset(('status', 'messages', 'corrections', 'angles', 'has_warnings'))
+PHASE_KEYS = frozenset(('name', 'previous', 'reps', 'hold_seconds'))
+# 형식 버전 2 에서 프레임마다 읽는 피드백 열 (_FeedbackDecoder.decode 인자 순서)
+FEEDBACK_COLUMNS = ('status', 'has_warnings', 'messages', 'angles', 'phase', 'phase_reps', 'phase_hold', 'feedback_raw')
+
+
+def build_frames_archive(frames):
+    """PoseFrame iterable(타임스탬프 순) → .npz 바이트"""
+    frame_ids = []
+    timestamps = []
+    keypoints = []
+    status = []
+    feedbacks = []
+
+    for frame in frames:
+        frame_ids.append(frame.id)
+        timestamps.append(frame.timestamp)
+        keypoints.append(np.asarray(frame.keypoint_array(), dtype=PACKED_DTYPE))
+        feedback = frame.feedback
+        status.append(FEEDBACK_STATUS_CODES.get(feedback.get('status'), -1) if feedback else -1)
+        feedbacks.append(feedback)
+
+    return _pack_archive(frame_ids, timestamps, keypoints, status, feedbacks)
+
+
+def _is_phase_column(phase):
+    return (
+        isinstance(phase, dict) and phase.keys() == PHASE_KEYS
+        and phase['name'] in PHASE_CODES
+        and (phase['previous'] is None or phase['previous'] in PHASE_CODES)
+        and isinstance(phase['reps'], int) and not isinstance(phase['reps'], bool)
+        and isinstance(phase['hold_seconds'], float)
+    )
+
+
+def _is_column_feedback(feedback):
+    """피드백 dict 를 열로 그대로 나타낼 수 있는지 (다시 읽었을 때 같은 dict 가 되는 형식만)"""
+    if not isinstance(feedback, dict):
+        return False
+    keys = feedback.keys()
+    if not (keys == FEEDBACK_KEYS or (keys == FEEDBACK_KEYS | {'phase'} and _is_phase_column(feedback['phase']))):
+        return False
+    angles = feedback['angles']
+    return (
+        feedback['status'] in FEEDBACK_STATUS_CODES
+        and type(feedback['has_warnings']) is bool
+        and feedback['corrections'] == {}
+        and isinstance(feedback['messages'], list)
+        and all(isinstance(text, str) for text in feedback['messages'])
+        and isinstance(angles, dict)
+        and all(isinstance(value, float) and value == value for value in angles.values())
+    )
+
+
+def _feedback_columns(feedbacks):
+    """피드백 dict 리스트 → 형식 버전 2 의 피드백 열 (모듈 docstring 참고)"""
+    n = len(feedbacks)
+    message_codes = {}
+    angle_columns = {}
+    rows = []
+    raw_lines = []
+    raw = np.zeros(n, dtype=bool)
+    for i, feedback in enumerate(feedbacks):
+        if not _is_column_feedback(feedback):
+            raw[i] = True
+            raw_lines.append(json.dumps(feedback, ensure_ascii=False))
+            rows.append(None)
+            continue
+        rows.append(feedback)
+        for text in feedback['messages']:
+            message_codes.setdefault(text, len(message_codes))
+        for name in feedback['angles']:
+            angle_columns.setdefault(name, len(angle_columns))
+
+    width = max((len(feedback['messages']) for feedback in rows if feedback is not None), default=0)
+    has_warnings = np.zeros(n, dtype=bool)
+    messages = np.full((n, width), -1, dtype=np.int16)
+    angles = np.full((n, len(angle_columns)), np.nan, dtype=np.float64)
+    phase = np.full((n, 2), -1, dtype=np.int8)
+    phase_reps = np.zeros(n, dtype=np.int32)
+    phase_hold = np.zeros(n, dtype=np.float64)
+    for i, feedback in enumerate(rows):
+        if feedback is None:
+            continue
+        has_warnings[i] = feedback['has_warnings']
+        for j, text in enumerate(feedback['messages']):
+            messages[i, j] = message_codes[text]
+        for name, value in feedback['angles'].items():
+            angles[i, angle_columns[name]] = value
+        frame_phase = feedback.get('phase')
+        if frame_phase is not None:
+            previous = frame_phase['previous']
+            phase[i] = (PHASE_CODES[frame_phase['name']], -1 if previous is None else PHASE_CODES[previous])
+            phase_reps[i] = frame_phase['reps']
+            phase_hold[i] = frame_phase['hold_seconds']
+
+    return {
+        'has_warnings': has_warnings,
+        'messages': messages,
+        'message_texts': _encode_lines(json.dumps(text, ensure_ascii=False) for text in message_codes),
+        'angles': angles,
+        'angle_names': _encode_lines([json.dumps(list(angle_columns), ensure_ascii=False)]),
+        'phase': phase,
+        'phase_reps': phase_reps,
+        'phase_hold': phase_hold,
+        'feedback_raw': raw,
+        'feedback': _encode_lines(raw_lines),
+    }
+
+
+def _encode_lines(lines):
+    return np.frombuffer('\n'.join(lines).encode('utf-8'), dtype=np.uint8)
+
+
+def _decode_lines(array):
+    data = array.tobytes().decode('utf-8')
+    return data.split('\n') if data else []
+
+
+class _FeedbackDecoder:
+    """형식 버전 2 의 피드백 열 → 프레임별 피드백 dict (chunk 단위로 호출)"""
+
+    def __init__(self, message_texts, angle_names, raw_lines):
+        self.texts = [json.loads(line) for line in _decode_lines(message_texts)]
+        names = _decode_lines(angle_names)
+        self.angle_names = json.loads(names[0]) if names else []
+        self.raw_lines = raw_lines  # feedback_raw 프레임의 JSON 줄 iterator
+
+    def decode(self, status, has_warnings, messages, angles, phase, phase_reps, phase_hold, raw):
+        if raw:
+            return json.loads(next(self.raw_lines))
+        texts = self.texts
+        feedback = {
+            'status': FEEDBACK_STATUS_NAMES[int(status)],
+            'messages': [texts[code] for code in messages.tolist() if code >= 0],
+            'corrections': {},
+            'angles': {
+                name: value for name, value in zip(self.angle_names, angles.tolist()) if value == value
+            },
+            'has_warnings': bool(has_warnings),
+        }
+        name, previous = phase.tolist()
+        if name >= 0:
+            feedback['phase'] = {
+                'name': PHASE_NAMES[name],
+                'previous': PHASE_NAMES[previous] if previous >= 0 else None,
+                'reps': int(phase_reps),
+                'hold_seconds': float(phase_hold),
+            }
+        return feedback
+
+
+def _pack_archive(frame_ids, timestamps, keypoints, status, feedbacks):
+    """열별 값 → .npz 바이트 (keypoints: (K, 3) 배열 리스트 또는 (N, K, 3) 배열, feedbacks: 피드백 dict 리스트)"""
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        version=np.array(ARCHIVE_FORMAT_VERSION),
+        frame_ids=np.array(frame_ids, dtype=np.int64),
+        timestamps=np.array(timestamps, dtype=np.float64),
+        keypoints=(
+            np.stack(keypoints) if len(keypoints)
+            else np.empty((0, NUM_KEYPOINTS, 3), dtype=PACKED_DTYPE)
+        ),
+        status=np.array(status, dtype=np.int8),
+        **_feedback_columns(feedbacks),
+    )
+    return buffer.getvalue()
+
+
+def read_frames_archive(fileobj):
+    """.npz 파일 → 배열 딕셔너리 (feedback 은 프레임별 dict 리스트로 복원, 형식 버전 1/2)"""
+    with np.load(fileobj) as data:
+        arrays = {name: data[name] for name in data.files}
+    if int(arrays['version']) < 2:
+        raw_feedback = arrays['feedback'].tobytes().decode('utf-8')
+        arrays['feedback'] = (
+            [json.loads(line) for line in raw_feedback.split('\n')] if len(arrays['frame_ids']) else []
+        )
+        return arrays
+    decoder = _FeedbackDecoder(
+        arrays.pop('message_texts'), arrays.pop('angle_names'), iter(_decode_lines(arrays['feedback']))
+    )
+    arrays['feedback'] = [
+        decoder.decode(*values) for values in zip(*(arrays[name] for name in FEEDBACK_COLUMNS))
+    ]
+    return arrays
+
+
+def delete_frames_in_chunks(queryset, chunk_size=2000):
+    """긴 테이블 락을 피하기 위해 id 묶음 단위로 삭제, 삭제한 행 수 반환"""
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        deleted += PoseFrame.objects.filter(id__in=ids).delete()[1].get('emodia.PoseFrame', 0)
+
+
+def delete_archived_frames(session, frame_ids, chunk_size=2000):
+    """압축본/보관 파일에 들어간 id 의 행만 삭제 (사용자 평가가 달린 프레임은 유지), 삭제한 행 수 반환"""
+    deleted = 0
+    frame_ids = [int(frame_id) for frame_id in frame_ids]
+    for i in range(0, len(frame_ids), chunk_size):
+        deleted += delete_frames_in_chunks(
+            session.pose_frames.filter(id__in=frame_ids[i:i + chunk_size], ratings__isnull=True),
+            chunk_size=chunk_size,
+        )
+    return deleted
+
+
+def compact_session(session, delete_rows=True, chunk_size=2000):
+    """
+    세션의 PoseFrame 행을 .npz 하나로 압축해 session.frames_archive 에 저장
+    이미 압축된 세션은 기존 압축본에 남은 행을 합쳐 다시 저장하고 (남은 행이 없으면 그대로),
+    월별 zip 으로 옮겨진 세션은 건드리지 않음
+    반환값: 새로 압축한 프레임 수
+    """
+    if session.frames_cold_archive:
+        return 0
+    previous_count = 0
+    if session.frames_archive:
+        archive = _load_archive(session)
+        if not _remaining_rows(session, archive).exists():
+            return 0
+        previous_count = len(archive['frame_ids'])
+
+    # 기존 압축본 + 남은 행 (압축본이 없으면 행 전체)
+    content = session_archive_bytes(session, chunk_size=chunk_size)
+    frame_ids = _archive_frame_ids(content)
+
+    old_archive = session.frames_archive.name if session.frames_archive else None
+    storage = session.frames_archive.storage
+    with transaction.atomic():
+        session.frames_archive.save(f'session_{session.id}.npz', ContentFile(content), save=False)
+        session.frames_compacted_at = timezone.now()
+        session.save(update_fields=['frames_archive', 'frames_compacted_at'])
+    if old_archive and old_archive != session.frames_archive.name:
+        storage.delete(old_archive)
+
+    if delete_rows:
+        # 압축본에 포함된 행만 삭제, 사용자 평가가 달린 프레임은 유지
+        delete_archived_frames(session, frame_ids, chunk_size=chunk_size)
+    return len(frame_ids) - previous_count
+
+
+def compact_session_in_background(session_id):
+    """end_workout_session 에서 호출: 응답을 막지 않도록 별도 스레드에서 압축"""
+    def run():
+        try:
+            session = WorkoutSession.objects.get(id=session_id)
+            compact_session(session)
+        except Exception:
+            logger.exception('세션 %s 프레임 압축 실패', session_id)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=run, name=f'compact-session-{session_id}', daemon=True)
+    thread.start()
+    return thread
+
+
+# ========== 보관 (월별 zip) ==========
+
+def cold_archive_path(name):
+    """월별 보관 파일 이름(YYYY-MM.zip) → 디스크 경로"""
+    base = getattr(settings, 'POSE_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'pose_archive'))
+    return os.path.join(base, name)
+
+
+def _cold_member_name(session):
+    return f'session_{session.id}.npz'
+
+
+def archive_month(session):
+    """세션이 들어갈 보관 파일의 달 (세션 시작 시각 기준, YYYY-MM)"""
+    return timezone.localtime(session.start_time).strftime('%Y-%m')
+
+
+def _archive_frame_ids(content):
+    with np.load(io.BytesIO(content)) as data:
+        return data['frame_ids']
+
+
+def session_archive_bytes(session, chunk_size=2000):
+    """세션 프레임 전체(세션별 압축본 + 남은 행) → .npz 바이트"""
+    columns = ('id', 'timestamp', 'keypoints', 'keypoints_packed', 'feedback')
+    if not session.frames_archive:
+        rows = session.pose_frames.order_by('timestamp', 'id').only(*columns)
+        return build_frames_archive(rows.iterator(chunk_size=chunk_size))
+
+    with session.frames_archive.open('rb') as fileobj:
+        content = fileobj.read()
+    archive = read_frames_archive(io.BytesIO(content))
+    rows = list(_remaining_rows(session, archive).only(*columns))
+    if not rows:
+        return content
+
+    # 압축 이후에 들어온 행을 뒤에 붙여 다시 묶음 (iter_session_frames 와 같은 순서)
+    return _pack_archive(
+        np.concatenate([archive['frame_ids'], [frame.id for frame in rows]]),
+        np.concatenate([archive['timestamps'], [frame.timestamp for frame in rows]]),
+        np.concatenate([
+            archive['keypoints'],
+            np.stack([np.asarray(frame.keypoint_array(), dtype=PACKED_DTYPE) for frame in rows]),
+        ]),
+        np.concatenate([archive['status'], [
+            FEEDBACK_STATUS_CODES.get(frame.feedback.get('status'), -1) if frame.feedback else -1
+            for frame in rows
+        ]]),
+        archive['feedback'] + [frame.feedback for frame in rows],
+    )
+
+
+def archive_sessions(month, sessions, chunk_size=2000):
+    """
+    같은 달의 세션들을 월별 zip 에 추가한 뒤 세션별 압축본과 PoseFrame 행을 삭제
+    zip 을 닫아 목록까지 기록한 다음에만 DB 를 갱신하고 행을 지우므로, 중간에 중단되어도 프레임을 잃지 않음
+    (다시 실행하면 이미 들어간 항목은 프레임이 같으면 그대로 두고, 그 뒤에 들어온 프레임이 있으면 항목을 다시 씀)
+    반환값: [(세션, 보관한 프레임 수), ...]
+    """
+    name = f'{month}.zip'
+    path = cold_archive_path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    archived = []
+    rewrite = {}
+    # .npz 는 이미 압축되어 있으므로 zip 은 저장만 (ZIP_STORED)
+    with zipfile.ZipFile(path, 'a') as archive_zip:
+        existing = set(archive_zip.namelist())
+        for session in sessions:
+            content = session_archive_bytes(session, chunk_size=chunk_size)
+            frame_ids = _archive_frame_ids(content)
+            member = _cold_member_name(session)
+            if member in existing:
+                # 중단된 이전 실행이 쓴 항목: 그 뒤에 들어온 프레임이 있으면 zip 을 닫은 뒤 항목을 교체
+                if not np.array_equal(np.sort(_archive_frame_ids(archive_zip.read(member))), np.sort(frame_ids)):
+                    rewrite[member] = content
+            elif len(frame_ids):
+                archive_zip.writestr(member, content)
+            archived.append((session, frame_ids))
+    if rewrite:
+        _replace_zip_members(path, rewrite)
+
+    for session, frame_ids in archived:
+        warm_archive = session.frames_archive.name if session.frames_archive else None
+        storage = session.frames_archive.storage
+        with transaction.atomic():
+            session.frames_archive = None
+            session.frames_cold_archive = name if len(frame_ids) else ''
+            session.frames_archived_at = timezone.now()
+            session.save(update_fields=['frames_archive', 'frames_cold_archive', 'frames_archived_at'])
+        if warm_archive:
+            storage.delete(warm_archive)
+        # 보관 파일에 포함된 id 의 행만 삭제, 사용자 평가가 달린 프레임은 유지
+        delete_archived_frames(session, frame_ids, chunk_size=chunk_size)
+    return [(session, len(frame_ids)) for session, frame_ids in archived]
+
+
+def _replace_zip_members(path, replacements):
+    """zip 의 일부 항목을 새 내용으로 교체 (임시 파일에 다시 쓴 뒤 바꿔치기)"""
+    tmp_path = f'{path}.tmp'
+    with zipfile.ZipFile(path) as source, zipfile.ZipFile(tmp_path, 'w') as target:
+        for info in source.infolist():
+            if info.filename not in replacements:
+                target.writestr(info, source.read(info))
+        for member, content in replacements.items():
+            target.writestr(member, content)
+    os.replace(tmp_path, path)
+
+
+def _has_archive(session):
+    return bool(session.frames_archive or session.frames_cold_archive)
+
+
+def _load_archive(session):
+    if session.frames_archive:
+        with session.frames_archive.open('rb') as fileobj:
+            return read_frames_archive(io.BytesIO(fileobj.read()))
+    # 월별 보관 파일에서 이 세션 항목만 읽음
+    with zipfile.ZipFile(cold_archive_path(session.frames_cold_archive)) as archive_zip:
+        return read_frames_archive(io.BytesIO(archive_zip.read(_cold_member_name(session))))
+
+
+@contextlib.contextmanager
+def _open_archive_zip(session):
+    """압축본 .npz 를 zip 으로 열기 (배열은 읽지 않음, _iter_npy_chunks 로 필요한 만큼 읽음)"""
+    if session.frames_archive:
+        with session.frames_archive.open('rb') as fileobj, zipfile.ZipFile(fileobj) as npz:
+            yield npz
+        return
+    # 월별 보관 파일에서는 이 세션 항목(이미 압축된 .npz 바이트)만 읽음
+    with zipfile.ZipFile(cold_archive_path(session.frames_cold_archive)) as archive_zip:
+        content = archive_zip.read(_cold_member_name(session))
+    with zipfile.ZipFile(io.BytesIO(content)) as npz:
+        yield npz
+
+
+def _open_npy(npz, name):
+    """npz 항목 → (헤더 다음 위치의 파일 객체, shape, dtype)"""
+    fileobj = npz.open(f'{name}.npy')
+    version = np.lib.format.read_magic(fileobj)
+    if version == (1, 0):
+        shape, _, dtype = np.lib.format.read_array_header_1_0(fileobj)
+    else:
+        shape, _, dtype = np.lib.format.read_array_header_2_0(fileobj)
+    return fileobj, shape, dtype
+
+
+def _iter_npy_chunks(npz, name, chunk_size):
+    """npz 항목의 배열을 첫 번째 축 기준 chunk_size 개씩 (압축을 풀면서 읽으므로 배열 전체를 올리지 않음)"""
+    fileobj, shape, dtype = _open_npy(npz, name)
+    with fileobj:
+        row_shape = shape[1:]
+        row_bytes = dtype.itemsize * int(np.prod(row_shape))
+        remaining = shape[0]
+        while remaining:
+            count = min(chunk_size, remaining)
+            yield np.frombuffer(fileobj.read(count * row_bytes), dtype=dtype).reshape((count, *row_shape))
+            remaining -= count
+
+
+def _iter_feedback_lines(npz):
+    """feedback 항목 (줄바꿈으로 연결한 JSON) → 줄 단위 bytes"""
+    fileobj, _, _ = _open_npy(npz, 'feedback')
+    with fileobj:
+        for line in fileobj:
+            yield line.rstrip(b'\n')
+
+
+def _iter_feedback(npz, chunk_size):
+    """압축본의 프레임별 피드백 dict (형식 버전 1: JSON 줄, 2: 피드백 열을 chunk_size 개씩 풀어 복원)"""
+    with npz.open('version.npy') as fileobj:
+        version = int(np.lib.format.read_array(fileobj))
+    if version < 2:
+        for line in _iter_feedback_lines(npz):
+            yield json.loads(line)
+        return
+    with npz.open('message_texts.npy') as texts, npz.open('angle_names.npy') as names:
+        decoder = _FeedbackDecoder(
+            np.lib.format.read_array(texts), np.lib.format.read_array(names), _iter_feedback_lines(npz)
+        )
+    for chunks in zip(*(_iter_npy_chunks(npz, name, chunk_size) for name in FEEDBACK_COLUMNS)):
+        for values in zip(*chunks):
+            yield decoder.decode(*values)
+
+
+def _iter_archive_frames(session, start, end, chunk_size):
+    """
+    압축본 프레임을 chunk_size 개씩 풀어 dict 로 반환 (키포인트 배열 / 피드백 전체를 한 번에 올리지 않음)
+    generator 반환값: 압축본의 마지막 frame id (그 뒤에 들어온 행을 이어서 읽기 위해)
+    """
+    last_id = 0
+    with _open_archive_zip(session) as npz:
+        feedbacks = _iter_feedback(npz, chunk_size)
+        columns = zip(
+            _iter_npy_chunks(npz, 'frame_ids', chunk_size),
+            _iter_npy_chunks(npz, 'timestamps', chunk_size),
+            _iter_npy_chunks(npz, 'keypoints', chunk_size),
+        )
+        for frame_ids, timestamps, keypoints in columns:
+            last_id = max(last_id, int(frame_ids.max()))
+            for i, feedback in zip(range(len(frame_ids)), feedbacks):
+                timestamp = float(timestamps[i])
+                if (start is not None and timestamp < start) or (end is not None and timestamp > end):
+                    continue
+                yield {
+                    'id': int(frame_ids[i]),
+                    'timestamp': timestamp,
+                    'keypoints': array_to_keypoints(keypoints[i]),
+                    'feedback': feedback,
+                }
+    return last_id
+
+
+def _remaining_rows(session, archive):
+    """압축 이후에 들어온 프레임 (쓰기 지연 등)"""
+    last_id = int(archive['frame_ids'].max()) if len(archive['frame_ids']) else 0
+    return session.pose_frames.filter(id__gt=last_id).order_by('timestamp', 'id')
+
+
+def _iter_rows(rows, chunk_size):
+    """
+    (timestamp, id) 순 PoseFrame 을 chunk_size 개씩 키셋 페이지로 읽음
+    MySQL 은 iterator() 도 결과 전체를 클라이언트로 가져오므로, 세션 길이와 관계없이 한 번에 chunk_size 행만 메모리에 둔다
+    """
+    rows = rows.order_by('timestamp', 'id')
+    page = list(rows[:chunk_size])
+    while page:
+        yield from page
+        if len(page) < chunk_size:
+            return
+        last = page[-1]
+        page = list(rows.filter(
+            Q(timestamp__gt=last.timestamp) | Q(timestamp=last.timestamp, id__gt=last.id)
+        )[:chunk_size])
+
+
+def iter_session_frames(session, start=None, end=None, chunk_size=2000):
+    """
+    세션 프레임을 타임스탬프 순으로 {id, timestamp, keypoints, feedback} dict 로 반환
+    압축/보관된 세션은 .npz 에서, 아니면 PoseFrame 행에서 읽는다
+    어느 쪽이든 chunk_size 개씩 읽으므로 메모리 사용량은 세션 길이와 무관
+    (월별 보관 파일은 세션 항목의 압축된 바이트만 먼저 읽음)
+    """
+    if _has_archive(session):
+        last_id = yield from _iter_archive_frames(session, start, end, chunk_size)
+        rows = session.pose_frames.filter(id__gt=last_id)
+    else:
+        rows = session.pose_frames.order_by('timestamp', 'id')
+
+    if start is not None:
+        rows = rows.filter(timestamp__gte=start)
+    if end is not None:
+        rows = rows.filter(timestamp__lte=end)
+    for frame in _iter_rows(rows, chunk_size):
+        yield {
+            'id': frame.id,
+            'timestamp': frame.timestamp,
+            'keypoints': frame.get_keypoints(),
+            'feedback': frame.feedback,
+        }
+
+
+def iter_ndjson(frames, compress=False, buffer_size=64 * 1024):
+    """
+    프레임 dict iterable → 줄바꿈 구분 JSON(NDJSON) 바이트 조각 (StreamingHttpResponse 용)
+    buffer_size 만큼 모아서 내보내고, compress=True 면 gzip 스트림으로 압축
+    """
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None  # wbits=31: gzip 헤더
+    buffer = []
+    size = 0
+    for frame in frames:
+        line = (encoder.encode(frame) + '\n').encode('utf-8')
+        buffer.append(line)
+        size += len(line)
+        if size >= buffer_size:
+            chunk = b''.join(buffer)
+            buffer = []
+            size = 0
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+                if not chunk:
+                    continue
+            yield chunk
+
+    chunk = b''.join(buffer)
+    if compressor is not None:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+async def aiter_chunks(chunks):
+    """
+    동기 바이트 조각 iterator → 비동기 iterator (ASGI 용)
+    ASGI 에서 StreamingHttpResponse 에 동기 iterator 를 주면 Django 4.2 가 sync_to_async(list) 로 전체를 모은 뒤 보내므로,
+    조각 하나씩 스레드에서 꺼내 바로 내보냄 (DB 연결을 같이 쓰도록 thread_sensitive)
+    """
+    iterator = iter(chunks)
+    done = object()
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await next_chunk(iterator, done)
+            if chunk is done:
+                return
+            yield chunk
+    finally:
+        # 클라이언트가 중간에 끊으면 페이지 조회 중인 generator 도 닫음
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=True)()
+
+
+def load_session_arrays(session):
+    """
+    분석용: 세션 전체를 배열로 반환
+    반환값: (timestamps (N,), keypoints (N, K, 3) float32, status (N,) int8)
+    """
+    timestamps = []
+    keypoints = []
+    status = []
+
+    if _has_archive(session):
+        archive = _load_archive(session)
+        timestamps.append(archive['timestamps'])
+        keypoints.append(archive['keypoints'])
+        status.append(archive['status'])
+        rows = _remaining_rows(session, archive)
+    else:
+        rows = session.pose_frames.order_by('timestamp', 'id')
+
+    rows = list(rows.only('id', 'timestamp', 'keypoints', 'keypoints_packed', 'feedback'))
+    if rows:
+        timestamps.append(np.array([frame.timestamp for frame in rows], dtype=np.float64))
+        keypoints.append(np.stack([np.asarray(frame.keypoint_array(), dtype=PACKED_DTYPE) for frame in rows]))
+        status.append(np.array([
+            FEEDBACK_STATUS_CODES.get(frame.feedback.get('status'), -1) if frame.feedback else -1
+            for frame in rows
+        ], dtype=np.int8))
+
+    if not timestamps:
+        return (
+            np.empty(0, dtype=np.float64),
+            np.empty((0, NUM_KEYPOINTS, 3), dtype=PACKED_DTYPE),
+            np.empty(0, dtype=np.int8),
+        )
+    return np.concatenate(timestamps), np.concatenate(keypoints), np.concatenate(status)
+
+
+def rescore_session(session, exercise_type='neck_left'):
+    """
+    저장된 세션 전체를 현재 피드백 규칙으로 다시 평가 (프레임별 Python 처리 없이 일괄 계산)
+    반환값: (timestamps, evaluate_batch 결과)
+    """
+    timestamps, keypoints, _ = load_session_arrays(session)
+    return timestamps, evaluate_batch(keypoints, exercise_type)
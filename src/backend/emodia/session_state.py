@@ -0,0 +1,297 @@
+"""
+세션별 피드백 상태 (시간 평활화 + 상태 전환 히스테리시스)
+
+generate_feedback 은 프레임마다 따로 판정하므로 키포인트가 기준값 근처에서 흔들리면
+'good' / 'warning' 이 매 프레임 바뀐다. 세션마다 작은 상태를 두고
+- 운동에 쓰이는 키포인트 좌표의 지수이동평균(EMA)으로 판정 (프레임당 O(1), 과거 프레임 저장 없음)
+- 상태(status)가 바뀐 판정이 confirm_frames 프레임 연속으로 나와야 전환
+상태는 프로세스 내 저장소(WorkoutSession.id → SessionState)에 두고, 개수 상한(LRU)과 유휴 시간으로 정리한다.
+
+같은 상태로 프레임 저장 여부도 결정한다 (WorkoutSession.ingest_policy, 피드백은 모든 프레임에 반환).
+- min_confidence: 평균 score 가 이보다 낮은 프레임은 저장하지 않음
+- min_delta: 마지막으로 저장한 프레임과 비교해 키포인트 좌표 변화가 이보다 작으면 저장하지 않음
+- 피드백 상태(status)가 바뀐 프레임은 항상 저장
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .feedback import evaluate_plan, get_plan
+from .feedback_cache import cached_feedback, is_feedback_cache_enabled
+from .keypoints import Pose, parse_pose
+from .session_summary import record_frame
+
+
+INGEST_POLICY_KEYS = ('min_delta', 'min_confidence')
+
+
+def get_ingest_policy(session):
+    """settings 기본값 위에 세션별 정책을 덮어쓴 저장 정책"""
+    policy = {
+        'min_delta': getattr(settings, 'POSE_INGEST_MIN_DELTA', 0.0),
+        'min_confidence': getattr(settings, 'POSE_INGEST_MIN_CONFIDENCE', 0.0),
+    }
+    policy.update(session.ingest_policy or {})
+    return policy
+
+
+def _policy_active(policy):
+    return policy['min_delta'] > 0 or policy['min_confidence'] > 0
+
+
+class SessionState:
+    """세션 1개의 평활화 좌표 + 확정된 피드백 + 마지막 저장 프레임"""
+    __slots__ = (
+        'plan', 'x', 'y', 'present', 'feedback', 'pending', 'frames', 'last_seen',
+        'stored', 'last_status', 'kept', 'dropped'
+    )
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.reset()
+
+    def reset(self):
+        self.x = {}
+        self.y = {}
+        self.present = {}
+        self.feedback = None  # 마지막으로 확정된 피드백
+        self.pending = 0      # 확정 상태와 다른 판정이 연속으로 나온 프레임 수
+        self.frames = 0
+        self.last_seen = time.monotonic()
+        self.stored = None     # 마지막으로 저장한 프레임의 Pose
+        self.last_status = None
+        self.kept = 0
+        self.dropped = 0
+
+    def smooth(self, pose, alpha):
+        """운동에 쓰이는 키포인트만 EMA 갱신 후 평활화된 Pose 반환 (빠진 키포인트는 평균 초기화)"""
+        x, y, present = list(pose.x), list(pose.y), list(pose.present)
+        for i in self.plan.keypoints:
+            if not present[i]:
+                self.present[i] = False
+                continue
+            if self.present.get(i):
+                self.x[i] += alpha * (x[i] - self.x[i])
+                self.y[i] += alpha * (y[i] - self.y[i])
+            else:
+                self.x[i] = x[i]
+                self.y[i] = y[i]
+                self.present[i] = True
+            x[i] = self.x[i]
+            y[i] = self.y[i]
+        return Pose(x, y, present, pose.score_sum, pose.score_count, pose.score_min)
+
+    def update(self, pose, alpha, confirm_frames):
+        """프레임 1개 반영 → 클라이언트에 보낼 피드백"""
+        feedback = evaluate_plan(self.plan, self.smooth(pose, alpha))
+        if self.feedback is None or feedback['status'] == self.feedback['status']:
+            self.feedback = feedback
+            self.pending = 0
+        else:
+            self.pending += 1
+            if self.pending >= confirm_frames:
+                self.feedback = feedback
+                self.pending = 0
+            else:
+                # 전환 확정 전: 이전 상태와 메시지 유지, 측정값만 최신으로
+                feedback = {
+                    **self.feedback,
+                    'messages': list(self.feedback['messages']),
+                    'angles': feedback['angles'],
+                }
+                return feedback
+        return {**feedback, 'messages': list(feedback['messages'])}
+
+    def should_store(self, pose, status, policy):
+        """저장 정책에 따라 이 프레임을 저장할지 결정"""
+        changed = status != self.last_status
+        self.last_status = status
+        if not changed:
+            min_confidence = policy['min_confidence']
+            if min_confidence > 0:
+                confidence = pose.score_sum / pose.score_count if pose.score_count else 0.0
+                if confidence < min_confidence:
+                    return False
+            min_delta = policy['min_delta']
+            if min_delta > 0 and self.stored is not None and self._delta(pose) < min_delta:
+                return False
+        self.stored = pose
+        return True
+
+    def _delta(self, pose):
+        """마지막 저장 프레임과의 최대 좌표 변화 (보이는 키포인트가 달라지면 무한대)"""
+        stored = self.stored
+        if pose.present != stored.present:
+            return float('inf')
+        delta = 0.0
+        for i in self.plan.keypoints:
+            if pose.present[i]:
+                delta = max(delta, abs(pose.x[i] - stored.x[i]), abs(pose.y[i] - stored.y[i]))
+        return delta
+
+    def ingest(self, keypoints, pose, policy, smoothing, alpha, confirm_frames):
+        """프레임 1개 → (피드백, 저장 여부) (pose: parse_pose 결과, 인식 오류면 None)"""
+        self.frames += 1
+        self.last_seen = time.monotonic()
+        if pose is None:
+            # 인식 오류는 상태에 반영하지 않고 그대로 전달 (기록은 남김)
+            self.kept += 1
+            return evaluate_plan(self.plan, keypoints), True
+
+        if smoothing:
+            feedback = self.update(pose, alpha, confirm_frames)
+        elif is_feedback_cache_enabled():
+            feedback = cached_feedback(keypoints, self.plan.name, pose)
+        else:
+            feedback = evaluate_plan(self.plan, pose)
+
+        if self.should_store(pose, feedback['status'], policy):
+            self.kept += 1
+            return feedback, True
+        self.dropped += 1
+        return feedback, False
+
+
+class SessionStateStore:
+    """WorkoutSession.id → SessionState (LRU + 유휴 시간 만료)"""
+
+    def __init__(self, max_sessions=1000, idle_timeout=600, alpha=0.5, confirm_frames=3):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.alpha = alpha
+        self.confirm_frames = confirm_frames
+
+        self._states = OrderedDict()  # 오래 안 쓴 순서
+        self._lock = threading.Lock()
+
+        # 카운터
+        self.created = 0
+        self.evicted = 0
+        self.expired = 0
+        self.kept = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            max_sessions=getattr(settings, 'POSE_SESSION_STATE_MAX', 1000),
+            idle_timeout=getattr(settings, 'POSE_SESSION_STATE_TTL', 600),
+            alpha=getattr(settings, 'POSE_SMOOTHING_ALPHA', 0.5),
+            confirm_frames=getattr(settings, 'POSE_STATUS_CONFIRM_FRAMES', 3),
+        )
+
+    def _get(self, session_id, plan):
+        """잠금을 잡은 상태에서 호출"""
+        state = self._states.get(session_id)
+        if state is None:
+            state = SessionState(plan)
+            self._states[session_id] = state
+            self.created += 1
+        else:
+            self._states.move_to_end(session_id)
+            if state.plan is not plan:
+                # 운동이 바뀌면 평균/확정 상태 초기화
+                state.plan = plan
+                state.reset()
+        self._evict()
+        return state
+
+    def _evict(self):
+        # 맨 앞이 가장 오래 안 쓴 세션이므로 앞에서부터만 확인
+        deadline = time.monotonic() - self.idle_timeout
+        while self._states:
+            session_id, state = next(iter(self._states.items()))
+            if state.last_seen < deadline:
+                self.expired += 1
+            elif len(self._states) > self.max_sessions:
+                self.evicted += 1
+            else:
+                break
+            del self._states[session_id]
+
+    def ingest(self, session_id, keypoints, pose, exercise_type, policy, smoothing=True):
+        """
+        세션 상태를 반영한 (피드백, 저장 여부) (exercise_type 이 없으면 ValueError)
+        pose: session_ingest 에서 만든 parse_pose 결과 (인식 오류면 None)
+        """
+        plan = get_plan(exercise_type)
+        with self._lock:
+            state = self._get(session_id, plan)
+            feedback, keep = state.ingest(keypoints, pose, policy, smoothing, self.alpha, self.confirm_frames)
+            if keep:
+                self.kept += 1
+            else:
+                self.dropped += 1
+            return feedback, keep
+
+    def discard(self, session_id):
+        """세션 종료 시 상태 제거"""
+        with self._lock:
+            self._states.pop(session_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._states),
+                'max_sessions': self.max_sessions,
+                'created': self.created,
+                'evicted': self.evicted,
+                'expired': self.expired,
+                'kept': self.kept,
+                'dropped': self.dropped,
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_states():
+    """프로세스 전역 SessionStateStore (처음 사용할 때 생성)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SessionStateStore.from_settings()
+    return _store
+
+
+def _parse(keypoints):
+    """키포인트 → Pose (인식 오류면 None)"""
+    try:
+        return parse_pose(keypoints)
+    except ValueError:
+        return None
+
+
+def is_smoothing():
+    return getattr(settings, 'POSE_SMOOTHING', False)
+
+
+def session_ingest(session_id, policy, keypoints, exercise_type, timestamp=None):
+    """
+    세션 단위 피드백 + 저장 여부 → (피드백, 저장 여부)
+    policy: get_ingest_policy(session)
+    평활화와 저장 정책이 모두 꺼져 있으면 상태 없이 generate_feedback 과 같은 피드백, 항상 저장
+    피드백은 저장 여부와 관계없이 세션 요약(session_summary)에 반영
+    timestamp 가 있으면 피드백에 운동 단계(phase: 단계, 반복 횟수, 유지 시간)를 추가
+    """
+    smoothing = is_smoothing()
+    # 키포인트는 여기서 한 번만 파싱해 상태/운동 단계 판정에 함께 사용
+    pose = _parse(keypoints)
+    if not smoothing and not _policy_active(policy):
+        feedback, keep = cached_feedback(keypoints, exercise_type, pose), True
+    else:
+        feedback, keep = get_session_states().ingest(
+            session_id, keypoints, pose, exercise_type, policy, smoothing
+        )
+    record_frame(session_id, feedback, timestamp, get_plan(exercise_type), pose)
+    return feedback, keep
+
+
+def discard_session_state(session_id):
+    if _store is not None:
+        _store.discard(session_id)
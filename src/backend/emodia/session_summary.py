@@ -0,0 +1,374 @@
+"""
+운동 세션 요약 (프레임마다 증분 갱신)
+
+세션 품질(좋음/경고 비율, nose_offset 범위, 바른 자세 유지 시간, 가장 많이 받은 교정 메시지)을
+PoseFrame 을 다시 읽지 않고 보여주기 위해, 피드백을 계산할 때마다 세션별 누적값을 O(1) 로 갱신한다.
+- 누적값은 프로세스 내 저장소에 모았다가 일정 프레임마다, 그리고 세션 종료 시 WorkoutSession.summary 에 더한다
+  (누적값끼리 더할 수 있으므로 여러 프로세스가 같은 세션을 받아도 합쳐짐)
+- 유휴 시간 만료 / LRU 로 메모리에서 내보낸 세션의 누적값도 버리지 않고 다음 flush 때 DB 에 더한다
+- 저장 정책으로 버린 프레임도 요약에는 포함
+- WorkoutSession.summary 에는 원본 누적값을, API 에는 summary_report() 로 계산한 값을 보낸다
+- 운동 단계 상태(exercise_phase.PhaseTracker)도 세션별로 여기 두고, 반복 횟수와 최대 자세 유지 시간을 함께 누적
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+
+from .exercise_phase import PhaseTracker, is_rep
+from .feedback import MESSAGE_CODES, MESSAGE_TEXTS
+from .models import WorkoutSession
+
+# '✓' 로 시작하지 않는 메시지 = 교정 메시지
+CORRECTION_CODES = frozenset(
+    code for code, text in enumerate(MESSAGE_TEXTS) if not text.startswith('✓')
+)
+
+
+class SessionSummary:
+    """세션 1개의 누적값 (더하기로 합칠 수 있는 값만 보관)"""
+    __slots__ = (
+        'frames', 'good', 'warning', 'offset_count', 'offset_sum', 'offset_min', 'offset_max',
+        'correct_seconds', 'messages', 'reps', 'hold_seconds', 'best_hold',
+        'last_timestamp', 'last_status', 'last_phase', 'last_seen', 'tracker'
+    )
+
+    def __init__(self):
+        self.reset()
+        # 바른 자세 유지 시간 계산용 (flush 후에도 유지)
+        self.last_timestamp = None
+        self.last_status = None
+        self.last_phase = None
+        self.last_seen = time.monotonic()
+        self.tracker = None  # 운동 단계 상태 (flush 후에도 유지)
+
+    def reset(self):
+        self.frames = 0
+        self.good = 0
+        self.warning = 0
+        self.offset_count = 0
+        self.offset_sum = 0.0
+        self.offset_min = None
+        self.offset_max = None
+        self.correct_seconds = 0.0
+        self.messages = {}  # 메시지 코드 → 횟수
+        self.reps = 0
+        self.hold_seconds = 0.0  # 최대 자세(peak) 유지 시간 합계
+        self.best_hold = 0.0     # 한 번에 가장 오래 유지한 시간
+
+    def track(self, plan, pose, status, timestamp, window=5, max_gap=1.0):
+        """운동 단계 갱신 → PhaseTracker.update 결과 (운동이 바뀌면 단계 상태 초기화)"""
+        if self.tracker is None or self.tracker.plan is not plan:
+            self.tracker = PhaseTracker(plan, window)
+        return self.tracker.update(pose, status, timestamp, max_gap)
+
+    def record(self, feedback, timestamp=None, max_gap=1.0):
+        """프레임 1개의 피드백 반영"""
+        self.frames += 1
+        self.last_seen = time.monotonic()
+        status = feedback['status']
+        if status == 'good':
+            self.good += 1
+        else:
+            self.warning += 1
+
+        offset = feedback['angles'].get('nose_offset')
+        if offset is not None and math.isfinite(offset):
+            self.offset_count += 1
+            self.offset_sum += offset
+            if self.offset_min is None or offset < self.offset_min:
+                self.offset_min = offset
+            if self.offset_max is None or offset > self.offset_max:
+                self.offset_max = offset
+
+        messages = self.messages
+        for text in feedback['messages']:
+            code = MESSAGE_CODES.get(text)
+            if code in CORRECTION_CODES:
+                messages[code] = messages.get(code, 0) + 1
+
+        phase = feedback.get('phase')
+        if phase is not None:
+            if is_rep(phase):
+                self.reps += 1
+            if phase['hold_seconds'] > self.best_hold:
+                self.best_hold = phase['hold_seconds']
+
+        if timestamp is not None:
+            # 직전 프레임이 좋은 자세였으면 그 사이 시간을 유지 시간으로 (max_gap 보다 긴 공백은 제외)
+            elapsed = timestamp - self.last_timestamp if self.last_timestamp is not None else 0
+            if 0 < elapsed <= max_gap:
+                if self.last_status == 'good':
+                    self.correct_seconds += elapsed
+                if self.last_phase == 'peak' and phase is not None and phase['name'] == 'peak':
+                    self.hold_seconds += elapsed
+            self.last_timestamp = timestamp
+            self.last_status = status
+            self.last_phase = phase['name'] if phase is not None else None
+
+    def to_dict(self):
+        return {
+            'frames': self.frames,
+            'good': self.good,
+            'warning': self.warning,
+            'nose_offset': {
+                'count': self.offset_count,
+                'sum': self.offset_sum,
+                'min': self.offset_min,
+                'max': self.offset_max,
+            },
+            'correct_seconds': self.correct_seconds,
+            'messages': {str(code): count for code, count in self.messages.items()},
+            'reps': self.reps,
+            'hold_seconds': self.hold_seconds,
+            'best_hold': self.best_hold,
+        }
+
+
+def merge_summary(stored, delta):
+    """WorkoutSession.summary 원본 누적값 + SessionSummary.to_dict() → 합친 dict"""
+    if not stored:
+        return delta
+    offset = stored.get('nose_offset') or {}
+    delta_offset = delta['nose_offset']
+    messages = dict(stored.get('messages') or {})
+    for code, count in delta['messages'].items():
+        messages[code] = messages.get(code, 0) + count
+    return {
+        'frames': stored.get('frames', 0) + delta['frames'],
+        'good': stored.get('good', 0) + delta['good'],
+        'warning': stored.get('warning', 0) + delta['warning'],
+        'nose_offset': {
+            'count': offset.get('count', 0) + delta_offset['count'],
+            'sum': offset.get('sum', 0.0) + delta_offset['sum'],
+            'min': _pick(min, offset.get('min'), delta_offset['min']),
+            'max': _pick(max, offset.get('max'), delta_offset['max']),
+        },
+        'correct_seconds': stored.get('correct_seconds', 0.0) + delta['correct_seconds'],
+        'messages': messages,
+        'reps': stored.get('reps', 0) + delta['reps'],
+        'hold_seconds': stored.get('hold_seconds', 0.0) + delta['hold_seconds'],
+        'best_hold': max(stored.get('best_hold', 0.0), delta['best_hold']),
+    }
+
+
+def _pick(func, a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return func(a, b)
+
+
+def summary_report(summary):
+    """원본 누적값 → API 응답용 요약 (프레임이 없으면 None)"""
+    frames = (summary or {}).get('frames', 0)
+    if not frames:
+        return None
+
+    offset = summary.get('nose_offset') or {}
+    nose_offset = None
+    if offset.get('count'):
+        nose_offset = {
+            'min': round(offset['min'], 3),
+            'max': round(offset['max'], 3),
+            'mean': round(offset['sum'] / offset['count'], 3),
+        }
+
+    top_correction = None
+    messages = summary.get('messages') or {}
+    if messages:
+        code = max(messages, key=messages.get)
+        top_correction = {'message': MESSAGE_TEXTS[int(code)], 'count': messages[code]}
+
+    return {
+        'frame_count': frames,
+        'good_percent': round(summary.get('good', 0) * 100 / frames, 1),
+        'warning_percent': round(summary.get('warning', 0) * 100 / frames, 1),
+        'nose_offset': nose_offset,
+        'correct_seconds': round(summary.get('correct_seconds', 0.0), 1),
+        'reps': summary.get('reps', 0),
+        'hold_seconds': round(summary.get('hold_seconds', 0.0), 1),
+        'best_hold_seconds': round(summary.get('best_hold', 0.0), 1),
+        'top_correction': top_correction,
+    }
+
+
+class SessionSummaryStore:
+    """WorkoutSession.id → 아직 DB 에 더하지 않은 SessionSummary (LRU + 유휴 시간 만료)"""
+
+    def __init__(self, max_sessions=1000, idle_timeout=600, flush_frames=300, max_gap=1.0, phase_window=5):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.flush_frames = flush_frames
+        self.max_gap = max_gap
+        self.phase_window = phase_window
+
+        self._summaries = OrderedDict()  # 오래 안 쓴 순서
+        self._evicted = {}  # 메모리에서 내보냈지만 아직 DB 에 더하지 않은 누적값 (session_id → to_dict())
+        self._lock = threading.Lock()
+
+        # 카운터
+        self.recorded = 0
+        self.flushed = 0
+        self.evicted = 0  # 유휴 시간 만료 / LRU 로 내보낸 세션 수 (누적값은 flush_evicted_summaries 에서 DB 에 더함)
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            max_sessions=getattr(settings, 'POSE_SESSION_STATE_MAX', 1000),
+            idle_timeout=getattr(settings, 'POSE_SESSION_STATE_TTL', 600),
+            flush_frames=getattr(settings, 'POSE_SUMMARY_FLUSH_FRAMES', 300),
+            max_gap=getattr(settings, 'POSE_SUMMARY_MAX_GAP', 1.0),
+            phase_window=getattr(settings, 'POSE_PHASE_WINDOW', 5),
+        )
+
+    def record(self, session_id, feedback, timestamp=None, plan=None, pose=None):
+        """
+        프레임 1개 반영
+        plan 과 timestamp 가 있으면 운동 단계도 갱신해 feedback['phase'] 에 넣음 (pose: parse_pose 결과, 인식 오류면 None)
+        """
+        with self._lock:
+            summary = self._summaries.get(session_id)
+            if summary is None:
+                summary = SessionSummary()
+                self._summaries[session_id] = summary
+            else:
+                self._summaries.move_to_end(session_id)
+            if plan is not None and timestamp is not None:
+                feedback['phase'] = summary.track(
+                    plan, pose, feedback['status'], timestamp, self.phase_window, self.max_gap
+                )
+            summary.record(feedback, timestamp, self.max_gap)
+            self.recorded += 1
+            self._evict()
+
+    def is_due(self, session_id):
+        """아직 DB 에 더하지 않은 프레임이 flush_frames 이상이면 True"""
+        with self._lock:
+            summary = self._summaries.get(session_id)
+            return summary is not None and summary.frames >= self.flush_frames
+
+    def _evict(self):
+        deadline = time.monotonic() - self.idle_timeout
+        while self._summaries:
+            session_id, summary = next(iter(self._summaries.items()))
+            if summary.last_seen >= deadline and len(self._summaries) <= self.max_sessions:
+                break
+            del self._summaries[session_id]
+            if summary.frames:
+                # 버리지 않고 모아뒀다가 잠금 밖에서 DB 에 더함 (이벤트 루프에서 호출될 수 있으므로 여기서는 DB 접근 없음)
+                self._evicted[session_id] = merge_summary(self._evicted.get(session_id), summary.to_dict())
+                self.evicted += 1
+
+    def take(self, session_id, discard=False):
+        """DB 에 더할 누적값을 꺼내고 0 으로 초기화 (없으면 None)"""
+        with self._lock:
+            if discard:
+                summary = self._summaries.pop(session_id, None)
+            else:
+                summary = self._summaries.get(session_id)
+            # 먼저 내보낸 누적값이 있으면 앞에 합침
+            delta = self._evicted.pop(session_id, None)
+            if summary is not None and summary.frames:
+                delta = merge_summary(delta, summary.to_dict())
+                summary.reset()
+            if delta is None:
+                return None
+            self.flushed += 1
+            return delta
+
+    def has_evicted(self):
+        return bool(self._evicted)
+
+    def take_evicted(self):
+        """내보낸 세션들의 누적값을 모두 꺼냄 → {session_id: 누적값}"""
+        with self._lock:
+            evicted, self._evicted = self._evicted, {}
+            return evicted
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._summaries),
+                'max_sessions': self.max_sessions,
+                'flush_frames': self.flush_frames,
+                'recorded': self.recorded,
+                'flushed': self.flushed,
+                'evicted': self.evicted,
+                'evicted_pending': len(self._evicted),
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_summaries():
+    """프로세스 전역 SessionSummaryStore (처음 사용할 때 생성)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SessionSummaryStore.from_settings()
+    return _store
+
+
+def record_frame(session_id, feedback, timestamp=None, plan=None, pose=None):
+    """
+    피드백 1개를 세션 요약에 반영 (DB 접근 없음)
+    plan(ExercisePlan) 과 timestamp 가 있으면 feedback['phase'] 에 운동 단계/반복 횟수/유지 시간 추가
+    """
+    get_session_summaries().record(session_id, feedback, timestamp, plan, pose)
+
+
+def flush_session_summary(session_id, discard=False):
+    """
+    프로세스에 모인 누적값을 WorkoutSession.summary 에 더하고 합친 값을 반환
+    discard=True: 세션 종료 시 프로세스 내 상태까지 제거
+    """
+    delta = get_session_summaries().take(session_id, discard=discard)
+    if delta is None:
+        return WorkoutSession.objects.filter(id=session_id).values_list('summary', flat=True).first()
+    return _merge_into_session(session_id, delta)
+
+
+def _merge_into_session(session_id, delta):
+    with transaction.atomic():
+        stored = WorkoutSession.objects.select_for_update().filter(id=session_id).values_list(
+            'summary', flat=True
+        ).first()
+        merged = merge_summary(stored, delta)
+        WorkoutSession.objects.filter(id=session_id).update(summary=merged)
+    return merged
+
+
+def has_evicted_summaries():
+    """메모리에서 내보낸 뒤 아직 DB 에 더하지 않은 누적값이 있는지 (DB 접근 없음)"""
+    return _store is not None and _store.has_evicted()
+
+
+def flush_evicted_summaries():
+    """유휴 시간 만료 / LRU 로 내보낸 세션들의 누적값을 WorkoutSession.summary 에 더함, 더한 세션 수 반환"""
+    if _store is None:
+        return 0
+    evicted = _store.take_evicted()
+    for session_id, delta in evicted.items():
+        _merge_into_session(session_id, delta)
+    return len(evicted)
+
+
+def is_summary_due(session_id):
+    """아직 DB 에 더하지 않은 프레임이 POSE_SUMMARY_FLUSH_FRAMES 이상인지 (DB 접근 없음)"""
+    return _store is not None and _store.is_due(session_id)
+
+
+def flush_summary_if_due(session_id):
+    if is_summary_due(session_id):
+        flush_session_summary(session_id)
+    if has_evicted_summaries():
+        flush_evicted_summaries()
@@ -0,0 +1,23 @@
+"""
+모델 변경 시 프로세스 내 캐시 무효화
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .model_registry import invalidate_model_registry
+from .models import ExpertPoseTemplate, MLModel
+from .template_index import invalidate_template_index
+
+
+@receiver(post_save, sender=ExpertPoseTemplate)
+@receiver(post_delete, sender=ExpertPoseTemplate)
+def invalidate_template_index_on_change(sender, instance, **kwargs):
+    # 관리자 화면에서 스포츠를 바꾼 경우 이전 스포츠 인덱스도 바뀌므로 전체 무효화 (다음 조회 때 스포츠별로 다시 생성)
+    invalidate_template_index()
+
+
+@receiver(post_save, sender=MLModel)
+@receiver(post_delete, sender=MLModel)
+def invalidate_model_registry_on_change(sender, instance, **kwargs):
+    # 활성화 시 다른 모델은 update() 로 비활성화되므로 신호가 없음 → 스포츠 단위로 토큰 재확인
+    invalidate_model_registry(instance.sports_id)
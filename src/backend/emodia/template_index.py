@@ -0,0 +1,203 @@
+"""
+ExpertPoseTemplate 최근접 이웃 인덱스 (SciPy cKDTree)
+
+사용자 프레임과 가장 가까운 전문가 자세를 찾을 때 템플릿마다 calculate_similarity 를 부르지 않고,
+(Sports, exercise_phase) 별로 활성 템플릿의 normalize_features 벡터를 KD-tree 로 만들어 둔다.
+- 특징마다 단위가 달라(각도는 도, 거리는 정규화 좌표) 스포츠별 평균/표준편차로 표준화한 공간에서 거리 계산
+- 템플릿이 저장/삭제되면 signals.py 에서 인덱스를 무효화 (다음 조회 때 스포츠별로 다시 생성)
+- 다른 프로세스의 변경은 POSE_TEMPLATE_INDEX_TTL 초가 지나면 반영
+"""
+
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from scipy.spatial import cKDTree
+
+from .ml_utils import extract_features, extract_template_features, normalize_features, FEATURE_SCHEMA_VERSION
+from .models import ExpertPoseTemplate, Sports
+
+PHASES = frozenset(value for value, _ in ExpertPoseTemplate.PHASE_CHOICES)
+
+
+class TemplateIndex:
+    """활성 템플릿 KD-tree (한 phase 또는 스포츠 전체)"""
+    __slots__ = ('ids', 'phases', 'quality_levels', 'mean', 'scale', 'tree')
+
+    def __init__(self, ids, phases, quality_levels, vectors, mean, scale):
+        self.ids = np.asarray(ids)
+        self.phases = list(phases)
+        self.quality_levels = list(quality_levels)
+        self.mean = mean
+        self.scale = scale
+        self.tree = cKDTree((np.asarray(vectors, dtype=np.float64) - mean) / scale)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def query(self, vector, k):
+        """특징 벡터 → [{'id', 'phase', 'quality_level', 'distance'}, ...] (가까운 순)"""
+        k = min(k, len(self.ids))
+        distances, positions = self.tree.query((vector - self.mean) / self.scale, k=k)
+        if k == 1:
+            distances, positions = [distances], [positions]
+        return [
+            {
+                'id': int(self.ids[position]),
+                'phase': self.phases[position],
+                'quality_level': self.quality_levels[position],
+                'distance': round(float(distance), 4),
+            }
+            for distance, position in zip(distances, positions)
+        ]
+
+
+def build_indexes(sports_id):
+    """
+    스포츠 하나의 활성 템플릿 → {phase: TemplateIndex, None: 전체 TemplateIndex}
+    표준화는 스포츠 단위로 해서 phase 별 인덱스와 전체 인덱스의 거리가 같음
+    (phase 없이 찾을 때 KD-tree 조회 한 번으로 끝나도록 전체 인덱스를 따로 둠)
+    """
+    ids = []
+    phases = []
+    quality_levels = []
+    vectors = []
+    templates = (
+        ExpertPoseTemplate.objects
+        .filter(sports_id=sports_id, is_active=True)
+        .only('id', 'exercise_phase', 'quality_level', 'keypoints', 'features', 'features_version')
+        .order_by('id')
+    )
+    templates = list(templates)
+    # 저장된 특징이 없거나 특징 정의가 바뀐 템플릿만 계산
+    stale = [
+        template for template in templates
+        if not template.features or template.features_version != FEATURE_SCHEMA_VERSION
+    ]
+    computed = extract_template_features(stale)
+    stale_ids = {template.id for template in stale}
+    for template in templates:
+        features = computed.get(template.id) if template.id in stale_ids else template.features
+        if features is None:
+            # 좌표 형식이 잘못된 템플릿은 제외
+            continue
+        ids.append(template.id)
+        phases.append(template.exercise_phase)
+        quality_levels.append(template.quality_level)
+        vectors.append(normalize_features(features))
+    if not ids:
+        return {}
+
+    vectors = np.asarray(vectors, dtype=np.float64)
+    mean = vectors.mean(axis=0)
+    scale = vectors.std(axis=0)
+    # 모든 템플릿이 같은 값인 특징은 표준화하지 않음
+    scale = np.where(scale > 1e-9, scale, 1.0)
+
+    indexes = {None: TemplateIndex(ids, phases, quality_levels, vectors, mean, scale)}
+    phases_array = np.asarray(phases)
+    for phase in sorted(set(phases)):
+        rows = np.flatnonzero(phases_array == phase)
+        indexes[phase] = TemplateIndex(
+            [ids[i] for i in rows], [phase] * len(rows), [quality_levels[i] for i in rows],
+            vectors[rows], mean, scale,
+        )
+    return indexes
+
+
+class TemplateIndexRegistry:
+    """Sports.id → {phase: TemplateIndex} (처음 조회할 때 생성, 무효화 또는 TTL 만료 시 다시 생성)"""
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._indexes = {}  # sports_id → (생성 시각, {phase: TemplateIndex})
+        self._lock = threading.Lock()
+
+        # 카운터
+        self.builds = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_settings(cls):
+        return cls(ttl=getattr(settings, 'POSE_TEMPLATE_INDEX_TTL', 300))
+
+    def is_fresh(self, sports_id):
+        """DB 조회 없이 바로 쓸 수 있는 인덱스가 있으면 True (비동기 코드에서 get 전에 확인)"""
+        entry = self._indexes.get(sports_id)
+        return entry is not None and time.monotonic() - entry[0] < self.ttl
+
+    def get(self, sports_id):
+        entry = self._indexes.get(sports_id)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        with self._lock:
+            entry = self._indexes.get(sports_id)
+            if entry is None or time.monotonic() - entry[0] >= self.ttl:
+                indexes = build_indexes(sports_id)
+                # 요청으로 들어온 없는 스포츠 ID 까지 보관하면 캐시가 끝없이 커지므로 있는 스포츠만 보관
+                if not indexes and not Sports.objects.filter(id=sports_id).exists():
+                    self._indexes.pop(sports_id, None)
+                    return indexes
+                entry = (time.monotonic(), indexes)
+                self._indexes[sports_id] = entry
+                self.builds += 1
+            return entry[1]
+
+    def invalidate(self, sports_id=None):
+        """sports_id 가 None 이면 전체 무효화"""
+        with self._lock:
+            if sports_id is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(sports_id, None)
+            self.invalidations += 1
+
+    def nearest(self, sports_id, features, k=3, phase=None):
+        """
+        특징 dict (extract_features 결과) → 가까운 템플릿 k 개
+        phase 가 없으면 모든 phase 에서 찾음
+        반환값: [{'id', 'phase', 'quality_level', 'distance'}, ...] (가까운 순)
+        """
+        index = self.get(sports_id).get(phase)
+        if index is None:
+            return []
+        return index.query(np.asarray(normalize_features(features), dtype=np.float64), k)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sports': len(self._indexes),
+                'templates': sum(
+                    len(indexes[None]) for _, indexes in self._indexes.values() if indexes
+                ),
+                'ttl': self.ttl,
+                'builds': self.builds,
+                'invalidations': self.invalidations,
+            }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_template_indexes():
+    """프로세스 전역 TemplateIndexRegistry (처음 사용할 때 생성)"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = TemplateIndexRegistry.from_settings()
+    return _registry
+
+
+def invalidate_template_index(sports_id=None):
+    if _registry is not None:
+        _registry.invalidate(sports_id)
+
+
+def nearest_templates(sports_id, keypoints, k=3, phase=None):
+    """키포인트 리스트 → 가까운 전문가 템플릿 k 개 (좌표 형식 오류, 알 수 없는 phase 는 ValueError)"""
+    if phase is not None and not (isinstance(phase, str) and phase in PHASES):
+        raise ValueError(f'phase는 {", ".join(sorted(PHASES))} 중 하나여야 합니다.')
+    return get_template_indexes().nearest(sports_id, extract_features(keypoints), k=k, phase=phase)
@@ -1,3 +1,1454 @@
-from django.test import TestCase
+import contextlib
+import io
+import os
+import random
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .exercise_phase import PhaseTracker
+from .feedback import EXERCISE_PLANS, generate_feedback, get_plan
+from .feedback_batch import evaluate_batch, to_feedback_list
+from .forest_export import FlatForest, export_forest, forest_path
+from .keypoints import KEYPOINT_NAMES, Pose, keypoints_to_array_many, parse_pose
+from .ml_utils import FEATURE_SCHEMA_VERSION, extract_features, extract_features_many, normalize_features
+from .model_registry import ModelRegistry
+from .models import EmotionVideo, Sports, WorkoutSession, PoseFrame, ExpertPoseTemplate, ExpertPoseTrack
+from .sequence_alignment import IncrementalAlignment
+from .session_frames import (
+    archive_month, archive_sessions, cold_archive_path, compact_session, iter_session_frames, read_frames_archive,
+    session_archive_bytes
+)
+from .session_summary import (
+    SessionSummaryStore, flush_evicted_summaries, flush_session_summary, has_evicted_summaries
+)
+
+KEYPOINTS = [
+    {'name': 'nose', 'x': 0.5, 'y': 0.3, 'score': 0.9},
+    {'name': 'left_shoulder', 'x': 0.4, 'y': 0.5, 'score': 0.85},
+    {'name': 'right_shoulder', 'x': 0.6, 'y': 0.5, 'score': 0.85},
+]
+
+
+class SessionCompactionTests(TestCase):
+    """세션 프레임 압축을 여러 번 실행해도 프레임을 잃지 않는지"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(
+            MEDIA_ROOT=self.media_root, POSE_ARCHIVE_DIR=os.path.join(self.media_root, 'pose_archive')
+        )
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = User.objects.create_user(username='tester', password='pass')
+        self.sports = Sports.objects.create(name='목풀기')
+        self.session = WorkoutSession.objects.create(user=self.user, sports=self.sports)
+
+    def add_frames(self, start, count):
+        PoseFrame.objects.bulk_create([
+            PoseFrame.from_keypoints(KEYPOINTS, session=self.session, timestamp=float(t))
+            for t in range(start, start + count)
+        ])
+
+    def test_compact_twice_keeps_frames(self):
+        self.add_frames(0, 50)
+        self.assertEqual(compact_session(self.session), 50)
+        self.assertEqual(compact_session(self.session), 0)
+
+        self.assertEqual(self.session.pose_frames.count(), 0)
+        self.assertEqual(len(list(iter_session_frames(self.session))), 50)
+
+    def test_compact_again_merges_new_frames(self):
+        self.add_frames(0, 50)
+        compact_session(self.session)
+        old_archive = self.session.frames_archive.name
+        self.add_frames(50, 10)
+
+        self.assertEqual(compact_session(self.session), 10)
+        self.assertNotEqual(self.session.frames_archive.name, old_archive)
+        self.assertFalse(self.session.frames_archive.storage.exists(old_archive))
+        timestamps = [frame['timestamp'] for frame in iter_session_frames(self.session)]
+        self.assertEqual(timestamps, [float(t) for t in range(60)])
+
+    def test_archive_rerun_keeps_late_frames(self):
+        # 이전 실행이 zip 항목만 쓰고 중단된 뒤 새 프레임이 들어온 경우
+        self.add_frames(0, 50)
+        path = cold_archive_path(f'{archive_month(self.session)}.zip')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with zipfile.ZipFile(path, 'a') as archive_zip:
+            archive_zip.writestr(f'session_{self.session.id}.npz', session_archive_bytes(self.session))
+        self.add_frames(50, 10)
+
+        archive_sessions(archive_month(self.session), [self.session])
+
+        self.assertEqual(self.session.pose_frames.count(), 0)
+        self.assertEqual(len(list(iter_session_frames(self.session))), 60)
+
+    def test_archive_is_read_in_chunks(self):
+        PoseFrame.objects.bulk_create([
+            PoseFrame.from_keypoints(KEYPOINTS, session=self.session, timestamp=t / 10, feedback=generate_feedback(KEYPOINTS))
+            for t in range(25)
+        ])
+        expected = list(iter_session_frames(self.session))
+        compact_session(self.session)
+        self.add_frames(100, 3)
+        expected += list(iter_session_frames(self.session, start=100))
+
+        self.assertEqual(list(iter_session_frames(self.session, chunk_size=7)), expected)
+        self.assertEqual(
+            list(iter_session_frames(self.session, start=0.5, end=1.2, chunk_size=4)),
+            [frame for frame in expected if 0.5 <= frame['timestamp'] <= 1.2],
+        )
+
+        archive_sessions(archive_month(self.session), [self.session])
+        self.session.refresh_from_db()
+        self.assertEqual(list(iter_session_frames(self.session, chunk_size=7)), expected)
+
+    def feedback_samples(self):
+        nose_left = [dict(kp, x=0.4) if kp['name'] == 'nose' else kp for kp in KEYPOINTS]
+        with_phase = generate_feedback(nose_left, 'neck_left')
+        with_phase['phase'] = {'name': 'peak', 'previous': 'middle', 'reps': 2, 'hold_seconds': 0.5}
+        with_corrections = generate_feedback(KEYPOINTS)
+        with_corrections['corrections'] = {'nose': {'x': 0.1}}
+        return [
+            generate_feedback(KEYPOINTS),
+            with_phase,
+            generate_feedback(nose_left, 'neck_right'),
+            generate_feedback(KEYPOINTS[:1], 'shoulder_left'),
+            generate_feedback([dict(KEYPOINTS[0], score=1.5)]),
+            with_corrections,
+            None,
+            {'status': 'good', 'messages': [], 'corrections': {}, 'angles': {}, 'has_warnings': False},
+        ]
+
+    def test_feedback_columns_round_trip(self):
+        samples = self.feedback_samples() * 3
+        PoseFrame.objects.bulk_create([
+            PoseFrame.from_keypoints(KEYPOINTS, session=self.session, timestamp=float(t), feedback=feedback)
+            for t, feedback in enumerate(samples)
+        ])
+        compact_session(self.session)
+
+        with self.session.frames_archive.open('rb') as fileobj:
+            archive = read_frames_archive(fileobj)
+        self.assertEqual(int(archive['version']), 2)
+        self.assertEqual(archive['feedback'], samples)
+        # 열로 나타낼 수 없는 피드백 (corrections, None) 만 JSON 줄로 보관
+        self.assertEqual(int(archive['feedback_raw'].sum()), 6)
+        self.assertEqual([frame['feedback'] for frame in iter_session_frames(self.session, chunk_size=5)], samples)
+
+        archive_sessions(archive_month(self.session), [self.session])
+        self.session.refresh_from_db()
+        self.assertEqual([frame['feedback'] for frame in iter_session_frames(self.session, chunk_size=5)], samples)
+
+    def test_reads_version_1_archive(self):
+        import json
+        from django.core.files.base import ContentFile
+
+        samples = self.feedback_samples()
+        # 압축 이후에 들어온 행 (압축본의 frame id 는 그보다 작게)
+        self.add_frames(100, 2)
+        first_id = self.session.pose_frames.order_by('id').first().id
+        buffer = io.BytesIO()
+        np.savez_compressed(
+            buffer,
+            version=np.array(1),
+            frame_ids=np.arange(first_id - len(samples), first_id, dtype=np.int64),
+            timestamps=np.arange(len(samples), dtype=np.float64),
+            keypoints=np.full((len(samples), len(KEYPOINT_NAMES), 3), np.nan, dtype=np.float32),
+            status=np.zeros(len(samples), dtype=np.int8),
+            feedback=np.frombuffer(
+                '\n'.join(json.dumps(feedback, ensure_ascii=False) for feedback in samples).encode('utf-8'),
+                dtype=np.uint8,
+            ),
+        )
+        self.session.frames_archive.save('session_v1.npz', ContentFile(buffer.getvalue()))
+
+        frames = list(iter_session_frames(self.session, chunk_size=3))
+        self.assertEqual([frame['feedback'] for frame in frames[:len(samples)]], samples)
+        self.assertEqual(len(frames), len(samples) + 2)
+        self.assertEqual(read_frames_archive(io.BytesIO(buffer.getvalue()))['feedback'], samples)
+        # 남은 행과 합쳐 다시 묶으면 형식 버전 2
+        self.assertEqual(int(read_frames_archive(io.BytesIO(session_archive_bytes(self.session)))['version']), 2)
+
+    def test_frames_endpoint_is_paginated(self):
+        self.add_frames(0, 30)
+        compact_session(self.session)
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        pages = []
+        offset = 0
+        while offset is not None:
+            response = client.get(f'/api/workout/{self.session.id}/frames/', {'offset': offset, 'limit': 8})
+            self.assertEqual(response.status_code, 200)
+            pages.append(response.data['count'])
+            offset = response.data['next_offset']
+        self.assertEqual(pages, [8, 8, 8, 6])
+        self.assertEqual(client.get(f'/api/workout/{self.session.id}/frames/', {'limit': 100000}).status_code, 400)
+
+    @override_settings(POSE_COMPACT_ON_END=True)
+    def test_end_session_twice_compacts_once(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with mock.patch('emodia.views.compact_session_in_background') as compact:
+            first = client.patch(f'/api/workout/{self.session.id}/end/')
+            second = client.patch(f'/api/workout/{self.session.id}/end/')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.data['end_time'], first.data['end_time'])
+        compact.assert_called_once_with(self.session.id)
+
+    def test_frame_features_are_opt_in(self):
+        frame = PoseFrame.from_keypoints(KEYPOINTS, session=self.session, timestamp=0.0)
+        frame.save()
+        self.assertIsNone(frame.features_packed)
+
+        with override_settings(POSE_FRAME_FEATURES=True):
+            frame = PoseFrame.from_keypoints(KEYPOINTS, session=self.session, timestamp=1.0)
+        self.assertIsNotNone(frame.features_packed)
+
+
+class WorkoutSessionEndTests(TestCase):
+    """세션 종료 시 요약을 덮어쓰지 않고, 종료된 세션이나 다른 사용자의 세션에 보낸 프레임은 거부하는지"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tester', password='pass')
+        self.session = WorkoutSession.objects.create(user=self.user, sports=Sports.objects.create(name='목풀기'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_end_keeps_concurrent_summary_merge(self):
+        def flush(session_id, discard=False):
+            merged = flush_session_summary(session_id, discard=discard)
+            # 그 사이 다른 작업 프로세스가 누적값을 더한 경우
+            WorkoutSession.objects.filter(id=session_id).update(summary={'frames': 99})
+            return merged
+
+        with mock.patch('emodia.views.flush_session_summary', side_effect=flush):
+            response = self.client.patch(f'/api/workout/{self.session.id}/end/')
+        self.assertEqual(response.status_code, 200)
+        self.session.refresh_from_db()
+        self.assertIsNotNone(self.session.end_time)
+        self.assertEqual(self.session.summary, {'frames': 99})
+
+    def test_frames_after_end_are_rejected(self):
+        self.client.patch(f'/api/workout/{self.session.id}/end/')
+        single = self.client.post(
+            '/api/pose/submit/', {'session': self.session.id, 'timestamp': 0.0, 'keypoints': KEYPOINTS}, format='json'
+        )
+        batch = self.client.post('/api/pose/submit_batch/', {
+            'session': self.session.id, 'frames': [{'timestamp': 0.0, 'keypoints': KEYPOINTS}],
+        }, format='json')
+
+        self.assertEqual(single.status_code, 400)
+        self.assertEqual(batch.status_code, 400)
+        self.assertEqual(self.session.pose_frames.count(), 0)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.summary, {})
+
+    def test_frames_for_other_users_session_are_rejected(self):
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(username='other', password='pass'))
+        single = other.post(
+            '/api/pose/submit/', {'session': self.session.id, 'timestamp': 0.0, 'keypoints': KEYPOINTS}, format='json'
+        )
+        batch = other.post('/api/pose/submit_batch/', {
+            'session': self.session.id, 'frames': [{'timestamp': 0.0, 'keypoints': KEYPOINTS}],
+        }, format='json')
+
+        self.assertEqual(single.status_code, 400)
+        self.assertEqual(batch.status_code, 400)
+        self.assertEqual(self.session.pose_frames.count(), 0)
+
+
+class SessionSummaryEvictionTests(TestCase):
+    """메모리에서 내보낸 세션의 요약 누적값이 DB 에 더해지는지"""
+
+    def setUp(self):
+        user = User.objects.create_user(username='tester', password='pass')
+        sports = Sports.objects.create(name='목풀기')
+        self.sessions = [WorkoutSession.objects.create(user=user, sports=sports) for _ in range(3)]
+
+    def test_evicted_summary_is_flushed(self):
+        store = SessionSummaryStore(max_sessions=2, flush_frames=300)
+        with mock.patch('emodia.session_summary._store', store):
+            for session in self.sessions:
+                for t in range(10):
+                    store.record(session.id, generate_feedback(KEYPOINTS), float(t))
+            self.assertTrue(has_evicted_summaries())
+            self.assertEqual(flush_evicted_summaries(), 1)
+            for session in self.sessions:
+                flush_session_summary(session.id, discard=True)
+
+        for session in self.sessions:
+            session.refresh_from_db()
+            self.assertEqual(session.summary['frames'], 10)
+
+
+class FeatureParityTests(TestCase):
+    """학습(일괄)과 서빙(한 프레임) 특징 추출이 같은 값과 같은 검증을 쓰는지"""
+
+    def setUp(self):
+        self.keypoints = [
+            {'name': name, 'x': 0.1 + 0.04 * i, 'y': 0.2 + 0.03 * i, 'score': 0.9}
+            for i, name in enumerate(KEYPOINT_NAMES)
+        ]
+
+    def test_unknown_and_duplicate_names(self):
+        keypoints = self.keypoints + [
+            {'name': 'left_eye_inner', 'x': 0.5, 'y': 0.5, 'score': 0.1},
+            {'name': 'nose', 'x': 0.9, 'y': 0.9, 'score': 0.2},
+            {'name': 'left_wrist', 'x': 0.3, 'y': 0.3},
+        ]
+        keypoints[9] = {'name': 'left_wrist', 'x': 0.3, 'y': 0.3}
+        single = extract_features(keypoints)
+        batch = extract_features_many([keypoints])[0]
+
+        self.assertAlmostEqual(single['avg_confidence'], 0.9)
+        self.assertEqual(single['min_confidence'], 0.9)
+        for name, value in single.items():
+            self.assertAlmostEqual(batch[name], value, places=9, msg=name)
+
+    def test_invalid_values_raise_in_both(self):
+        for invalid in ({'score': 1.5}, {'score': -0.1}, {'x': float('nan')}, {'y': float('inf')}, {'score': None}):
+            keypoints = [dict(self.keypoints[0], **invalid)] + self.keypoints[1:]
+            with self.subTest(invalid=invalid):
+                with self.assertRaises(ValueError):
+                    extract_features(keypoints)
+                with self.assertRaises(ValueError):
+                    extract_features_many([self.keypoints, keypoints])
+
+
+@override_settings(POSE_KEYPOINT_STORAGE='packed', POSE_WRITE_BEHIND=False)
+class PackedKeypointStorageTests(TestCase):
+    """packed 저장 형식에서도 형식이 잘못된 키포인트가 JSON 형식과 같이 처리되는지"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tester', password='pass')
+        self.session = WorkoutSession.objects.create(user=self.user, sports=Sports.objects.create(name='목풀기'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_valid_keypoints_are_packed(self):
+        response = self.client.post(
+            '/api/pose/submit/', {'session': self.session.id, 'timestamp': 0.0, 'keypoints': KEYPOINTS}, format='json'
+        )
+        self.assertEqual(response.status_code, 201)
+        frame = PoseFrame.objects.get(id=response.data['id'])
+        self.assertIsNone(frame.keypoints)
+        self.assertEqual(frame.get_keypoints(), KEYPOINTS)
+
+    def test_malformed_keypoints_are_stored_as_json(self):
+        for t, keypoints in enumerate(['abc', [{'name': 'nose', 'x': 'a', 'y': 0}], [1, 2]]):
+            with self.subTest(keypoints=keypoints):
+                response = self.client.post(
+                    '/api/pose/submit/', {'session': self.session.id, 'timestamp': float(t), 'keypoints': keypoints},
+                    format='json'
+                )
+                self.assertEqual(response.status_code, 201)
+                self.assertTrue(response.data['feedback']['messages'][0].startswith('인식 오류'))
+                frame = PoseFrame.objects.get(id=response.data['id'])
+                self.assertIsNone(frame.keypoints_packed)
+                self.assertEqual(frame.keypoints, keypoints)
+
+        response = self.client.post('/api/pose/submit_batch/', {
+            'session': self.session.id,
+            'frames': [{'timestamp': 10.0, 'keypoints': [1, 2]}, {'timestamp': 11.0, 'keypoints': KEYPOINTS}],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['kept'], 2)
+        self.assertEqual(self.session.pose_frames.filter(keypoints_packed__isnull=False).count(), 1)
+
+
+class ParsePoseTests(TestCase):
+    """parse_pose: 첫 번째 이름 우선, 모르는 이름 무시, 잘못된 값은 ValueError (keypoints_to_array_many 와 같은 규칙)"""
+
+    def test_first_name_wins_and_unknown_names_are_ignored(self):
+        keypoints = KEYPOINTS + [
+            {'name': 'nose', 'x': 0.9, 'y': 0.9, 'score': 0.1},
+            {'name': 'tail', 'x': 0.1, 'y': 0.1, 'score': 0.2},
+        ]
+        pose = parse_pose(keypoints)
+
+        nose, left, right = (KEYPOINT_NAMES.index(kp['name']) for kp in KEYPOINTS)
+        self.assertEqual((pose.x[nose], pose.y[nose]), (0.5, 0.3))
+        self.assertTrue(pose.has(nose, left, right))
+        self.assertEqual(sum(pose.present), 3)
+        self.assertAlmostEqual(pose.score_sum, 0.9 + 0.85 + 0.85)
+        self.assertEqual((pose.score_count, pose.score_min), (3, 0.85))
+        self.assertIs(parse_pose(pose), pose)
+
+        arr = keypoints_to_array_many([keypoints])[0]
+        self.assertEqual(arr[nose].tolist(), [0.5, 0.3, 0.9])
+        self.assertEqual(int((~np.isnan(arr[:, 0])).sum()), 3)
+
+    def test_invalid_values_raise_value_error(self):
+        cases = {
+            'not a list': 5,
+            'not a dict': [1, 2],
+            'missing name': [{'x': 0.1, 'y': 0.1}],
+            'missing coordinate': [{'name': 'nose', 'x': 0.1}],
+            'string coordinate': [{'name': 'nose', 'x': 'a', 'y': 0.1}],
+            'nan coordinate': [{'name': 'nose', 'x': float('nan'), 'y': 0.1}],
+            'inf coordinate': [{'name': 'nose', 'x': 0.1, 'y': float('inf')}],
+            'score out of range': [dict(KEYPOINTS[0], score=1.5)],
+            # 모르는 이름의 score 도 검증은 함
+            'unknown name score': KEYPOINTS + [{'name': 'tail', 'x': 0.1, 'y': 0.1, 'score': -0.1}],
+        }
+        for case, keypoints in cases.items():
+            with self.subTest(case):
+                with self.assertRaises(ValueError):
+                    parse_pose(keypoints)
+                with self.assertRaises(ValueError):
+                    keypoints_to_array_many([KEYPOINTS, keypoints])
+
+    def test_from_array_matches_parse_pose(self):
+        keypoints = KEYPOINTS + [{'name': 'left_hip', 'x': 0.45, 'y': 0.8}]
+        expected = parse_pose(keypoints)
+        pose = Pose.from_array(keypoints_to_array_many([keypoints])[0])
+
+        for name in ('x', 'y', 'present', 'score_count', 'score_min'):
+            self.assertEqual(getattr(pose, name), getattr(expected, name), name)
+        self.assertAlmostEqual(pose.score_sum, expected.score_sum)
+
+        empty = Pose.from_array(keypoints_to_array_many([[]])[0])
+        self.assertFalse(any(empty.present))
+        self.assertEqual((empty.score_count, empty.score_min), (0, None))
+
+
+class ModelRegistryTests(TestCase):
+    """활성 모델 레지스트리가 있는 스포츠만 보관하고 모델 파일을 전역 잠금 밖에서 불러오는지"""
+
+    def setUp(self):
+        self.sports = Sports.objects.create(name='목풀기')
+        self.registry = ModelRegistry(check_interval=60.0)
+
+    def test_unknown_sports_are_not_cached(self):
+        for sports_id in range(self.sports.id + 1, self.sports.id + 100):
+            self.assertIsNone(self.registry.get(sports_id))
+        self.assertIsNone(self.registry.get(self.sports.id))
+
+        self.assertEqual(self.registry.stats()['sports'], 1)
+        self.assertTrue(self.registry.is_fresh(self.sports.id))
+
+    def test_model_is_loaded_outside_registry_lock(self):
+        def load(model_id):
+            # 불러오는 동안 다른 스포츠 조회가 전역 잠금을 잡을 수 있어야 함
+            self.assertTrue(self.registry._lock.acquire(blocking=False))
+            self.registry._lock.release()
+            return mock.Mock(token=(model_id, 'model.pkl'), version='v1')
+
+        with mock.patch('emodia.model_registry.active_model_token', return_value=(7, 'model.pkl')), \
+                mock.patch('emodia.model_registry.load_model', side_effect=load) as load_model:
+            loaded = self.registry.get(self.sports.id)
+            self.registry.invalidate(self.sports.id)
+            self.assertIs(self.registry.get(self.sports.id), loaded)
+
+        load_model.assert_called_once_with(7)
+        self.assertEqual(self.registry.stats()['loads'], 1)
+
+
+class ForestExportTests(TestCase):
+    """평탄화 배열 평가기가 sklearn 과 정확히 같은 결과를 내는지"""
+
+    def make_forest(self, seed, n_classes=3, missing=False):
+        from sklearn.ensemble import RandomForestClassifier
+
+        rng = np.random.default_rng(seed)
+        X = rng.normal(size=(300, 10)).astype(np.float32)
+        y = (X[:, 0] > 0).astype(int) + (X[:, 1] > 0.5) * (n_classes - 2)
+        if missing:
+            X[rng.random(X.shape) < 0.1] = np.nan
+        estimator = RandomForestClassifier(n_estimators=15, max_depth=8 if seed % 2 else None, random_state=seed)
+        return estimator.fit(X, y), rng
+
+    def test_predict_proba_matches_sklearn_exactly(self):
+        for seed in range(6):
+            estimator, rng = self.make_forest(seed, n_classes=2 + seed % 2, missing=seed >= 3)
+            forest = FlatForest.from_estimator(estimator)
+            with self.subTest(seed=seed):
+                # 무작위 샘플, 분기 기준값과 정확히 같은 샘플, NaN 이 섞인 샘플, 샘플 1개
+                self.assertTrue(forest.matches(estimator, samples=500, rng=rng))
+                X = rng.normal(size=(200, 10))
+                X[rng.random(X.shape) < 0.2] = np.nan
+                self.assertTrue(np.array_equal(forest.predict_proba(X), estimator.predict_proba(X)))
+                self.assertTrue(np.array_equal(forest.predict_proba(X[:1]), estimator.predict_proba(X[:1])))
+
+    def test_mismatch_leaves_no_file(self):
+        estimator, _ = self.make_forest(0)
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        model_path = os.path.join(directory, 'model.pkl')
+
+        path = export_forest(estimator, model_path, check_samples=100)
+        self.assertEqual(path, forest_path(model_path))
+        self.assertEqual(os.listdir(directory), [os.path.basename(path)])
+
+        with mock.patch.object(FlatForest, 'matches', return_value=False):
+            with self.assertRaises(ValueError):
+                export_forest(estimator, model_path, check_samples=100)
+        self.assertEqual(os.listdir(directory), [])
+
+
+class IncrementalAlignmentTests(TestCase):
+    """실시간 증분 DTW 가 잘못된 프레임과 빈 궤적을 처리하는지"""
+
+    def make_track(self, frames):
+        track = ExpertPoseTrack(id=1, sample_fps=10.0)
+        keypoints = np.tile(np.asarray(PoseFrame.from_keypoints(KEYPOINTS).keypoint_array()), (frames, 1, 1))
+        track.set_arrays(np.arange(frames) / 10.0, keypoints)
+        return track
+
+    def test_malformed_frames_are_treated_as_missing(self):
+        alignment = IncrementalAlignment(self.make_track(50), window_seconds=1.0)
+        frames = [KEYPOINTS, [1, 2], 'abc', [{'name': 'nose', 'x': float('inf'), 'y': 0.0}], None, KEYPOINTS]
+        for t, keypoints in enumerate(frames):
+            state = alignment.push(t / 10.0, keypoints)
+        self.assertEqual(state['frames'], len(frames))
+        self.assertIsNotNone(state['score'])
+
+    def test_empty_track_is_refused(self):
+        with self.assertRaises(ValueError):
+            IncrementalAlignment(self.make_track(0))
+
+
+class BatchFeedbackParityTests(TestCase):
+    """일괄 피드백 엔진이 프레임별 generate_feedback 과 정확히 같은 결과를 내는지 (고정 시드 무작위 프레임)"""
+
+    def random_keypoints(self, rng):
+        keypoints = []
+        for name in KEYPOINT_NAMES + ('left_eye_inner',):
+            if rng.random() < 0.12:
+                continue
+            keypoint = {'name': name, 'x': rng.uniform(0.2, 0.8), 'y': rng.uniform(0.2, 0.8)}
+            if name == 'nose' and rng.random() < 0.1:
+                # 규칙 기준값 부근
+                keypoint['x'] = 0.5 + rng.choice([-0.09, -0.06, -0.04, 0.04, 0.06, 0.09])
+            if rng.random() < 0.9:
+                keypoint['score'] = rng.random()
+            keypoints.append(keypoint)
+            if rng.random() < 0.05:
+                # 같은 이름이 여러 번 나오면 첫 번째 사용
+                keypoints.append({'name': name, 'x': rng.random(), 'y': rng.random(), 'score': rng.random()})
+        rng.shuffle(keypoints)
+        return keypoints
+
+    def test_batch_matches_scalar(self):
+        rng = random.Random(7)
+        frames = [self.random_keypoints(rng) for _ in range(2000)]
+        arr = keypoints_to_array_many(frames)
+        for exercise_type in EXERCISE_PLANS:
+            batch = to_feedback_list(evaluate_batch(arr, exercise_type))
+            with self.subTest(exercise_type=exercise_type):
+                for i, (keypoints, feedback) in enumerate(zip(frames, batch)):
+                    self.assertEqual(feedback, generate_feedback(keypoints, exercise_type), msg=f'frame {i}')
+
+
+class TemplateFeatureFallbackTests(TestCase):
+    """형식이 잘못된 템플릿 하나 때문에 특징 추출/학습 데이터 로드 전체가 실패하지 않는지"""
+
+    def setUp(self):
+        sports = Sports.objects.create(name='목풀기')
+        self.sports_id = sports.id
+        for i in range(11):
+            ExpertPoseTemplate.objects.create(
+                sports=sports, exercise_phase='start', quality_level=('good', 'warning')[i % 2],
+                keypoints=[dict(kp, x=kp['x'] + 0.01 * i) for kp in KEYPOINTS],
+                description='', created_by='expert',
+            )
+        self.bad = ExpertPoseTemplate.objects.order_by('id').first()
+        # 저장 시 검증을 거치지 않은 잘못된 좌표 + 오래된 특징 버전
+        ExpertPoseTemplate.objects.filter(id=self.bad.id).update(
+            keypoints=[dict(KEYPOINTS[0], score=1.5)] + KEYPOINTS[1:]
+        )
+        ExpertPoseTemplate.objects.update(features=None, features_version='')
+
+    def test_admin_action_skips_bad_templates(self):
+        from django.contrib.admin.sites import site
+
+        model_admin = site._registry[ExpertPoseTemplate]
+        with mock.patch.object(model_admin, 'message_user') as message_user:
+            model_admin.extract_features_action(None, ExpertPoseTemplate.objects.all())
+
+        self.assertEqual(ExpertPoseTemplate.objects.filter(features__isnull=False).count(), 10)
+        self.assertIsNone(ExpertPoseTemplate.objects.get(id=self.bad.id).features)
+        self.assertIn(str(self.bad.id), message_user.call_args_list[-1].args[1])
+
+    def test_load_training_data_skips_bad_templates(self):
+        from .train_model import load_training_data
+
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            X, y = load_training_data(self.sports_id)
+        self.assertIn(f'ID: {self.bad.id}', output.getvalue())
+        self.assertEqual(len(X), 10)
+        self.assertEqual(len(y), 10)
+
+
+class PhaseTrackerTests(TestCase):
+    """운동 단계 판정 (반복 횟수, 되돌아갈 때의 여유값, 최대 자세 유지 시간)"""
+
+    def setUp(self):
+        self.plan = get_plan('neck_left')
+
+    def pose(self, value):
+        """진행도가 value 인 목 스트레칭 자세 (코가 어깨 중심에서 왼쪽으로 value 만큼)"""
+        pose = parse_pose([dict(kp, x=0.5 - value) if kp['name'] == 'nose' else kp for kp in KEYPOINTS])
+        self.assertAlmostEqual(self.plan.progress.value(pose), value)
+        return pose
+
+    def run_values(self, tracker, values, step=0.1):
+        return [tracker.update(self.pose(value), 'good', i * step) for i, value in enumerate(values)]
+
+    def test_counts_full_reps_only(self):
+        tracker = PhaseTracker(self.plan, window=1)
+        phases = self.run_values(tracker, [0.0, 0.06, 0.12, 0.12, 0.05, 0.0, 0.06, 0.0])
+
+        self.assertEqual(
+            [phase['name'] for phase in phases],
+            ['start', 'middle', 'peak', 'peak', 'end', 'start', 'middle', 'start'],
+        )
+        # 최대 자세까지 가지 않고 돌아온 두 번째 동작은 세지 않음
+        self.assertEqual(phases[5]['previous'], 'end')
+        self.assertEqual(phases[-1]['reps'], 1)
+        self.assertEqual(tracker.reps, 1)
+
+    def test_hysteresis_keeps_phase_near_threshold(self):
+        tracker = PhaseTracker(self.plan, window=1)
+        phases = self.run_values(tracker, [0.12, 0.08, 0.085, 0.07])
+        # peak 기준값(0.09) 아래로 조금 내려가도 (peak - rest) * 0.25 만큼 더 내려가야 end
+        self.assertEqual([phase['name'] for phase in phases], ['peak', 'peak', 'peak', 'end'])
+
+    def test_hold_seconds(self):
+        tracker = PhaseTracker(self.plan, window=1)
+        pose = self.pose(0.12)
+        holds = [tracker.update(pose, 'good', timestamp)['hold_seconds'] for timestamp in (0.0, 0.5, 1.0, 3.0, 3.5)]
+        # max_gap(1초)보다 긴 공백은 유지 시간에 더하지 않음
+        self.assertEqual(holds, [0.0, 0.5, 1.0, 1.0, 1.5])
+
+        self.assertEqual(tracker.update(self.pose(0.0), 'good', 3.6)['hold_seconds'], 0.0)
+
+    def test_missing_pose_keeps_phase(self):
+        tracker = PhaseTracker(self.plan, window=1)
+        self.run_values(tracker, [0.12])
+        phase = tracker.update(None, 'error', 0.1)
+        self.assertEqual(phase['name'], 'peak')
+        self.assertIsNone(phase['previous'])
+
+    @override_settings(POSE_SMOOTHING=True)
+    def test_session_ingest_reports_phase(self):
+        from .session_state import discard_session_state, get_ingest_policy, session_ingest
+        from .session_summary import flush_session_summary
+
+        user = User.objects.create_user(username='phase', password='pw')
+        session = WorkoutSession.objects.create(user=user, sports=Sports.objects.create(name='목풀기'))
+        policy = get_ingest_policy(session)
+        values = [0.0] * 3 + [0.12] * 8 + [0.0] * 8
+        for i, value in enumerate(values):
+            keypoints = [dict(kp, x=0.5 - value) if kp['name'] == 'nose' else kp for kp in KEYPOINTS]
+            feedback, _ = session_ingest(session.id, policy, keypoints, 'neck_left', i * 0.1)
+        self.assertEqual(feedback['phase']['reps'], 1)
+        discard_session_state(session.id)
+        flush_session_summary(session.id, discard=True)
+
+
+@override_settings(POSE_FEEDBACK_CACHE=True)
+class FeedbackCacheTests(TestCase):
+    """캐시 적중 전에 검증하는지, 관리자 상태 조회 API"""
+
+    def test_invalid_frame_is_not_served_from_cache(self):
+        from .feedback_cache import FeedbackCache
+
+        cache = FeedbackCache()
+        keypoints = [dict(kp, x=0.4 if kp['name'] == 'nose' else kp['x']) for kp in KEYPOINTS]
+        cache.feedback(keypoints, 'neck_left')
+        # 키에 쓰이지 않는 키포인트의 score 만 범위를 벗어난 프레임 (같은 캐시 키)
+        invalid = keypoints + [{'name': 'left_wrist', 'x': 0.3, 'y': 0.3, 'score': 1.5}]
+
+        self.assertEqual(cache.feedback(invalid, 'neck_left'), generate_feedback(invalid, 'neck_left'))
+        self.assertTrue(cache.feedback(invalid, 'neck_left')['messages'][0].startswith('인식 오류'))
+        self.assertEqual(cache.hits, 0)
+        self.assertEqual(cache.feedback(keypoints, 'neck_left'), generate_feedback(keypoints, 'neck_left'))
+        self.assertEqual(cache.hits, 1)
+
+    def test_stats_endpoints_are_admin_only(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='member', password='pw'))
+        admin = User.objects.create_user(username='admin', password='pw', is_staff=True)
+        urls = (
+            '/api/pose/feedback/stats/', '/api/pose/session_state/stats/',
+            '/api/pose/estimate/stats/', '/api/pose/classify/models/stats/',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(client.get(url).status_code, 403)
+        client.force_authenticate(admin)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(client.get(url).status_code, 200)
+        self.assertTrue(client.get('/api/pose/feedback/stats/').data['enabled'])
+        self.assertIn('summaries', client.get('/api/pose/session_state/stats/').data)
+
+
+class PoseEstimatorPoolTests(TestCase):
+    """영상 임시 파일을 작업이 실제로 끝난 뒤에 지우는지 (시간 초과로 먼저 응답한 경우 포함)"""
+
+    def make_pool(self, timeout):
+        from concurrent.futures import ThreadPoolExecutor
+        from .pose_estimation import PoseEstimatorPool
+
+        pool = PoseEstimatorPool(workers=1, max_queue=4, timeout=timeout)
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        pool._get_executor = lambda: executor
+        return pool
+
+    def test_clip_file_outlives_timed_out_request(self):
+        import threading
+        from .pose_estimation import EstimatorUnavailable
+
+        release = threading.Event()
+        seen = {}
+
+        def fake_estimate_clip(path, max_frames, submitted_at):
+            release.wait(5)
+            # 응답은 이미 시간 초과로 나갔지만 작업은 아직 파일을 읽는 중
+            with open(path, 'rb') as fileobj:
+                seen['data'] = fileobj.read()
+            seen['path'] = path
+            return np.empty((0, len(KEYPOINT_NAMES), 3), dtype=np.float32), [], {
+                'queue_wait': 0.0, 'decode': 0.0, 'inference': 0.0
+            }
+
+        pool = self.make_pool(timeout=0.05)
+        with mock.patch('emodia.pose_estimation._estimate_clip', fake_estimate_clip):
+            with self.assertRaises(EstimatorUnavailable):
+                pool.estimate_clip(io.BytesIO(b'clip'), max_frames=10)
+            release.set()
+            for _ in range(100):
+                if 'path' in seen and not os.path.exists(seen['path']):
+                    break
+                threading.Event().wait(0.01)
+
+        self.assertEqual(seen['data'], b'clip')
+        self.assertFalse(os.path.exists(seen['path']))
+        self.assertEqual(pool.stats()['in_flight'], 0)
+
+    def test_clip_file_removed_when_not_submitted(self):
+        from .pose_estimation import EstimatorBusy, PoseEstimatorPool
+
+        pool = PoseEstimatorPool(workers=1, max_queue=0)
+        pool._get_executor = lambda: None
+        created = []
+        original = tempfile.NamedTemporaryFile
+
+        def named_temporary_file(*args, **kwargs):
+            tmp = original(*args, **kwargs)
+            created.append(tmp.name)
+            return tmp
+
+        with mock.patch('emodia.pose_estimation.tempfile.NamedTemporaryFile', named_temporary_file):
+            with self.assertRaises(EstimatorBusy):
+                pool.estimate_clip(io.BytesIO(b'clip'), max_frames=10)
+        self.assertEqual(len(created), 1)
+        self.assertFalse(os.path.exists(created[0]))
+
+
+class PoseFrameBufferTests(TestCase):
+    """쓰기 지연 버퍼의 일괄 저장, 가득 찬 큐, 저장 실패 카운터"""
+
+    def setUp(self):
+        user = User.objects.create_user(username='buffer', password='pw')
+        self.session = WorkoutSession.objects.create(user=user, sports=Sports.objects.create(name='목풀기'))
+
+    def make_buffer(self, **kwargs):
+        from .pose_buffer import PoseFrameBuffer
+
+        buffer = PoseFrameBuffer(**kwargs)
+        # 테스트 DB 트랜잭션 밖에서 저장하지 않도록 백그라운드 flusher 는 띄우지 않고 직접 flush
+        buffer._stopped.set()
+        return buffer
+
+    def frames(self, count):
+        return [
+            PoseFrame.from_keypoints(KEYPOINTS, session=self.session, timestamp=float(t))
+            for t in range(count)
+        ]
+
+    def test_flush_saves_in_batches(self):
+        buffer = self.make_buffer(batch_size=3)
+        self.assertEqual(buffer.put_many(self.frames(7)), 7)
+        buffer.flush()
+
+        self.assertEqual(self.session.pose_frames.count(), 7)
+        stats = buffer.stats()
+        self.assertEqual((stats['enqueued'], stats['flushed'], stats['flush_count']), (7, 7, 3))
+        self.assertEqual(stats['queue_depth'], 0)
+
+    def test_full_queue_drops(self):
+        buffer = self.make_buffer(max_size=2)
+        self.assertEqual([buffer.put(frame, timeout=0) for frame in self.frames(3)], [True, True, False])
+        self.assertEqual(buffer.stats()['dropped'], 1)
+
+    def test_failed_batches_are_counted(self):
+        from django.db import DatabaseError
+
+        buffer = self.make_buffer(batch_size=2)
+        buffer.put_many(self.frames(3))
+        with mock.patch.object(PoseFrame.objects, 'bulk_create', side_effect=DatabaseError('down')):
+            with self.assertLogs('emodia.pose_buffer', 'ERROR'):
+                buffer.flush()
+
+        stats = buffer.stats()
+        self.assertEqual((stats['failed'], stats['flushed'], stats['queue_depth']), (3, 0, 0))
+        self.assertEqual(self.session.pose_frames.count(), 0)
+
+
+def neck_keypoints(nose_x, score=0.9):
+    """목 스트레칭 프레임 (코 x 좌표만 바꿈, 어깨 중심은 0.5)"""
+    return [dict(kp, x=nose_x, score=score) if kp['name'] == 'nose' else dict(kp, score=score) for kp in KEYPOINTS]
+
+
+class SessionSmoothingTests(TestCase):
+    """세션별 EMA 평활화와 상태 전환 히스테리시스 (confirm_frames 프레임 연속일 때만 전환)"""
+
+    def setUp(self):
+        from .session_state import SessionState
+
+        self.state = SessionState(get_plan('neck_left'))
+
+    def update(self, nose_x, alpha=1.0, confirm_frames=3):
+        return self.state.update(parse_pose(neck_keypoints(nose_x)), alpha, confirm_frames)
+
+    def test_status_switches_after_confirm_frames(self):
+        self.assertEqual(self.update(0.4)['status'], 'good')
+        good_messages = self.update(0.4)['messages']
+
+        switching = [self.update(0.5) for _ in range(3)]
+        self.assertEqual([feedback['status'] for feedback in switching], ['good', 'good', 'warning'])
+        # 전환 확정 전에는 이전 메시지, 측정값은 최신
+        self.assertEqual(switching[0]['messages'], good_messages)
+        self.assertEqual(switching[0]['angles']['nose_offset'], 0.0)
+
+    def test_single_frame_blip_is_ignored(self):
+        for nose_x in (0.4, 0.4, 0.5, 0.4, 0.5, 0.5, 0.4):
+            self.assertEqual(self.update(nose_x)['status'], 'good')
+
+    def test_ema_smooths_coordinates(self):
+        self.update(0.4, alpha=0.5)
+        feedback = self.update(0.5, alpha=0.5)
+        # 평활화된 코 x = 0.45 → 어깨 중심에서 -0.05
+        self.assertAlmostEqual(feedback['angles']['nose_offset'], -0.05)
+
+    def test_returned_feedback_does_not_share_state(self):
+        feedback = self.update(0.4)
+        feedback['messages'].append('x')
+        self.assertNotIn('x', self.update(0.4)['messages'])
+
+
+class IngestPolicyTests(TestCase):
+    """저장 정책: 거의 같은 프레임 솎아내기(min_delta)와 낮은 신뢰도 프레임 버리기(min_confidence)"""
+
+    def setUp(self):
+        from .session_state import SessionState
+
+        self.state = SessionState(get_plan('neck_left'))
+
+    def ingest(self, policy, nose_x, score=0.9):
+        keypoints = neck_keypoints(nose_x, score)
+        return self.state.ingest(keypoints, parse_pose(keypoints), policy, False, 1.0, 3)[1]
+
+    def test_min_delta_decimates_still_frames(self):
+        policy = {'min_delta': 0.05, 'min_confidence': 0.0}
+        kept = [self.ingest(policy, nose_x) for nose_x in (0.4, 0.4, 0.42, 0.35, 0.36)]
+        self.assertEqual(kept, [True, False, False, True, False])
+        # 상태가 바뀌는 프레임은 움직임이 작아도 저장
+        self.assertTrue(self.ingest(policy, 0.5))
+        self.assertEqual((self.state.kept, self.state.dropped), (3, 3))
+
+    def test_min_confidence_drops_uncertain_frames(self):
+        policy = {'min_delta': 0.0, 'min_confidence': 0.8}
+        self.assertTrue(self.ingest(policy, 0.4, score=0.5))  # 첫 프레임 (상태 변화)
+        self.assertFalse(self.ingest(policy, 0.4, score=0.5))
+        self.assertTrue(self.ingest(policy, 0.4, score=0.9))
+        self.assertTrue(self.ingest(policy, 0.5, score=0.5))  # 상태 변화는 신뢰도와 관계없이 저장
+
+    def test_recognition_errors_are_kept(self):
+        policy = {'min_delta': 0.05, 'min_confidence': 0.8}
+        keypoints = [dict(KEYPOINTS[0], score=1.5)] + KEYPOINTS[1:]
+        feedback, keep = self.state.ingest(keypoints, None, policy, False, 1.0, 3)
+        self.assertTrue(keep)
+        self.assertTrue(feedback['messages'][0].startswith('인식 오류'))
+
+    @override_settings(POSE_INGEST_MIN_DELTA=0.01, POSE_INGEST_MIN_CONFIDENCE=0.3)
+    def test_session_policy_overrides_settings(self):
+        from .session_state import get_ingest_policy
+
+        session = WorkoutSession(ingest_policy={'min_confidence': 0.7})
+        self.assertEqual(get_ingest_policy(session), {'min_delta': 0.01, 'min_confidence': 0.7})
+
+
+class TemplateIndexTests(TestCase):
+    """KD-tree 최근접 템플릿이 전체 비교(brute force) 결과와 같은지"""
+
+    def setUp(self):
+        rng = random.Random(18)
+        self.sports = Sports.objects.create(name='목풀기')
+        for i in range(40):
+            ExpertPoseTemplate.objects.create(
+                sports=self.sports, exercise_phase=('start', 'middle', 'peak', 'end')[i % 4],
+                quality_level='good', is_active=i != 7,
+                keypoints=[
+                    {'name': name, 'x': rng.uniform(0.2, 0.8), 'y': rng.uniform(0.2, 0.8), 'score': rng.uniform(0.5, 1)}
+                    for name in KEYPOINT_NAMES
+                ],
+                description='', created_by='expert',
+            )
+        self.query = [
+            {'name': name, 'x': rng.uniform(0.2, 0.8), 'y': rng.uniform(0.2, 0.8), 'score': 0.9}
+            for name in KEYPOINT_NAMES
+        ]
+
+    def brute_force(self, k, phase=None):
+        from .ml_utils import normalize_features
+
+        templates = list(ExpertPoseTemplate.objects.filter(sports=self.sports, is_active=True).order_by('id'))
+        vectors = np.array([normalize_features(template.features) for template in templates])
+        mean = vectors.mean(axis=0)
+        scale = vectors.std(axis=0)
+        scale = np.where(scale > 1e-9, scale, 1.0)
+        query = (np.array(normalize_features(extract_features(self.query))) - mean) / scale
+        distances = np.sqrt((((vectors - mean) / scale - query) ** 2).sum(axis=1))
+        ranked = sorted(
+            (distance, template.id) for distance, template in zip(distances, templates)
+            if phase is None or template.exercise_phase == phase
+        )
+        return [(template_id, round(float(distance), 4)) for distance, template_id in ranked[:k]]
+
+    def test_matches_brute_force(self):
+        from .template_index import TemplateIndexRegistry
+
+        registry = TemplateIndexRegistry()
+        features = extract_features(self.query)
+        for phase in (None, 'start', 'peak'):
+            with self.subTest(phase=phase):
+                result = registry.nearest(self.sports.id, features, k=5, phase=phase)
+                self.assertEqual([(row['id'], row['distance']) for row in result], self.brute_force(5, phase))
+        self.assertEqual(registry.builds, 1)
+
+    def test_k_larger_than_index_and_unknown_phase(self):
+        from .template_index import TemplateIndexRegistry, nearest_templates
+
+        result = TemplateIndexRegistry().nearest(self.sports.id, extract_features(self.query), k=100, phase='end')
+        # end 템플릿 10개 중 비활성 1개 제외
+        self.assertEqual(len(result), 9)
+        with self.assertRaises(ValueError):
+            nearest_templates(self.sports.id, self.query, phase='sideways')
+
+
+class FakeRegistry:
+    """스포츠별 predict 호출을 기록하는 ModelRegistry 대역 (벡터 첫 값이 양수면 good)"""
+
+    def __init__(self, block=None, error=None):
+        import threading
+
+        self.calls = []
+        self.block = block
+        self.error = error
+        self.lock = threading.Lock()
+
+    def predict(self, sports_id, vectors):
+        from types import SimpleNamespace
+
+        with self.lock:
+            self.calls.append((sports_id, len(vectors)))
+        if self.block is not None:
+            self.block.wait(5)
+        if self.error is not None:
+            raise self.error
+        labels = ['good' if vector[0] > 0 else 'warning' for vector in vectors]
+        return SimpleNamespace(version='v1'), labels, [{label: 1.0} for label in labels]
+
+
+class InferenceSchedulerTests(TestCase):
+    """자세 분류 마이크로 배치: 스포츠별 묶음 예측, 시간 초과, 예측 실패"""
+
+    def make_scheduler(self, registry, **kwargs):
+        from .inference_batcher import InferenceScheduler
+
+        scheduler = InferenceScheduler(registry=registry, **kwargs)
+        self.addCleanup(scheduler.stop)
+        return scheduler
+
+    def test_batches_requests_per_sports(self):
+        registry = FakeRegistry()
+        scheduler = self.make_scheduler(registry, max_wait=0.2)
+        futures = [scheduler.submit(1 + i % 2, [1.0 if i % 3 else -1.0]) for i in range(10)]
+        results = [future.result(5) for future in futures]
+
+        self.assertEqual(sorted(registry.calls), [(1, 5), (2, 5)])
+        self.assertEqual(
+            [result['quality'] for result in results],
+            ['warning' if i % 3 == 0 else 'good' for i in range(10)],
+        )
+        stats = scheduler.stats()
+        self.assertEqual((stats['batches'], stats['predict_calls'], stats['mean_batch_size']), (1, 2, 5.0))
+        self.assertEqual(stats['batch_sizes']['4-7'], 2)
+
+    def test_max_batch_splits_batches(self):
+        registry = FakeRegistry()
+        scheduler = self.make_scheduler(registry, max_batch=4, max_wait=0.2)
+        futures = [scheduler.submit(1, [1.0]) for _ in range(10)]
+        for future in futures:
+            future.result(5)
+        self.assertTrue(all(size <= 4 for _, size in registry.calls))
+        self.assertEqual(sum(size for _, size in registry.calls), 10)
+
+    def test_timeout_and_cancelled_requests(self):
+        import threading
+        from .inference_batcher import InferenceUnavailable
+
+        release = threading.Event()
+        registry = FakeRegistry(block=release)
+        scheduler = self.make_scheduler(registry, max_wait=0.001)
+        with self.assertRaises(InferenceUnavailable):
+            scheduler.predict(1, [1.0], timeout=0.05)
+        # 앞 묶음이 예측 중인 동안 기다리다 포기한 요청은 예측하지 않음
+        with self.assertRaises(InferenceUnavailable):
+            scheduler.predict(1, [1.0], timeout=0.05)
+        release.set()
+        self.assertEqual(scheduler.predict(1, [1.0], timeout=5)['quality'], 'good')
+        self.assertEqual(registry.calls, [(1, 1), (1, 1)])
+
+    def test_prediction_failure_is_contained(self):
+        registry = FakeRegistry(error=RuntimeError('model file'))
+        scheduler = self.make_scheduler(registry)
+        with self.assertLogs('emodia.inference_batcher', 'ERROR'):
+            with self.assertRaises(RuntimeError):
+                scheduler.predict(1, [1.0], timeout=5)
+        self.assertEqual(scheduler.stats()['failed'], 1)
+
+        registry.error = None
+        self.assertEqual(scheduler.predict(1, [1.0], timeout=5)['model_version'], 'v1')
+
+    def test_stopped_scheduler_rejects(self):
+        from .inference_batcher import InferenceUnavailable
+
+        scheduler = self.make_scheduler(FakeRegistry())
+        scheduler.stop()
+        with self.assertRaises(InferenceUnavailable):
+            scheduler.predict(1, [1.0], timeout=1)
+
+
+class InlineExecutor:
+    """ProcessPoolExecutor 대역 (테스트 DB 를 쓰도록 같은 스레드에서 바로 실행, 작업자 수만 기록)"""
+    instances = []
+
+    def __init__(self, max_workers, mp_context=None, initializer=None):
+        self.max_workers = max_workers
+        self.submitted = []
+        InlineExecutor.instances.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        from concurrent.futures import Future
+
+        self.submitted.append(args[0])
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+class TrainModelsCommandTests(TestCase):
+    """train_models: 템플릿이 부족한 스포츠는 건너뛰고, 나머지는 스포츠별 작업으로 나눠 학습"""
+
+    def setUp(self):
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir, ignore_errors=True)
+        cwd = os.getcwd()
+        os.chdir(workdir)  # 모델 파일은 작업 디렉터리의 ml_models/ 에 저장
+        self.addCleanup(os.chdir, cwd)
+        InlineExecutor.instances = []
+
+        rng = random.Random(25)
+        self.ready = [self.make_sports(f'운동{i}', 12, rng) for i in range(2)]
+        self.small = self.make_sports('템플릿 부족', 3, rng)
+        # 템플릿 수는 충분하지만 좌표 형식 오류를 빼면 부족 → 학습 중 오류
+        self.broken = self.make_sports('형식 오류', 10, rng)
+        ExpertPoseTemplate.objects.filter(id=self.broken.expert_templates.first().id).update(
+            keypoints=[dict(KEYPOINTS[0], score=1.5)] + KEYPOINTS[1:], features=None, features_version='',
+        )
+
+    def make_sports(self, name, count, rng):
+        sports = Sports.objects.create(name=name)
+        for i in range(count):
+            ExpertPoseTemplate.objects.create(
+                sports=sports, exercise_phase='peak', quality_level=('good', 'warning')[i % 2],
+                keypoints=[dict(kp, x=kp['x'] + rng.uniform(-0.05, 0.05) + 0.1 * (i % 2)) for kp in KEYPOINTS],
+                description='', created_by='expert',
+            )
+        return sports
+
+    def call(self, *args):
+        from django.core.management import call_command
+        from .models import MLModel
+
+        output = io.StringIO()
+        with mock.patch('emodia.management.commands.train_models.ProcessPoolExecutor', InlineExecutor), \
+                mock.patch('emodia.management.commands.train_models.connections'):
+            call_command('train_models', *args, stdout=output)
+        return output.getvalue(), MLModel.objects
+
+    def test_skips_small_sports_and_trains_the_rest(self):
+        output, models = self.call('--cv', '2', '--workers', '2')
+
+        executor, = InlineExecutor.instances
+        self.assertEqual(executor.max_workers, 2)
+        self.assertEqual(sorted(executor.submitted), sorted([sports.id for sports in self.ready] + [self.broken.id]))
+        self.assertIn('템플릿 3개', output)
+        self.assertIn('학습 중 오류', output)
+        self.assertIn('총 2개 스포츠 모델', output)
+        self.assertEqual(
+            sorted(models.values_list('sports_id', flat=True)), sorted(sports.id for sports in self.ready)
+        )
+        self.assertFalse(models.filter(is_active=True).exists())
+
+    def test_selected_sports_and_activate(self):
+        output, models = self.call('--sports', str(self.ready[0].id), '--cv', '2', '--activate')
+
+        self.assertEqual(InlineExecutor.instances[0].submitted, [self.ready[0].id])
+        self.assertEqual(InlineExecutor.instances[0].max_workers, 1)
+        self.assertEqual(list(models.filter(is_active=True).values_list('sports_id', flat=True)), [self.ready[0].id])
+
+    def test_nothing_to_train(self):
+        output, _ = self.call('--sports', str(self.small.id))
+        self.assertIn('학습 대상 0개', output)
+        self.assertEqual(InlineExecutor.instances, [])
+
+
+class FeatureStoreTests(TestCase):
+    """템플릿/프레임 저장 시 특징 + features_version 기록, backfill_features 로 버전이 다른 행만 다시 계산"""
+
+    def setUp(self):
+        self.sports = Sports.objects.create(name='목풀기')
+        user = User.objects.create_user(username='tester', password='pass')
+        self.session = WorkoutSession.objects.create(user=user, sports=self.sports)
+
+    def make_template(self, keypoints=KEYPOINTS):
+        return ExpertPoseTemplate.objects.create(
+            sports=self.sports, exercise_phase='peak', quality_level='good', keypoints=keypoints,
+            description='', created_by='expert',
+        )
+
+    def backfill(self, *args):
+        from django.core.management import call_command
+
+        output = io.StringIO()
+        with mock.patch('emodia.management.commands.backfill_features.invalidate_template_index') as invalidate:
+            call_command('backfill_features', *args, stdout=output)
+        return output.getvalue(), invalidate
+
+    def test_template_features_are_set_on_save(self):
+        template = self.make_template()
+        self.assertEqual(template.features, extract_features(KEYPOINTS))
+        self.assertEqual(template.features_version, FEATURE_SCHEMA_VERSION)
+
+        moved = [dict(kp, x=kp['x'] + 0.1) for kp in KEYPOINTS]
+        template.keypoints = moved
+        template.save(update_fields=['keypoints'])
+        template.refresh_from_db()
+        self.assertEqual(template.features, extract_features(moved))
+
+        # 좌표 형식 오류는 특징 없음 (버전은 기록해 backfill 대상에서 제외)
+        broken = self.make_template([dict(KEYPOINTS[0], score=1.5)])
+        self.assertIsNone(broken.features)
+        self.assertEqual(broken.features_version, FEATURE_SCHEMA_VERSION)
+
+    def test_frame_features_are_opt_in(self):
+        frame = PoseFrame.objects.create(session=self.session, timestamp=0.0, keypoints=KEYPOINTS)
+        self.assertIsNone(frame.features_packed)
+        self.assertEqual(frame.features_version, '')
+
+        with override_settings(POSE_FRAME_FEATURES=True):
+            frame = PoseFrame.objects.create(session=self.session, timestamp=1.0, keypoints=KEYPOINTS)
+        self.assertEqual(frame.features_version, FEATURE_SCHEMA_VERSION)
+        self.assertEqual(
+            np.frombuffer(frame.features_packed, dtype='<f4').tolist(),
+            np.asarray(normalize_features(extract_features(KEYPOINTS)), dtype='<f4').tolist(),
+        )
+
+    def test_backfill_recomputes_stale_rows_only(self):
+        current = self.make_template()
+        stale = self.make_template([dict(kp, y=kp['y'] + 0.1) for kp in KEYPOINTS])
+        broken = self.make_template()
+        ExpertPoseTemplate.objects.filter(id=stale.id).update(features=None, features_version='old')
+        ExpertPoseTemplate.objects.filter(id=broken.id).update(
+            keypoints=[dict(KEYPOINTS[0], score=1.5)], features={'stale': 1.0}, features_version='old'
+        )
+        ExpertPoseTemplate.objects.filter(id=current.id).update(features={'kept': 1.0})
+
+        output, invalidate = self.backfill('--model', 'templates', '--chunk-size', '1')
+
+        self.assertIn('템플릿 대상: 2개', output)
+        self.assertIn('총 템플릿 2개, 프레임 0개', output)
+        invalidate.assert_called_once_with()
+        current.refresh_from_db()
+        stale.refresh_from_db()
+        broken.refresh_from_db()
+        self.assertEqual(current.features, {'kept': 1.0})  # 현재 버전은 건드리지 않음
+        self.assertEqual(stale.features, extract_features(stale.keypoints))
+        self.assertIsNone(broken.features)
+        self.assertEqual(
+            set(ExpertPoseTemplate.objects.values_list('features_version', flat=True)), {FEATURE_SCHEMA_VERSION}
+        )
+
+        # 다시 실행하면 대상 없음
+        output, invalidate = self.backfill('--model', 'templates')
+        self.assertIn('템플릿 대상: 0개', output)
+        invalidate.assert_not_called()
+
+    def test_backfill_frames(self):
+        frames = [
+            PoseFrame.objects.create(
+                session=self.session, timestamp=float(t), keypoints=[dict(kp, x=kp['x'] + 0.01 * t) for kp in KEYPOINTS]
+            )
+            for t in range(3)
+        ]
+
+        # 프레임 특징이 꺼져 있으면 --model all 은 프레임을 건너뜀
+        output, _ = self.backfill()
+        self.assertNotIn('프레임 대상', output)
+        self.assertFalse(PoseFrame.objects.exclude(features_version='').exists())
+
+        output, _ = self.backfill('--model', 'frames', '--chunk-size', '2')
+        self.assertIn('총 템플릿 0개, 프레임 3개', output)
+        for frame in frames:
+            frame.refresh_from_db()
+            self.assertEqual(frame.features_version, FEATURE_SCHEMA_VERSION)
+            np.testing.assert_allclose(
+                np.frombuffer(frame.features_packed, dtype='<f4'),
+                normalize_features(extract_features(frame.keypoints)), rtol=1e-6, atol=1e-6,
+            )
+
+
+def resolved_future(result=None, error=None):
+    from concurrent.futures import Future
+
+    future = Future()
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+    return future
+
+
+class ExtractExpertTracksCommandTests(TestCase):
+    """extract_expert_tracks: 바뀐 영상만 추출, 실패한 영상은 다음 실행에서 이어서 처리, 검토 완료 템플릿은 유지"""
+
+    def setUp(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        sports = Sports.objects.create(name='목풀기')
+        self.video = EmotionVideo.objects.create(
+            sports=sports, video=SimpleUploadedFile('stretch.mp4', b'video-1'), original_filename='stretch.mp4'
+        )
+        # 스포츠가 없는 영상은 궤적만 저장
+        self.unlinked = EmotionVideo.objects.create(video=SimpleUploadedFile('other.mp4', b'video-2'))
+        self.failing = set()  # 추정 중 오류를 낼 영상 경로
+
+    def fake_submit(self, executor, path, sample_fps, segment_seconds):
+        """영상 하나 → 10프레임씩 두 구간 (목/어깨만 인식)"""
+        if path in self.failing:
+            return [resolved_future(error=RuntimeError('디코딩 실패'))]
+        futures = []
+        for start in (0, 10):
+            keypoints = np.full((10, len(KEYPOINT_NAMES), 3), np.nan, dtype='<f4')
+            for kp in KEYPOINTS:
+                keypoints[:, KEYPOINT_NAMES.index(kp['name'])] = (kp['x'], kp['y'], kp['score'])
+            timestamps = (np.arange(start, start + 10) / sample_fps).astype('<f4')
+            futures.append(resolved_future((timestamps, keypoints)))
+        return futures
+
+    def call(self, *args):
+        from django.core.management import call_command
+
+        command = 'emodia.management.commands.extract_expert_tracks'
+        output = io.StringIO()
+        with mock.patch(f'{command}.PoseEstimatorPool.is_available', return_value=True), \
+                mock.patch(f'{command}.create_worker_pool') as create_pool, \
+                mock.patch(f'{command}.submit_video', side_effect=self.fake_submit) as submit:
+            call_command('extract_expert_tracks', '--fps', '2', *args, stdout=output)
+        if submit.called:
+            create_pool.return_value.shutdown.assert_called_once()
+        return output.getvalue(), [call.args[1] for call in submit.call_args_list]
+
+    def test_extracts_tracks_and_candidates(self):
+        output, submitted = self.call()
+
+        self.assertIn('추출 대상 2개, 변경 없음 0개', output)
+        self.assertEqual(submitted, [self.video.video.path, self.unlinked.video.path])
+        track = ExpertPoseTrack.objects.get(video=self.video)
+        timestamps, keypoints = track.get_arrays()
+        self.assertEqual(track.frame_count, 20)
+        self.assertEqual(timestamps.tolist(), (np.arange(20) / 2).tolist())
+
+        candidates = ExpertPoseTemplate.objects.filter(source_track=track)
+        self.assertEqual(candidates.count(), 12)  # 4개 phase × 3개
+        self.assertFalse(candidates.filter(is_active=True).exists())
+        self.assertEqual(
+            sorted(set(candidates.values_list('exercise_phase', flat=True))), ['end', 'middle', 'peak', 'start']
+        )
+        candidate = candidates.first()
+        # 특징은 float32 궤적에서 계산 (저장된 키포인트는 소수점 6자리로 반올림)
+        expected = extract_features(candidate.keypoints)
+        self.assertEqual(candidate.features.keys(), expected.keys())
+        for name, value in expected.items():
+            self.assertAlmostEqual(candidate.features[name], value, places=5, msg=name)
+        self.assertEqual(candidate.features_version, FEATURE_SCHEMA_VERSION)
+
+        self.assertTrue(ExpertPoseTrack.objects.filter(video=self.unlinked).exists())
+        self.assertEqual(ExpertPoseTemplate.objects.count(), 12)
+        self.assertIn('후보 템플릿 12개를 만들었습니다', output)
+
+    def test_unchanged_videos_are_skipped_and_failed_ones_resume(self):
+        self.failing.add(self.unlinked.video.path)
+        output, _ = self.call()
+        self.assertIn(f'영상 {self.unlinked.id} 처리 중 오류', output)
+        self.assertIn('총 1개 영상', output)
+
+        # 다시 실행하면 실패한 영상만 추출
+        self.failing.clear()
+        output, submitted = self.call()
+        self.assertIn('추출 대상 1개, 변경 없음 1개', output)
+        self.assertEqual(submitted, [self.unlinked.video.path])
+
+        output, submitted = self.call()
+        self.assertIn('추출 대상 0개, 변경 없음 2개', output)
+        self.assertEqual(submitted, [])
+
+        # 파일이 바뀌면 그 영상만 다시 추출
+        with open(self.video.video.path, 'wb') as f:
+            f.write(b'video-1 edited')
+        output, submitted = self.call()
+        self.assertEqual(submitted, [self.video.video.path])
+
+    def test_force_keeps_reviewed_templates(self):
+        self.call()
+        reviewed = ExpertPoseTemplate.objects.filter(source_track__video=self.video).first()
+        reviewed.is_active = True
+        reviewed.save(update_fields=['is_active'])
+
+        output, submitted = self.call('--force', '--video', str(self.video.id))
+
+        self.assertEqual(submitted, [self.video.video.path])
+        self.assertTrue(ExpertPoseTemplate.objects.filter(id=reviewed.id, is_active=True).exists())
+        # 비활성 후보만 다시 만듦
+        self.assertEqual(ExpertPoseTemplate.objects.filter(is_active=False).count(), 12)
+        self.assertEqual(ExpertPoseTrack.objects.count(), 2)
+
+
+@override_settings(POSE_STREAM_FLUSH_FRAMES=3, POSE_WRITE_BEHIND=False)
+class PoseStreamNamespaceTests(TestCase):
+    """Socket.IO /pose 네임스페이스: 연결 시 한 번 인증, 프레임마다 피드백, 모아둔 프레임은 일정 개수/연결 종료 시 저장"""
+
+    def setUp(self):
+        from asgiref.sync import async_to_sync
+        from rest_framework_simplejwt.tokens import AccessToken
+        from .realtime import PoseStreamNamespace
+
+        self.run = async_to_sync
+        self.user = User.objects.create_user(username='tester', password='pass')
+        self.session = WorkoutSession.objects.create(user=self.user, sports=Sports.objects.create(name='목풀기'))
+        self.token = str(AccessToken.for_user(self.user))
+        self.namespace = PoseStreamNamespace('/pose')
+        self.namespace.emit = mock.AsyncMock()
+
+    def connect(self, sid='sid-1', environ=None, **auth):
+        auth = {'token': self.token, 'session_id': self.session.id, **auth}
+        self.run(self.namespace.on_connect)(sid, environ or {}, auth)
+
+    def emitted(self, event):
+        return [call.args[1] for call in self.namespace.emit.call_args_list if call.args[0] == event]
+
+    def test_connection_is_refused(self):
+        from socketio.exceptions import ConnectionRefusedError
+
+        other = User.objects.create_user(username='other', password='pass')
+        other_session = WorkoutSession.objects.create(user=other, sports=self.session.sports)
+        cases = {
+            'no token': {'token': None},
+            'invalid token': {'token': 'invalid'},
+            'other user session': {'session_id': other_session.id},
+            'unsupported exercise': {'exercise_type': 'unknown'},
+            'nearest out of range': {'nearest': 'many'},
+            'no expert track': {'video_id': 999},
+        }
+        for case, auth in cases.items():
+            with self.subTest(case):
+                with self.assertRaises(ConnectionRefusedError):
+                    self.connect(**auth)
+        self.assertEqual(self.namespace.streams, {})
+
+    def test_authorization_header(self):
+        self.connect(environ={'HTTP_AUTHORIZATION': f'Bearer {self.token}'}, token=None)
+        self.assertEqual(self.namespace.streams['sid-1'].session_id, self.session.id)
+
+    def test_frames_get_feedback_and_are_saved_in_batches(self):
+        self.connect(exercise_type='neck_right')
+        for t in range(4):
+            self.run(self.namespace.on_frame)('sid-1', {'timestamp': t * 0.1, 'keypoints': KEYPOINTS})
+
+        feedbacks = self.emitted('feedback')
+        self.assertEqual([message['timestamp'] for message in feedbacks], [t * 0.1 for t in range(4)])
+        expected = generate_feedback(KEYPOINTS, 'neck_right')
+        self.assertEqual(feedbacks[0]['feedback']['status'], expected['status'])
+        self.assertEqual(feedbacks[0]['feedback']['phase']['name'], 'start')
+        # 3개가 모이면 저장, 나머지는 연결 종료 시 저장
+        self.assertEqual(self.session.pose_frames.count(), 3)
+        self.assertEqual(len(self.namespace.streams['sid-1'].pending), 1)
+
+        self.run(self.namespace.on_disconnect)('sid-1')
+        self.assertEqual(self.session.pose_frames.count(), 4)
+        self.assertNotIn('sid-1', self.namespace.streams)
+
+    def test_invalid_frames_and_exercise_change(self):
+        self.connect()
+        for data in ({'keypoints': KEYPOINTS}, {'timestamp': 'a', 'keypoints': KEYPOINTS},
+                     {'timestamp': 0.0, 'keypoints': 'abc'}, None):
+            self.run(self.namespace.on_frame)('sid-1', data)
+        self.assertEqual(len(self.emitted('error')), 4)
+        self.assertEqual(self.emitted('feedback'), [])
+
+        self.run(self.namespace.on_exercise)('sid-1', {'exercise_type': 'unknown'})
+        self.assertEqual(self.namespace.streams['sid-1'].exercise_type, 'neck_left')
+        self.assertEqual(len(self.emitted('error')), 5)
+        self.run(self.namespace.on_exercise)('sid-1', {'exercise_type': 'neck_right'})
+        self.assertEqual(self.namespace.streams['sid-1'].exercise_type, 'neck_right')
+
+        # 연결되지 않은 sid 의 프레임은 무시
+        self.run(self.namespace.on_frame)('unknown', {'timestamp': 0.0, 'keypoints': KEYPOINTS})
+        self.assertEqual(self.emitted('feedback'), [])
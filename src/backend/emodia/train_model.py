@@ -7,20 +7,28 @@ ML 모델 학습 스크립트
     poetry run python manage.py shell
     >>> from emodia.train_model import train_and_save_model
     >>> train_and_save_model(sports_id=1)
+
+    # 템플릿이 충분한 모든 스포츠를 여러 프로세스에서 동시에 학습
+    poetry run python manage.py train_models --workers 4 --n-jobs 2
 """
 
 import os
+import time
 import joblib
 import numpy as np
 from datetime import datetime
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split, cross_validate, StratifiedKFold
+from sklearn.metrics import (
+    classification_report, confusion_matrix, accuracy_score, precision_recall_fscore_support
+)
 
 # Django 모델 import는 실제 실행 시에만 작동
 try:
     from .models import ExpertPoseTemplate, MLModel, Sports
-    from .ml_utils import extract_features, normalize_features, get_feature_names
+    from .ml_utils import extract_template_features, normalize_features, get_feature_names, FEATURE_SCHEMA_VERSION
+    from .forest_export import export_forest
 except:
     print("⚠️  Django 환경에서 실행해주세요")
 
@@ -46,21 +54,34 @@ def load_training_data(sports_id):
 
     X = []
     y = []
+    templates = list(templates)
+
+    # 저장 시 계산된 특징을 그대로 사용, 없거나 특징 정의가 바뀐 템플릿만 한 번에 계산 (extract_features_batch)
+    missing = [
+        template for template in templates
+        if not template.features or template.features_version != FEATURE_SCHEMA_VERSION
+    ]
+    computed = extract_template_features(missing)
+    missing_ids = {template.id for template in missing}
+    skipped = []
 
     for template in templates:
-        # 특징 추출
-        if template.features:
-            # 이미 계산된 특징 사용
-            features = template.features
-        else:
-            # 실시간 계산
-            features = extract_features(template.keypoints)
+        features = computed.get(template.id) if template.id in missing_ids else template.features
+        if features is None:
+            # 좌표 형식이 잘못된 템플릿은 학습에서 제외
+            skipped.append(template.id)
+            continue
 
         # 특징 벡터로 변환
         feature_vector = normalize_features(features)
         X.append(feature_vector)
         y.append(template.quality_level)
 
+    if skipped:
+        print(f"⚠️  좌표 형식이 잘못된 템플릿 {len(skipped)}개 제외 (ID: {', '.join(map(str, skipped))})")
+    if len(X) < 10:
+        raise ValueError(f"⚠️  학습 데이터가 부족합니다. 최소 10개 필요 (현재: {len(X)}개)")
+
     print(f"✅ 데이터 로드 완료: {len(X)}개 샘플")
     print(f"   - perfect: {y.count('perfect')}개")
     print(f"   - good: {y.count('good')}개")
@@ -70,18 +91,42 @@ def load_training_data(sports_id):
     return np.array(X), np.array(y)
 
 
-def train_model(X, y):
+# 교차 검증 지표 (한 번의 fold 학습으로 모두 계산)
+CV_SCORING = {
+    'accuracy': 'accuracy',
+    'precision': 'precision_weighted',
+    'recall': 'recall_weighted',
+    'f1': 'f1_weighted',
+}
+
+
+def cv_splits(y, cv=5):
+    """
+    교차 검증 fold (train, test) 인덱스 리스트
+    한 번만 나눠 모든 지표가 같은 fold 를 쓰도록 함 (cross_val_score(cv=5) 와 같은 StratifiedKFold)
+    가장 적은 라벨의 개수가 cv 보다 작으면 그만큼 fold 수를 줄임 (최소 2)
+    """
+    _, counts = np.unique(y, return_counts=True)
+    n_splits = max(2, min(cv, int(counts.min())))
+    return list(StratifiedKFold(n_splits=n_splits).split(np.zeros(len(y)), y))
+
+
+def train_model(X, y, n_jobs=1, cv=5):
     """
     RandomForest 모델 학습
 
     Args:
         X: 특징 벡터
         y: 라벨
+        n_jobs: 숲 학습 / 교차 검증에 쓸 병렬 작업 수 (-1 이면 CPU 수만큼)
+        cv: 교차 검증 fold 수
 
     Returns:
         model: 학습된 모델
-        metrics: 성능 지표
+        metrics: 성능 지표 (단계별 소요 시간 timings 포함)
     """
+    timings = {}
+
     # 데이터 분할
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, random_state=42, stratify=y
@@ -97,21 +142,35 @@ def train_model(X, y):
         n_estimators=100,
         max_depth=10,
         random_state=42,
-        class_weight='balanced'  # 불균형 데이터 처리
+        class_weight='balanced',  # 불균형 데이터 처리
+        n_jobs=n_jobs,
     )
+    started = time.perf_counter()
     model.fit(X_train, y_train)
+    timings['fit'] = time.perf_counter() - started
 
     # 예측
+    started = time.perf_counter()
     y_pred = model.predict(X_test)
 
-    # 성능 평가
+    # 성능 평가 (precision / recall / F1 은 classification_report 의 weighted avg 와 같음)
     accuracy = accuracy_score(y_test, y_pred)
+    precision, recall, f1, _ = precision_recall_fscore_support(
+        y_test, y_pred, average='weighted', zero_division=0
+    )
+    timings['evaluate'] = time.perf_counter() - started
     print(f"\n✅ 학습 완료!")
     print(f"   - 정확도: {accuracy:.2%}")
+    print(f"   - 정밀도: {precision:.2%}, 재현율: {recall:.2%}, F1: {f1:.2%}")
 
-    # 교차 검증
-    cv_scores = cross_val_score(model, X, y, cv=5)
-    print(f"   - 교차 검증 평균: {cv_scores.mean():.2%} (+/- {cv_scores.std() * 2:.2%})")
+    # 교차 검증 (fold 를 한 번만 나누고 fold 별 학습은 병렬, 숲 안에서는 다시 병렬화하지 않음)
+    started = time.perf_counter()
+    cv_estimator = clone(model).set_params(n_jobs=1) if n_jobs != 1 else model
+    cv_results = cross_validate(cv_estimator, X, y, cv=cv_splits(y, cv), scoring=CV_SCORING, n_jobs=n_jobs)
+    cv_scores = cv_results['test_accuracy']
+    timings['cv'] = time.perf_counter() - started
+    print(f"   - 교차 검증 평균: {cv_scores.mean():.2%} (+/- {cv_scores.std() * 2:.2%}), {len(cv_scores)}-fold")
+    print(f"   - 교차 검증 F1: {cv_results['test_f1'].mean():.2%}")
 
     # 상세 분류 리포트
     print(f"\n📈 분류 리포트:")
@@ -132,8 +191,14 @@ def train_model(X, y):
 
     metrics = {
         'accuracy': accuracy,
+        'precision': float(precision),
+        'recall': float(recall),
+        'f1_score': float(f1),
         'cv_mean': cv_scores.mean(),
         'cv_std': cv_scores.std(),
+        'cv_f1_mean': cv_results['test_f1'].mean(),
+        'training_samples': len(X),
+        'timings': timings,
     }
 
     return model, metrics
@@ -157,6 +222,11 @@ def save_model(model, sports_id, metrics, trained_by="System"):
     joblib.dump(model, filename)
     print(f"\n💾 모델 저장: {filename}")
 
+    # 실시간 예측용 평탄화 배열 (모델 파일 옆 .forest.npz)
+    forest_filename = export_forest(model, filename)
+    if forest_filename:
+        print(f"💾 평탄화 배열 저장: {forest_filename}")
+
     # DB에 메타데이터 저장
     sports = Sports.objects.get(id=sports_id)
 
@@ -166,13 +236,16 @@ def save_model(model, sports_id, metrics, trained_by="System"):
         version=f"v{timestamp}",
         model_file=filename,
         accuracy=metrics['accuracy'],
-        precision=None,  # classification_report에서 추출 가능
-        recall=None,
-        f1_score=None,
-        training_samples=len(ExpertPoseTemplate.objects.filter(sports_id=sports_id, is_active=True)),
+        precision=metrics['precision'],
+        recall=metrics['recall'],
+        f1_score=metrics['f1_score'],
+        training_samples=metrics['training_samples'],
         trained_by=trained_by,
         is_active=False,  # 수동으로 활성화 필요
-        notes=f"CV: {metrics['cv_mean']:.2%} (+/- {metrics['cv_std'] * 2:.2%})"
+        notes=(
+            f"CV: {metrics['cv_mean']:.2%} (+/- {metrics['cv_std'] * 2:.2%}), "
+            f"CV F1: {metrics['cv_f1_mean']:.2%}"
+        )
     )
 
     print(f"✅ DB 기록 완료: MLModel ID={ml_model.id}")
@@ -180,39 +253,48 @@ def save_model(model, sports_id, metrics, trained_by="System"):
     return ml_model
 
 
-def train_and_save_model(sports_id, trained_by="System"):
+def train_and_save_model(sports_id, trained_by="System", n_jobs=1, cv=5, timings=None):
     """
     전체 학습 파이프라인 실행
 
     Args:
         sports_id: 스포츠 ID
         trained_by: 학습 담당자 이름
+        n_jobs: 숲 학습 / 교차 검증에 쓸 병렬 작업 수
+        cv: 교차 검증 fold 수
+        timings: 단계별 소요 시간(초)을 채울 딕셔너리 (load, fit, evaluate, cv, save)
 
     Returns:
         ml_model: 저장된 MLModel 객체
     """
     print(f"🚀 ML 모델 학습 시작: Sports ID={sports_id}")
     print("=" * 60)
+    if timings is None:
+        timings = {}
 
     try:
         # 1. 데이터 로드
+        started = time.perf_counter()
         X, y = load_training_data(sports_id)
+        timings['load'] = time.perf_counter() - started
 
         # 2. 모델 학습
-        model, metrics = train_model(X, y)
+        model, metrics = train_model(X, y, n_jobs=n_jobs, cv=cv)
+        timings.update(metrics['timings'])
 
         # 3. 모델 저장
+        started = time.perf_counter()
         ml_model = save_model(model, sports_id, metrics, trained_by)
+        timings['save'] = time.perf_counter() - started
 
         print("\n" + "=" * 60)
         print("✅ 학습 완료!")
         print(f"   - 모델 ID: {ml_model.id}")
         print(f"   - 정확도: {ml_model.accuracy:.2%}")
+        print(f"   - 소요 시간: " + ", ".join(f"{stage} {seconds:.2f}초" for stage, seconds in timings.items()))
         print(f"   - 활성화: python manage.py shell")
-        print(f"     >>> from emodia.models import MLModel")
-        print(f"     >>> model = MLModel.objects.get(id={ml_model.id})")
-        print(f"     >>> model.is_active = True")
-        print(f"     >>> model.save()")
+        print(f"     >>> from emodia.train_model import activate_model")
+        print(f"     >>> activate_model({ml_model.id})")
 
         return ml_model
 
@@ -223,23 +305,15 @@ def train_and_save_model(sports_id, trained_by="System"):
 
 def activate_model(model_id):
     """
-    특정 모델을 활성화 (기존 활성 모델은 비활성화)
+    특정 모델을 활성화 (기존 활성 모델은 같은 트랜잭션에서 비활성화)
+    실행 중인 서버는 model_registry 의 버전 토큰 확인으로 재시작 없이 새 모델로 교체
 
     Args:
         model_id: 활성화할 MLModel ID
     """
     try:
         new_model = MLModel.objects.get(id=model_id)
-
-        # 기존 활성 모델 비활성화
-        MLModel.objects.filter(
-            sports=new_model.sports,
-            is_active=True
-        ).update(is_active=False)
-
-        # 새 모델 활성화
-        new_model.is_active = True
-        new_model.save()
+        new_model.activate()
 
         print(f"✅ 모델 활성화 완료: {new_model}")
 
@@ -260,16 +334,13 @@ ml_model = train_and_save_model(sports_id=1, trained_by="홍길동")
 # 2. 모델 활성화
 activate_model(ml_model.id)
 
-# 3. 모델 로드 및 예측 (views.py에서 사용)
-from emodia.models import MLModel
-import joblib
-
-active_model = MLModel.objects.get(sports_id=1, is_active=True)
-model = joblib.load(active_model.model_file.path)
+# 3. 모델 로드 및 예측 (views.py에서 사용, 프로세스마다 한 번만 로드)
+from emodia.model_registry import get_model_registry
 
 # 예측
 from emodia.ml_utils import extract_features, normalize_features
 features = extract_features(keypoints)
 X = [normalize_features(features)]
-prediction = model.predict(X)[0]  # 'perfect', 'good', 'acceptable', 'warning'
+loaded, labels, probabilities = get_model_registry().predict(1, X)
+prediction = labels[0]  # 'perfect', 'good', 'acceptable', 'warning'
 """
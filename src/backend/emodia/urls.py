@@ -21,11 +21,26 @@ urlpatterns = [
 
     # 운동 세션
     path('workout/start/', views.start_workout_session, name='workout-start'),
+    path('workout/<int:session_id>/', views.get_workout_session, name='workout-detail'),
     path('workout/<int:session_id>/end/', views.end_workout_session, name='workout-end'),
     path('workout/sessions/', views.get_workout_sessions, name='workout-sessions'),
+    path('workout/<int:session_id>/frames/', views.get_session_frames, name='workout-frames'),
+    path('workout/<int:session_id>/replay/', views.replay_session_frames, name='workout-replay'),
+    path('workout/<int:session_id>/compare/', views.compare_session_to_expert, name='workout-compare'),
 
     # 포즈 좌표 전송
     path('pose/submit/', views.submit_pose_frame, name='pose-submit'),
+    path('pose/submit_batch/', views.submit_pose_frame_batch, name='pose-submit-batch'),
+    path('pose/estimate/', views.estimate_pose, name='pose-estimate'),
+    path('pose/estimate/stats/', views.get_estimator_stats, name='pose-estimate-stats'),
+    path('pose/feedback/stats/', views.get_feedback_cache_stats, name='pose-feedback-stats'),
+    path('pose/session_state/stats/', views.get_session_state_stats, name='pose-session-state-stats'),
+    path('pose/buffer/stats/', views.get_pose_buffer_stats, name='pose-buffer-stats'),
+    path('pose/nearest/', views.find_nearest_templates, name='pose-nearest'),
+    path('pose/nearest/stats/', views.get_template_index_stats, name='pose-nearest-stats'),
+    path('pose/classify/', views.classify_pose, name='pose-classify'),
+    path('pose/classify/stats/', views.get_inference_stats, name='pose-classify-stats'),
+    path('pose/classify/models/stats/', views.get_model_registry_stats, name='pose-classify-models-stats'),
 
     # Sports 목록 조회
     path('sports/', views.get_sports_list, name='sports-list'),
@@ -1,23 +1,44 @@
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.shortcuts import get_object_or_404
 from datetime import date, datetime
 from django.db.models import Q
 from django.utils import timezone
-
-from .models import EmotionRecord, WorkoutSession, PoseFrame, Sports, EmotionVideo
+import itertools
+import logging
+import time
+
+from .models import EmotionRecord, WorkoutSession, PoseFrame, Sports, EmotionVideo, ExpertPoseTrack
+from .feedback import DEFAULT_EXERCISE, is_supported_exercise, generate_feedback
+from .keypoints import array_to_keypoints
+from .pose_estimation import get_estimator_pool, EstimatorBusy, EstimatorUnavailable
+from .feedback_cache import get_feedback_cache, is_feedback_cache_enabled
+from .model_registry import get_model_registry
+from .session_state import session_ingest, get_ingest_policy, discard_session_state, get_session_states, is_smoothing
+from .session_summary import flush_session_summary, flush_summary_if_due, get_session_summaries
+from .sequence_alignment import compare_session
+from .template_index import nearest_templates, get_template_indexes
+from .inference_batcher import classify_posture, get_inference_scheduler
+from .pose_buffer import get_pose_buffer, is_write_behind, flush_pose_buffer
+from .session_frames import compact_session_in_background, iter_session_frames, iter_ndjson, aiter_chunks
 from .serializers import (
     EmotionRecordSerializer,
     EmotionRecordListSerializer,
     WorkoutSessionSerializer,
     PoseFrameSerializer,
+    PoseFrameBatchSerializer,
     SportsSerializer,
     EmotionVideoSerializer
 )
 
+logger = logging.getLogger(__name__)
+
 class EmotionRecordListCreateView(generics.ListCreateAPIView):
     """
     감정 기록 목록 조회 및 생성 API
@@ -197,288 +218,494 @@ def end_workout_session(request, session_id):
     except WorkoutSession.DoesNotExist:
         return Response({'error': '세션을 찾을 수 없습니다.'}, status=status.HTTP_404_NOT_FOUND)
 
-    session.end_time = timezone.now()
-    duration_seconds = (session.end_time - session.start_time).total_seconds()
-    session.duration = int(duration_seconds)
-    session.save()
+    # 이미 종료된 세션은 그대로 반환 (요약 확정, 압축을 다시 하지 않음)
+    if session.end_time:
+        return Response(WorkoutSessionSerializer(session).data)
+
+    # 먼저 종료 시각을 기록해 이후 들어오는 프레임을 거부 (동시에 종료 요청이 와도 한 번만 처리)
+    end_time = timezone.now()
+    duration = int((end_time - session.start_time).total_seconds())
+    if not WorkoutSession.objects.filter(id=session.id, end_time__isnull=True).update(
+            end_time=end_time, duration=duration):
+        session.refresh_from_db()
+        return Response(WorkoutSessionSerializer(session).data)
+    session.end_time = end_time
+    session.duration = duration
+
+    # 쓰기 지연 중인 프레임을 먼저 저장
+    flush_pose_buffer()
+    discard_session_state(session.id)
+    # 이 프로세스에 남은 요약 누적값을 더해 확정 (select_for_update 안에서 더하므로 session.save() 로 덮어쓰지 않음)
+    session.summary = flush_session_summary(session.id, discard=True) or {}
+
+    # 프레임 행을 세션 압축본으로 합치기 (백그라운드)
+    if getattr(settings, 'POSE_COMPACT_ON_END', False):
+        compact_session_in_background(session.id)
 
     serializer = WorkoutSessionSerializer(session)
     return Response(serializer.data)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_session_frames(request, session_id):
+    """
+    세션 프레임 기록 조회 (압축 여부와 관계없이 동일한 형식)
+    GET: /workout/1/frames/?start=10&end=20&offset=0&limit=500
+    - start/end: 세션 시작 후 경과 초 (선택사항)
+    - offset/limit: 페이지 (limit 최대 POSE_FRAMES_PAGE_SIZE, 다음 페이지가 있으면 next_offset)
+    세션 전체가 필요하면 replay/ 스트리밍 사용
+    """
+    try:
+        session = WorkoutSession.objects.get(id=session_id, user=request.user)
+    except WorkoutSession.DoesNotExist:
+        return Response({'error': '세션을 찾을 수 없습니다.'}, status=status.HTTP_404_NOT_FOUND)
+
+    max_limit = getattr(settings, 'POSE_FRAMES_PAGE_SIZE', 2000)
+    try:
+        start = float(request.query_params['start']) if 'start' in request.query_params else None
+        end = float(request.query_params['end']) if 'end' in request.query_params else None
+        offset = int(request.query_params.get('offset', 0))
+        limit = int(request.query_params.get('limit', max_limit))
+    except ValueError:
+        return Response({'error': 'start, end, offset, limit은 숫자여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+    if offset < 0 or not 1 <= limit <= max_limit:
+        return Response(
+            {'error': f'offset은 0 이상, limit은 1~{max_limit} 이어야 합니다.'}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    # 한 개 더 읽어서 다음 페이지가 있는지 확인
+    frames = list(itertools.islice(
+        iter_session_frames(session, start=start, end=end, chunk_size=min(offset + limit + 1, max_limit)),
+        offset, offset + limit + 1,
+    ))
+    has_next = len(frames) > limit
+    frames = frames[:limit]
+    return Response({
+        'session': session.id,
+        'compacted': bool(session.frames_archive or session.frames_cold_archive),
+        'archived': bool(session.frames_cold_archive),
+        'count': len(frames),
+        'next_offset': offset + limit if has_next else None,
+        'frames': frames
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def replay_session_frames(request, session_id):
+    """
+    세션 프레임 기록 스트리밍 (NDJSON, 한 줄에 프레임 1개)
+    GET: /workout/1/replay/?start=10&end=20&stride=2&gzip=1
+    - start/end: 세션 시작 후 경과 초 (선택사항)
+    - stride: n 프레임마다 1개 (기본 1)
+    - gzip: 1 이면 gzip 압축 (Content-Encoding: gzip)
+    응답 전체를 메모리에 만들지 않고 iterator 로 읽는 대로 내보내므로 세션 길이와 관계없이 메모리 사용량이 일정함
+    (ASGI 에서는 비동기 iterator 로 넘겨야 Django 가 본문 전체를 모으지 않음)
+    """
+    try:
+        session = WorkoutSession.objects.get(id=session_id, user=request.user)
+    except WorkoutSession.DoesNotExist:
+        return Response({'error': '세션을 찾을 수 없습니다.'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        start = float(request.query_params['start']) if 'start' in request.query_params else None
+        end = float(request.query_params['end']) if 'end' in request.query_params else None
+        stride = int(request.query_params.get('stride', 1))
+    except ValueError:
+        return Response({'error': 'start, end, stride는 숫자여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+    if stride < 1:
+        return Response({'error': 'stride는 1 이상이어야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+    compress = request.query_params.get('gzip') in ('1', 'true')
+
+    chunk_size = getattr(settings, 'POSE_REPLAY_CHUNK_SIZE', 2000)
+    frames = itertools.islice(iter_session_frames(session, start=start, end=end, chunk_size=chunk_size), 0, None, stride)
+    chunks = iter_ndjson(frames, compress=compress)
+    if isinstance(request._request, ASGIRequest):
+        chunks = aiter_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type='application/x-ndjson')
+    if compress:
+        response['Content-Encoding'] = 'gzip'
+    response['Content-Disposition'] = f'inline; filename="session_{session.id}.ndjson"'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def compare_session_to_expert(request, session_id):
+    """
+    세션 전체를 전문가 영상의 포즈 궤적과 DTW 로 비교
+    GET: /workout/1/compare/?video=3&window=5&segment=3&top=3
+    - video: 비교할 EmotionVideo ID (extract_expert_tracks 로 궤적을 추출한 영상)
+    - window: 허용할 시간 어긋남 (초, Sakoe-Chiba 밴드 반경)
+    - segment, top: 가장 어긋난 구간의 길이(초)와 개수
+    """
+    try:
+        session = WorkoutSession.objects.get(id=session_id, user=request.user)
+    except WorkoutSession.DoesNotExist:
+        return Response({'error': '세션을 찾을 수 없습니다.'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        video_id = int(request.query_params['video'])
+        window = float(request.query_params.get('window', getattr(settings, 'POSE_ALIGNMENT_WINDOW_SECONDS', 5.0)))
+        segment = float(request.query_params.get('segment', 3.0))
+        top = int(request.query_params.get('top', 3))
+    except KeyError:
+        return Response({'error': 'video는 필수입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+    except ValueError:
+        return Response({'error': 'video, window, segment, top은 숫자여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+    if window <= 0 or segment <= 0 or top < 1:
+        return Response({'error': 'window, segment, top은 0보다 커야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+    # 밴드 폭(= 계산량과 메모리)이 window 에 비례하므로 상한을 둠 (NaN 도 여기서 거름)
+    max_window = getattr(settings, 'POSE_ALIGNMENT_MAX_WINDOW_SECONDS', 30.0)
+    if not window <= max_window:
+        return Response({'error': f'window는 최대 {max_window}초입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        track = ExpertPoseTrack.objects.get(video_id=video_id)
+    except ExpertPoseTrack.DoesNotExist:
+        return Response({'error': '전문가 포즈 궤적이 없는 영상입니다.'}, status=status.HTTP_404_NOT_FOUND)
+
+    result = compare_session(session, track, window_seconds=window, segment_seconds=segment, top=top)
+    if result is None:
+        return Response({'error': '비교할 프레임이 없습니다.'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'session': session.id, 'video': video_id, **result})
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def submit_pose_frame(request):
     """실시간 포즈 좌표 전송 + 피드백 반환"""
-    serializer = PoseFrameSerializer(data=request.data)
+    serializer = PoseFrameSerializer(data=request.data, context={'request': request})
     if not serializer.is_valid():
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    # 저장
-    pose_frame = serializer.save()
-
-    # 운동 타입에 따른 피드백 생성
-    exercise_type = request.data.get('exercise_type', 'neck_left')
-    feedback = generate_feedback(pose_frame.keypoints, exercise_type)
-    pose_frame.feedback = feedback
-    pose_frame.save()
+    # 운동 타입에 따른 피드백 생성 (피드백까지 포함해 한 번에 저장)
+    exercise_type = request.data.get('exercise_type', DEFAULT_EXERCISE)
+    if not is_supported_exercise(exercise_type):
+        return Response({
+            'error': f'지원하지 않는 운동 타입입니다: {exercise_type}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    session = serializer.validated_data['session']
+    feedback, keep = session_ingest(
+        session.id,
+        get_ingest_policy(session),
+        serializer.validated_data['keypoints'],
+        exercise_type,
+        serializer.validated_data['timestamp']
+    )
+    flush_summary_if_due(session.id)
+
+    if not keep:
+        # 저장 정책에 따라 버린 프레임 (피드백은 그대로 반환)
+        return Response({
+            'id': None,
+            'kept': 0,
+            'dropped': 1,
+            'feedback': feedback
+        }, status=status.HTTP_200_OK)
+
+    if is_write_behind():
+        # 피드백 먼저 응답, 저장은 백그라운드에서 일괄 처리
+        queued = get_pose_buffer().put(PoseFrame.from_keypoints(**serializer.validated_data, feedback=feedback))
+        return Response({
+            'id': None,
+            'queued': queued,
+            'kept': 1,
+            'dropped': 0,
+            'feedback': feedback
+        }, status=status.HTTP_202_ACCEPTED)
+
+    pose_frame = serializer.save(feedback=feedback)
 
     return Response({
         'id': pose_frame.id,
+        'kept': 1,
+        'dropped': 0,
         'feedback': feedback
     }, status=status.HTTP_201_CREATED)
 
 
-def generate_feedback(keypoints, exercise_type='neck_left'):
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def submit_pose_frame_batch(request):
     """
-    운동 타입별 자세 피드백
-    exercise_type: 'neck_left', 'neck_right', 'shoulder_left', 'shoulder_right'
+    포즈 좌표 일괄 전송 + 프레임별 피드백 반환
+    POST: /pose/submit_batch/
+    {"session": 1, "exercise_type": "neck_left", "frames": [{"timestamp": 0.05, "keypoints": [...]}, ...]}
     """
-    if exercise_type == 'neck_left':
-        return feedback_neck_left(keypoints)
-    elif exercise_type == 'neck_right':
-        return feedback_neck_right(keypoints)
-    elif exercise_type == 'shoulder_left':
-        return feedback_shoulder_left(keypoints)
-    elif exercise_type == 'shoulder_right':
-        return feedback_shoulder_right(keypoints)
-    else:
-        return feedback_neck_left(keypoints)  # 기본값
+    serializer = PoseFrameBatchSerializer(data=request.data, context={'request': request})
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    data = serializer.validated_data
+    pose_frames, feedbacks = build_pose_frames(data['session'], data['frames'], data['exercise_type'])
+    dropped = len(feedbacks) - len(pose_frames)
+
+    if is_write_behind():
+        queued = get_pose_buffer().put_many(pose_frames)
+        return Response({
+            'count': len(feedbacks),
+            'queued': queued,
+            'kept': len(pose_frames),
+            'dropped': dropped,
+            'feedbacks': feedbacks
+        }, status=status.HTTP_202_ACCEPTED)
+
+    # 피드백이 포함된 프레임을 INSERT 한 번으로 저장
+    PoseFrame.objects.bulk_create(pose_frames)
+
+    return Response({
+        'count': len(feedbacks),
+        'kept': len(pose_frames),
+        'dropped': dropped,
+        'feedbacks': feedbacks
+    }, status=status.HTTP_201_CREATED)
 
 
-def feedback_neck_left(keypoints):
-    """목 왼쪽 스트레칭 피드백"""
-    feedback = {
-        'status': 'good',
-        'messages': [],
-        'corrections': {},
-        'angles': {},
-        'has_warnings': False
-    }
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def estimate_pose(request):
+    """
+    서버 측 포즈 추정 + 프레임별 피드백 반환 (multipart/form-data)
+    POST: /pose/estimate/
+    - session: 운동 세션 ID
+    - exercise_type: 운동 타입 (기본 neck_left)
+    - frames: JPEG 파일 여러 개 (순서대로) 또는 clip: 짧은 영상 파일 1개
+    - timestamps: 프레임별 경과 초 (선택, 없으면 start + i / fps)
+    - start, fps: timestamps 가 없을 때 사용 (기본 0, POSE_ESTIMATION_DEFAULT_FPS), clip 은 영상 시각에 start 를 더함
+    - store: 'false' 이면 저장하지 않고 피드백만 반환 (세션 상태, 요약도 갱신하지 않음)
+    """
+    started = time.perf_counter()
+    try:
+        session = WorkoutSession.objects.get(id=request.data.get('session'), user=request.user)
+    except (WorkoutSession.DoesNotExist, ValueError, TypeError):
+        return Response({'error': '세션을 찾을 수 없습니다.'}, status=status.HTTP_404_NOT_FOUND)
+    store = str(request.data.get('store', 'true')).lower() not in ('false', '0')
+    if store and session.end_time is not None:
+        return Response({'error': '이미 종료된 운동 세션입니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    exercise_type = request.data.get('exercise_type', DEFAULT_EXERCISE)
+    if not is_supported_exercise(exercise_type):
+        return Response({
+            'error': f'지원하지 않는 운동 타입입니다: {exercise_type}'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    images = request.FILES.getlist('frames')
+    clip = request.FILES.get('clip')
+    max_frames = getattr(settings, 'POSE_ESTIMATION_MAX_FRAMES', 60)
+    if bool(images) == bool(clip):
+        return Response({'error': 'frames 또는 clip 중 하나를 보내주세요.'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(images) > max_frames:
+        return Response({'error': f'한 번에 최대 {max_frames}프레임까지 보낼 수 있습니다.'}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        nose = next((k for k in keypoints if k['name'] == 'nose'), None)
-        left_ear = next((k for k in keypoints if k['name'] == 'left_ear'), None)
-        right_ear = next((k for k in keypoints if k['name'] == 'right_ear'), None)
-        left_shoulder = next((k for k in keypoints if k['name'] == 'left_shoulder'), None)
-        right_shoulder = next((k for k in keypoints if k['name'] == 'right_shoulder'), None)
-
-        if not all([nose, left_shoulder, right_shoulder]):
-            feedback['status'] = 'warning'
-            feedback['messages'].append('얼굴과 어깨가 잘 보이지 않습니다')
-            return feedback
-
-        # 어깨 수평 체크
-        shoulder_y_diff = abs(left_shoulder['y'] - right_shoulder['y'])
-        if shoulder_y_diff > 0.15:
-            feedback['has_warnings'] = True
-            feedback['messages'].append('⚠️ 어깨를 수평으로 유지하세요')
-
-        # 머리 왼쪽 기울기 체크
-        shoulder_center_x = (left_shoulder['x'] + right_shoulder['x']) / 2
-        nose_offset = nose['x'] - shoulder_center_x
-        feedback['angles']['nose_offset'] = round(nose_offset, 3)
-
-        if nose_offset < -0.04:  # 왼쪽으로 기울임
-            tilt_amount = abs(nose_offset)
-            if tilt_amount > 0.09:
-                feedback['messages'].append('✓ 좋습니다! 목 스트레칭이 잘 되고 있습니다')
-            elif tilt_amount > 0.06:
-                feedback['messages'].append('✓ 조금 더 천천히 당겨보세요')
-            else:
-                feedback['has_warnings'] = True
-                feedback['messages'].append('→ 머리를 왼쪽으로 더 기울이세요')
-        elif nose_offset > 0.04:
-            feedback['has_warnings'] = True
-            feedback['messages'].append('⚠️ 반대 방향입니다. 왼쪽으로 기울이세요')
+        start = float(request.data.get('start', 0))
+    except ValueError:
+        return Response({'error': 'timestamps, start, fps는 숫자여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+    if images:
+        try:
+            timestamps = [float(t) for t in request.data.getlist('timestamps')]
+            fps = float(request.data.get('fps', getattr(settings, 'POSE_ESTIMATION_DEFAULT_FPS', 10)))
+        except ValueError:
+            return Response({'error': 'timestamps, start, fps는 숫자여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if timestamps and len(timestamps) != len(images):
+            return Response({'error': 'timestamps 개수가 frames 개수와 다릅니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not timestamps and fps <= 0:
+            return Response({'error': 'fps는 0보다 커야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        timestamps = timestamps or [start + i / fps for i in range(len(images))]
+
+    timings = {}
+    pool = get_estimator_pool()
+    try:
+        if images:
+            t0 = time.perf_counter()
+            data = [image.read() for image in images]
+            timings['read'] = (time.perf_counter() - t0) * 1000
+            arr, stage_timings = pool.estimate_images(data)
+        else:
+            arr, clip_timestamps, stage_timings = pool.estimate_clip(clip, max_frames)
+            timestamps = [start + t for t in clip_timestamps]
+    except EstimatorBusy as e:
+        response = Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        response['Retry-After'] = '1'
+        return response
+    except EstimatorUnavailable as e:
+        return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    timings.update(stage_timings)
+
+    # 랜드마크 → PoseFrame 키포인트 형식, 인식된 프레임만 저장 정책을 거쳐 저장
+    t0 = time.perf_counter()
+    keypoints = [array_to_keypoints(frame) for frame in arr]
+    detected = [i for i, kps in enumerate(keypoints) if kps]
+    if store:
+        pose_frames, detected_feedbacks = build_pose_frames(
+            session,
+            [{'timestamp': timestamps[i], 'keypoints': keypoints[i]} for i in detected],
+            exercise_type
+        )
+    else:
+        # 미리보기: 세션 상태(스무딩, 저장 정책)와 요약을 건드리지 않고 프레임별 피드백만 계산
+        pose_frames = []
+        detected_feedbacks = [generate_feedback(keypoints[i], exercise_type) for i in detected]
+    feedbacks = [None] * len(keypoints)
+    for i, feedback in zip(detected, detected_feedbacks):
+        feedbacks[i] = feedback
+    missing = generate_feedback([], exercise_type)
+    feedbacks = [feedback or missing for feedback in feedbacks]
+    timings['feedback'] = (time.perf_counter() - t0) * 1000
+
+    t0 = time.perf_counter()
+    if pose_frames:
+        if is_write_behind():
+            get_pose_buffer().put_many(pose_frames)
         else:
-            feedback['has_warnings'] = True
-            feedback['messages'].append('→ 머리를 왼쪽 어깨 방향으로 천천히 기울이세요')
+            PoseFrame.objects.bulk_create(pose_frames)
+    timings['persist'] = (time.perf_counter() - t0) * 1000
+    timings['total'] = (time.perf_counter() - started) * 1000
 
-        # 과도한 기울기 방지
-        if left_ear and right_ear:
-            ear_y_diff = left_ear['y'] - right_ear['y']
-            if ear_y_diff > 0.25:
-                feedback['has_warnings'] = True
-                feedback['messages'].append('⚠️ 너무 많이 기울였습니다. 천천히 돌아오세요')
+    return Response({
+        'session': session.id,
+        'exercise_type': exercise_type,
+        'count': len(keypoints),
+        'detected': len(detected),
+        'stored': len(pose_frames) if store else 0,
+        'frames': [
+            {'timestamp': t, 'keypoints': kps, 'feedback': feedback}
+            for t, kps, feedback in zip(timestamps, keypoints, feedbacks)
+        ],
+        'timings': {stage: round(ms, 2) for stage, ms in timings.items()}
+    })
 
-        if feedback['has_warnings']:
-            feedback['status'] = 'warning'
 
-    except Exception as e:
-        feedback['status'] = 'warning'
-        feedback['messages'].append(f'인식 오류: {str(e)}')
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def find_nearest_templates(request):
+    """
+    프레임 1개와 가장 가까운 전문가 템플릿 (KD-tree 인덱스)
+    POST: /pose/nearest/
+    {"sports": 1, "keypoints": [...], "k": 3, "phase": "peak"}  (k, phase 는 선택사항)
+    """
+    try:
+        sports_id = int(request.data['sports'])
+        k = int(request.data.get('k', 3))
+    except (KeyError, TypeError, ValueError):
+        return Response({'error': 'sports, k는 숫자여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= k <= getattr(settings, 'POSE_TEMPLATE_NEAREST_MAX', 20):
+        return Response({'error': 'k가 허용 범위를 벗어났습니다.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    return feedback
+    try:
+        templates = nearest_templates(sports_id, request.data.get('keypoints'), k=k, phase=request.data.get('phase'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'sports': sports_id, 'templates': templates})
 
 
-def feedback_neck_right(keypoints):
-    """목 오른쪽 스트레칭 피드백"""
-    feedback = {
-        'status': 'good',
-        'messages': [],
-        'corrections': {},
-        'angles': {},
-        'has_warnings': False
-    }
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def classify_pose(request):
+    """
+    프레임 1개 자세 품질 분류 (스포츠의 활성 ML 모델, 동시 요청은 마이크로 배치로 한 번에 예측)
+    POST: /pose/classify/
+    {"sports": 1, "keypoints": [...]}
+    """
+    try:
+        sports_id = int(request.data['sports'])
+    except (KeyError, TypeError, ValueError):
+        return Response({'error': 'sports는 숫자여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        nose = next((k for k in keypoints if k['name'] == 'nose'), None)
-        left_ear = next((k for k in keypoints if k['name'] == 'left_ear'), None)
-        right_ear = next((k for k in keypoints if k['name'] == 'right_ear'), None)
-        left_shoulder = next((k for k in keypoints if k['name'] == 'left_shoulder'), None)
-        right_shoulder = next((k for k in keypoints if k['name'] == 'right_shoulder'), None)
-
-        if not all([nose, left_shoulder, right_shoulder]):
-            feedback['status'] = 'warning'
-            feedback['messages'].append('얼굴과 어깨가 잘 보이지 않습니다')
-            return feedback
-
-        # 어깨 수평 체크
-        shoulder_y_diff = abs(left_shoulder['y'] - right_shoulder['y'])
-        if shoulder_y_diff > 0.15:
-            feedback['has_warnings'] = True
-            feedback['messages'].append('⚠️ 어깨를 수평으로 유지하세요')
-
-        # 머리 오른쪽 기울기 체크
-        shoulder_center_x = (left_shoulder['x'] + right_shoulder['x']) / 2
-        nose_offset = nose['x'] - shoulder_center_x
-        feedback['angles']['nose_offset'] = round(nose_offset, 3)
-
-        if nose_offset > 0.04:  # 오른쪽으로 기울임
-            tilt_amount = abs(nose_offset)
-            if tilt_amount > 0.09:
-                feedback['messages'].append('✓ 좋습니다! 목 스트레칭이 잘 되고 있습니다')
-            elif tilt_amount > 0.06:
-                feedback['messages'].append('✓ 조금 더 천천히 당겨보세요')
-            else:
-                feedback['has_warnings'] = True
-                feedback['messages'].append('→ 머리를 오른쪽으로 더 기울이세요')
-        elif nose_offset < -0.04:
-            feedback['has_warnings'] = True
-            feedback['messages'].append('⚠️ 반대 방향입니다. 오른쪽으로 기울이세요')
-        else:
-            feedback['has_warnings'] = True
-            feedback['messages'].append('→ 머리를 오른쪽 어깨 방향으로 천천히 기울이세요')
+        result = classify_posture(sports_id, request.data.get('keypoints'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        # 시간 초과(InferenceUnavailable), 모델 파일 / 특징 수 불일치 등 예측 실패
+        logger.warning('자세 분류 실패 (sports=%s): %s', sports_id, e)
+        return Response({'error': f'자세 분류를 사용할 수 없습니다: {e}'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    if result is None:
+        return Response({'error': '활성화된 ML 모델이 없습니다.'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({'sports': sports_id, **result})
 
-        # 과도한 기울기 방지
-        if left_ear and right_ear:
-            ear_y_diff = right_ear['y'] - left_ear['y']
-            if ear_y_diff > 0.25:
-                feedback['has_warnings'] = True
-                feedback['messages'].append('⚠️ 너무 많이 기울였습니다. 천천히 돌아오세요')
 
-        if feedback['has_warnings']:
-            feedback['status'] = 'warning'
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_inference_stats(request):
+    """자세 분류 배치 스케줄러 상태 (배치 크기 분포, 대기 지연) - 관리자 전용"""
+    return Response(get_inference_scheduler().stats())
 
-    except Exception as e:
-        feedback['status'] = 'warning'
-        feedback['messages'].append(f'인식 오류: {str(e)}')
 
-    return feedback
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_model_registry_stats(request):
+    """활성 ML 모델 캐시 상태 (불러온 모델 버전, 불러오기/토큰 확인 횟수) - 관리자 전용"""
+    return Response(get_model_registry().stats())
 
 
-def feedback_shoulder_left(keypoints):
-    """어깨 왼쪽 스트레칭 피드백"""
-    feedback = {
-        'status': 'good',
-        'messages': [],
-        'corrections': {},
-        'angles': {},
-        'has_warnings': False
-    }
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_estimator_stats(request):
+    """포즈 추정 작업 프로세스 풀 상태 (처리 중 요청 수, 거절 횟수) - 관리자 전용"""
+    return Response(get_estimator_pool().stats())
 
-    try:
-        left_shoulder = next((k for k in keypoints if k['name'] == 'left_shoulder'), None)
-        right_shoulder = next((k for k in keypoints if k['name'] == 'right_shoulder'), None)
-        left_elbow = next((k for k in keypoints if k['name'] == 'left_elbow'), None)
-        right_elbow = next((k for k in keypoints if k['name'] == 'right_elbow'), None)
-        left_wrist = next((k for k in keypoints if k['name'] == 'left_wrist'), None)
-
-        if not all([left_shoulder, right_shoulder]):
-            feedback['status'] = 'warning'
-            feedback['messages'].append('어깨가 잘 보이지 않습니다')
-            return feedback
-
-        # 어깨 수평 체크
-        shoulder_y_diff = abs(left_shoulder['y'] - right_shoulder['y'])
-        if shoulder_y_diff > 0.15:
-            feedback['has_warnings'] = True
-            feedback['messages'].append('⚠️ 어깨를 수평으로 유지하세요')
-
-        # 왼팔이 몸 앞으로 교차했는지 체크
-        if left_wrist and right_shoulder:
-            # 왼쪽 손목이 오른쪽 어깨 방향으로 이동
-            wrist_cross = left_wrist['x'] - right_shoulder['x']
-            if wrist_cross > -0.1:  # 충분히 교차
-                feedback['messages'].append('✓ 좋습니다! 어깨 스트레칭이 잘 되고 있습니다')
-            else:
-                feedback['has_warnings'] = True
-                feedback['messages'].append('→ 왼팔을 오른쪽으로 더 당겨보세요')
-
-        if not feedback['messages']:
-            feedback['messages'].append('→ 왼팔을 가슴 앞으로 교차시켜주세요')
-            feedback['has_warnings'] = True
-
-        if feedback['has_warnings']:
-            feedback['status'] = 'warning'
 
-    except Exception as e:
-        feedback['status'] = 'warning'
-        feedback['messages'].append(f'인식 오류: {str(e)}')
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_feedback_cache_stats(request):
+    """피드백 캐시 상태 (항목 수, 적중률) - 관리자 전용"""
+    return Response({
+        'enabled': is_feedback_cache_enabled(),
+        **get_feedback_cache().stats()
+    })
 
-    return feedback
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_session_state_stats(request):
+    """세션별 평활화 상태와 세션 요약 누적값 상태 (세션 수, 만료/내보낸 횟수) - 관리자 전용"""
+    return Response({
+        'smoothing': is_smoothing(),
+        'states': get_session_states().stats(),
+        'summaries': get_session_summaries().stats(),
+    })
 
-def feedback_shoulder_right(keypoints):
-    """어깨 오른쪽 스트레칭 피드백"""
-    feedback = {
-        'status': 'good',
-        'messages': [],
-        'corrections': {},
-        'angles': {},
-        'has_warnings': False
-    }
 
-    try:
-        left_shoulder = next((k for k in keypoints if k['name'] == 'left_shoulder'), None)
-        right_shoulder = next((k for k in keypoints if k['name'] == 'right_shoulder'), None)
-        right_elbow = next((k for k in keypoints if k['name'] == 'right_elbow'), None)
-        right_wrist = next((k for k in keypoints if k['name'] == 'right_wrist'), None)
-
-        if not all([left_shoulder, right_shoulder]):
-            feedback['status'] = 'warning'
-            feedback['messages'].append('어깨가 잘 보이지 않습니다')
-            return feedback
-
-        # 어깨 수평 체크
-        shoulder_y_diff = abs(left_shoulder['y'] - right_shoulder['y'])
-        if shoulder_y_diff > 0.15:
-            feedback['has_warnings'] = True
-            feedback['messages'].append('⚠️ 어깨를 수평으로 유지하세요')
-
-        # 오른팔이 몸 앞으로 교차했는지 체크
-        if right_wrist and left_shoulder:
-            # 오른쪽 손목이 왼쪽 어깨 방향으로 이동
-            wrist_cross = right_wrist['x'] - left_shoulder['x']
-            if wrist_cross < 0.1:  # 충분히 교차
-                feedback['messages'].append('✓ 좋습니다! 어깨 스트레칭이 잘 되고 있습니다')
-            else:
-                feedback['has_warnings'] = True
-                feedback['messages'].append('→ 오른팔을 왼쪽으로 더 당겨보세요')
-
-        if not feedback['messages']:
-            feedback['messages'].append('→ 오른팔을 가슴 앞으로 교차시켜주세요')
-            feedback['has_warnings'] = True
-
-        if feedback['has_warnings']:
-            feedback['status'] = 'warning'
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_template_index_stats(request):
+    """템플릿 인덱스 상태 (인덱스 수, 생성/무효화 횟수) - 관리자 전용"""
+    return Response(get_template_indexes().stats())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def get_pose_buffer_stats(request):
+    """쓰기 지연 버퍼 상태 (대기열 길이, 저장/버림 카운터) - 관리자 전용"""
+    return Response({
+        'write_behind': is_write_behind(),
+        **get_pose_buffer().stats()
+    })
 
-    except Exception as e:
-        feedback['status'] = 'warning'
-        feedback['messages'].append(f'인식 오류: {str(e)}')
 
-    return feedback
+def build_pose_frames(session, frames, exercise_type=DEFAULT_EXERCISE):
+    """
+    프레임 목록의 피드백을 계산하고 저장할 PoseFrame 객체를 만든다
+    반환값: (저장 정책을 통과한 PoseFrame 리스트, 모든 프레임의 피드백 리스트) - 입력 순서 유지
+    """
+    policy = get_ingest_policy(session)
+    pose_frames = []
+    feedbacks = []
+    for frame in frames:
+        feedback, keep = session_ingest(session.id, policy, frame['keypoints'], exercise_type, frame['timestamp'])
+        if keep:
+            pose_frames.append(PoseFrame.from_keypoints(
+                frame['keypoints'],
+                session=session,
+                timestamp=frame['timestamp'],
+                feedback=feedback,
+            ))
+        feedbacks.append(feedback)
+    flush_summary_if_due(session.id)
+    return pose_frames, feedbacks
 
 
 @api_view(['GET'])
@@ -490,6 +717,19 @@ def get_workout_sessions(request):
     return Response(serializer.data)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_workout_session(request, session_id):
+    """운동 세션 상세 (요약 포함, PoseFrame 조회 없음)"""
+    try:
+        session = WorkoutSession.objects.get(id=session_id, user=request.user)
+    except WorkoutSession.DoesNotExist:
+        return Response({'error': '세션을 찾을 수 없습니다.'}, status=status.HTTP_404_NOT_FOUND)
+
+    serializer = WorkoutSessionSerializer(session)
+    return Response(serializer.data)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_sports_list(request):
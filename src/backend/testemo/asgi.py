@@ -9,8 +9,15 @@ https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
 
 import os
 
+import socketio
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'testemo.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Django 초기화 이후에 import (모델 로딩 필요)
+from emodia.realtime import sio  # noqa: E402
+
+# /socket.io/ 는 실시간 포즈 스트리밍, 나머지는 Django로 전달
+application = socketio.ASGIApp(sio, other_asgi_app=django_application)
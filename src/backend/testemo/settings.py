@@ -162,4 +162,80 @@ KAKAO_REDIRECT_URI = "http://127.0.0.1:8000/users/kakao/callback/"
 KAKAO_CLIENT_SECRET = os.getenv("KAKAO_CLIENT_SECRET", "")
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media'
+# 포즈 프레임 수집 설정
+POSE_BATCH_MAX_FRAMES = 300  # /api/pose/submit_batch/ 한 요청당 최대 프레임 수
+POSE_STREAM_FLUSH_FRAMES = 60  # Socket.IO 스트리밍: 이 개수만큼 모이면 bulk_create
+
+# PoseFrame 쓰기 지연(write-behind) 모드: 피드백 먼저 응답, 저장은 백그라운드 일괄 처리
+POSE_WRITE_BEHIND = False
+POSE_BUFFER_MAX_SIZE = 10000  # 프로세스별 대기열 최대 프레임 수
+POSE_BUFFER_BATCH_SIZE = 500  # 이 개수가 쌓이면 즉시 flush
+POSE_BUFFER_FLUSH_INTERVAL = 1.0  # 최대 flush 간격 (초)
+POSE_BUFFER_PUT_TIMEOUT = 0.05  # 대기열이 가득 찼을 때 기다리는 시간 (초), 이후 버림
+
+# PoseFrame 키포인트 저장 형식: 'json' (딕셔너리 리스트) 또는 'packed' (float32 바이너리)
+POSE_KEYPOINT_STORAGE = 'json'
+
+# 세션 종료 시 PoseFrame 행을 세션별 .npz 압축본으로 합치고 행 삭제
+POSE_COMPACT_ON_END = False
+
+# 세션별 피드백 평활화: 키포인트 지수이동평균 + 상태 전환 히스테리시스
+POSE_SMOOTHING = False
+POSE_SMOOTHING_ALPHA = 0.5  # EMA 가중치 (1에 가까울수록 최신 프레임 비중이 큼)
+POSE_STATUS_CONFIRM_FRAMES = 3  # good/warning 전환에 필요한 연속 프레임 수
+POSE_SESSION_STATE_MAX = 1000  # 프로세스별 보관할 최대 세션 상태 수 (초과 시 오래 안 쓴 것부터 제거)
+POSE_SESSION_STATE_TTL = 600  # 이 시간(초) 동안 프레임이 없으면 세션 상태 제거
+
+# 프레임 저장 정책 기본값 (WorkoutSession.ingest_policy 로 세션별 덮어쓰기, 0 이면 사용 안 함)
+POSE_INGEST_MIN_DELTA = 0.0  # 마지막 저장 프레임 대비 좌표 변화가 이보다 작으면 저장 안 함
+POSE_INGEST_MIN_CONFIDENCE = 0.0  # 평균 score 가 이보다 낮으면 저장 안 함
+
+# 피드백 캐시: 운동에 쓰이는 키포인트 좌표가 같은 격자 칸이면 피드백 재사용 (프로세스별 LRU)
+# 적중 전에도 parse_pose 로 검증하므로 파싱된 Pose 를 바로 평가하는 것보다 빠르지 않음 (기본 꺼짐)
+POSE_FEEDBACK_CACHE = False
+POSE_FEEDBACK_CACHE_SIZE = 4096  # 최대 항목 수
+POSE_FEEDBACK_CACHE_GRID = 0.005  # 좌표 격자 간격 (정규화 좌표 기준)
+
+# 서버 측 포즈 추정 (/api/pose/estimate/, MediaPipe 작업 프로세스 풀)
+POSE_ESTIMATION_WORKERS = 2  # 작업 프로세스 수 (프로세스마다 모델 1개 로드)
+POSE_ESTIMATION_BATCH_SIZE = 8  # 작업 프로세스에 한 번에 보내는 프레임 수
+POSE_ESTIMATION_MAX_QUEUE = 32  # 처리 중인 묶음 수 상한 (넘으면 503)
+POSE_ESTIMATION_MAX_FRAMES = 60  # 요청당 최대 프레임 수 (영상은 앞에서부터 이 개수까지)
+POSE_ESTIMATION_TIMEOUT = 30.0  # 묶음당 최대 대기 시간 (초)
+POSE_ESTIMATION_MODEL_COMPLEXITY = 1  # MediaPipe Pose model_complexity (0, 1, 2)
+POSE_ESTIMATION_MIN_CONFIDENCE = 0.5  # MediaPipe min_detection_confidence
+POSE_ESTIMATION_DEFAULT_FPS = 10  # timestamps 가 없을 때 프레임 간격 계산용
+
+# 세션 요약: 프레임마다 프로세스 내 누적값 갱신, 이 프레임 수마다 + 세션 종료 시 WorkoutSession.summary 에 반영
+POSE_SUMMARY_FLUSH_FRAMES = 300
+POSE_SUMMARY_MAX_GAP = 1.0  # 바른 자세 유지 시간에 포함할 최대 프레임 간격 (초)
+POSE_PHASE_WINDOW = 5  # 운동 단계 판정에 쓰는 진행도 이동평균 프레임 수
+
+# 프레임 기록 보관: 종료 후 이 기간(일)이 지난 세션을 월별 zip 으로 옮기고 행 삭제 (archive_pose_frames)
+POSE_ARCHIVE_AFTER_DAYS = 180
+POSE_ARCHIVE_DIR = BASE_DIR / 'pose_archive'  # MEDIA_ROOT 밖 (웹으로 제공하지 않음)
+
+# 세션 재생 스트리밍 (/api/workout/<id>/replay/): PoseFrame 행 / 압축본 프레임을 한 번에 읽는 수
+POSE_REPLAY_CHUNK_SIZE = 2000
+# 세션 프레임 조회 (/api/workout/<id>/frames/): 한 페이지 최대 프레임 수
+POSE_FRAMES_PAGE_SIZE = 2000
+
+# 전문가 궤적 DTW 비교 (/api/workout/<id>/compare/, 실시간 'alignment' 이벤트)
+POSE_ALIGNMENT_WINDOW_SECONDS = 5.0  # 허용할 시간 어긋남 (Sakoe-Chiba 밴드 반경, 초)
+POSE_ALIGNMENT_MAX_WINDOW_SECONDS = 30.0  # /compare/ 의 window 상한 (밴드 폭에 비례해 메모리 사용)
+POSE_ALIGNMENT_EMIT_FRAMES = 10  # 실시간 스트림에서 'alignment' 이벤트를 보내는 프레임 간격
+
+# 전문가 템플릿 최근접 이웃 인덱스 (/api/pose/nearest/, 실시간 auth 의 nearest)
+POSE_TEMPLATE_INDEX_TTL = 300  # 이 시간(초)마다 다시 생성 (다른 프로세스의 템플릿 변경 반영)
+POSE_TEMPLATE_NEAREST_MAX = 20  # 요청당 최대 k
+
+# ML 모델: 작업 프로세스마다 활성 모델을 한 번만 로드, 이 간격(초)마다 활성 모델 버전만 확인해 교체
+POSE_MODEL_CHECK_INTERVAL = 5.0
+POSE_INFERENCE_MAX_BATCH = 64  # 자세 분류 요청을 모아 한 번에 예측할 최대 개수
+POSE_INFERENCE_MAX_WAIT = 0.005  # 첫 요청 이후 다른 요청을 기다리는 최대 시간 (초)
+POSE_INFERENCE_PREDICT_TIMEOUT = 1.0  # 결과 대기 시간 = 10 * MAX_WAIT + 이 값 (초), 넘으면 503 / 분류 없음
+
+# 특징 저장소: 켜면 포즈 프레임 저장 시 특징 벡터도 계산해 저장 (특징 정의가 바뀌면 backfill_features 로 다시 계산)
+# 저장 비용만 들고 아직 읽는 곳이 없으며 세션 압축/보관 시 사라지므로 기본은 끔 (템플릿 특징은 항상 저장)
+POSE_FRAME_FEATURES = False